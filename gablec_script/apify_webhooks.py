@@ -0,0 +1,89 @@
+"""Webhook-driven Apify ingestion (APIFY_INGEST=webhook).
+
+Instead of `actor.call()`, which blocks for the whole scrape, the scrape
+phase starts every actor run at once with an ad-hoc webhook attached, then
+waits on this receiver. Each finished run POSTs its event here and the
+restaurant is ingested and extracted straight away, while the other runs are
+still scraping. The process sleeps on a queue in the meantime.
+
+Apify must be able to reach the receiver: WEBHOOK_PUBLIC_URL is the public
+address (a tunnel or port-forward to WEBHOOK_PORT). Every run gets a random
+token in the webhook URL and requests without it are rejected.
+"""
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+SUCCEEDED = "ACTOR.RUN.SUCCEEDED"
+TERMINAL_EVENTS = [SUCCEEDED, "ACTOR.RUN.FAILED", "ACTOR.RUN.ABORTED", "ACTOR.RUN.TIMED_OUT"]
+WEBHOOK_PATH = "/apify"
+
+
+def webhook_spec(request_url: str, page_url: str) -> dict:
+    """Ad-hoc webhook for one actor run. The payload names the page the run is for."""
+    template = '{"pageUrl": %s, "eventType": {{eventType}}, "resource": {{resource}}}' % json.dumps(page_url)
+    return {"event_types": TERMINAL_EVENTS, "request_url": request_url, "payload_template": template}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != WEBHOOK_PATH or parse_qs(url.query).get("token") != [self.server.secret]:
+            self.send_error(403)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            resource = body.get("resource") or {}
+            event = {
+                "page_url": body["pageUrl"],
+                "event_type": body["eventType"],
+                "run_id": resource["id"],
+                "dataset_id": resource.get("defaultDatasetId"),
+            }
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.send_error(400)
+            return
+        self.server.events.put(event)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookReceiver:
+    """Local HTTP server that queues Apify run events as
+    {"page_url", "event_type", "run_id", "dataset_id"}."""
+
+    def __init__(self, secret: str, host: str = "0.0.0.0", port: int = 8765):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.secret = secret
+        self.server.events = queue.Queue()
+        self._thread = threading.Thread(target=self.server.serve_forever, args=(0.2,), daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def request_url(self, public_url: str = "") -> str:
+        """Webhook URL for Apify: public_url if given, else the receiver's local address."""
+        base = public_url.rstrip("/") or f"http://127.0.0.1:{self.port}"
+        return f"{base}{WEBHOOK_PATH}?token={self.server.secret}"
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def next_event(self, timeout: float) -> dict | None:
+        """The next run event, or None if none arrives within timeout seconds."""
+        try:
+            return self.server.events.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            return None
@@ -0,0 +1,156 @@
+"""Evening-before prefetch through the Gemini Batch API (`main.py --mode prefetch`).
+
+Weekly menus are often posted on Sunday or the evening before. Extracting them
+is not urgent, so instead of synchronous generate_content calls at the
+08:00 peak, the prefetch scrapes every page that has no menu for the next
+weekday yet, sends all the Gemini requests as one batch job (batch quota, half
+the price), polls it and writes the results into the cache. The morning scrape
+then finds those restaurants cached and only calls Gemini synchronously for
+the stragglers.
+"""
+import os
+import time
+from datetime import datetime, timedelta, date
+
+from google.genai.types import JobState
+
+import gablec_daily as gd
+from fast_path import fast_path_extract, merge_menu_results
+from menu_history import archive_week
+from post_filter import filter_posts
+from tenants import all_pages, sent_marker
+
+
+PREFETCH_MODEL = os.getenv("PREFETCH_MODEL", gd.GEMINI_MODELS[0])
+PREFETCH_POLL_SECONDS = int(os.getenv("PREFETCH_POLL_SECONDS", "60"))
+# The Batch API promises results within 24h but usually needs minutes; give
+# up well before the morning run. Anything unfinished is scraped again then.
+PREFETCH_TIMEOUT = int(os.getenv("PREFETCH_TIMEOUT", str(4 * 3600)))
+
+DONE_STATES = {JobState.JOB_STATE_SUCCEEDED, JobState.JOB_STATE_PARTIALLY_SUCCEEDED,
+               JobState.JOB_STATE_FAILED, JobState.JOB_STATE_CANCELLED, JobState.JOB_STATE_EXPIRED}
+
+
+def next_weekday(now_local: datetime) -> date:
+    """The weekday the prefetch is for: tomorrow, or Monday from Friday evening on."""
+    day = now_local.date() + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def wait_for_batch(name: str, poll_seconds: int = None, timeout: int = None):
+    """Poll a batch job until it finishes. Returns the job, or None on timeout."""
+    poll_seconds = poll_seconds if poll_seconds is not None else PREFETCH_POLL_SECONDS
+    deadline = time.monotonic() + (timeout if timeout is not None else PREFETCH_TIMEOUT)
+    while True:
+        job = gd.client_gemini.batches.get(name=name)
+        print(f"Batch {name}: {job.state}")
+        if job.state in DONE_STATES:
+            return job
+        if time.monotonic() + poll_seconds > deadline:
+            return None
+        time.sleep(poll_seconds)
+
+
+def current_week_done(cache: dict, now_local: datetime) -> bool:
+    """Whether the cached week may be archived: it is the weekend, or every tenant got today's menus."""
+    today = now_local.date()
+    if today.weekday() >= 5:
+        return True
+    return all(cache.get(sent_marker(tenant)) == today.isoformat() for tenant in gd.get_tenants())
+
+
+def run_prefetch(now_local: datetime | None = None) -> int:
+    """Prefetch the next weekday's menus. Returns the number of restaurants stored."""
+    now_local = now_local or datetime.now(gd.TZ)
+    target = next_weekday(now_local)
+    print(f"=== PREFETCH for {target.isoformat()} ({gd.CROATIAN_DAYS[target.weekday()]}) ===")
+    print("=" * 60)
+
+    state = gd.get_state_backend()
+    cache = state.load_cache()
+    if not gd.is_cache_valid_for_week(cache, target):
+        if not current_week_done(cache, now_local):
+            # A Friday run before the 08:00 send would archive and clear Friday's menus.
+            print("Today's menus are not sent yet - not rolling the cache over to next week.")
+            return 0
+        # Same rollover scrape_and_process does on Monday, done the evening before.
+        if cache.get("restaurants"):
+            added = archive_week(cache)
+            print(f"Archived last week's menus to history ({added} new items)")
+        print("Prefetching into a new week - clearing cache")
+        cache = state.reset_week(cache, gd.get_week_start(target).isoformat())
+
+    pages = [p for p in all_pages(gd.get_tenants()) if not gd.has_today_menu(cache, p, target)]
+    if not pages:
+        print("Every restaurant already has a menu for that day.")
+        return 0
+
+    since_date = target - timedelta(days=4)
+    requests, pending, stored = [], {}, 0
+    print(f"\nFetching {len(pages)} pages...")
+    for page_url, posts in gd.fetch_posts_for_pages(pages, since_date, target).items():
+        print(f"\n{'='*40}")
+        print(f"Page: {page_url}")
+        if not posts:
+            print(f"No posts found for {page_url}")
+            continue
+        name = gd.page_display_name(posts, page_url)
+        posts = filter_posts(posts, target)
+        fast, llm_posts = fast_path_extract(posts, target)
+        if not llm_posts:
+            print(f"{name}: parsed locally, no Gemini call needed.")
+            gd.store_result(cache, name, page_url, now_local, fast)
+            stored += 1
+            continue
+        # The prompt's "today" is the real date; only the week is the target's.
+        parts, _ = gd.single_restaurant_parts(name, llm_posts, now_local.date(), skip_images=False,
+                                              week_start=gd.get_week_start(target))
+        requests.append({"contents": [{"role": "user", "parts": parts}], "metadata": {"restaurant": name}})
+        pending[name] = (page_url, fast)
+
+    if not requests:
+        return stored
+
+    job = gd.client_gemini.batches.create(
+        model=PREFETCH_MODEL,
+        src=requests,
+        config={"display_name": f"gablec-prefetch-{target.isoformat()}"},
+    )
+    print(f"\nSubmitted batch {job.name} with {len(requests)} restaurants to {PREFETCH_MODEL}")
+
+    job_name = job.name
+    job = wait_for_batch(job_name)
+    if job is None:
+        print("Batch did not finish in time - the morning scrape will extract these restaurants.")
+        # Cancel it so late results are not billed for nothing.
+        try:
+            gd.client_gemini.batches.cancel(name=job_name)
+        except Exception as e:
+            print(f"Could not cancel batch {job_name}: {e}")
+        return stored
+    if job.state not in (JobState.JOB_STATE_SUCCEEDED, JobState.JOB_STATE_PARTIALLY_SUCCEEDED):
+        print(f"Batch ended as {job.state}: {job.error}")
+        return stored
+
+    responses = (job.dest.inlined_responses if job.dest else None) or []
+    # Each response carries its request's metadata; order is not relied on.
+    for inlined in responses:
+        name = (inlined.metadata or {}).get("restaurant")
+        if name not in pending:
+            print(f"Batch response without a known restaurant ({inlined.metadata}) - skipped.")
+            continue
+        page_url, fast = pending.pop(name)
+        result = gd.parse_gemini_json(inlined.response) if inlined.response is not None else None
+        if inlined.error or not gd.is_menu_result(result):
+            print(f"{name}: no usable batch result - left for the morning scrape.")
+            continue
+        print(f"\n{name}:")
+        gd.store_result(cache, name, page_url, now_local, merge_menu_results(fast, result))
+        stored += 1
+    for name in pending:
+        print(f"{name}: missing from the batch results - left for the morning scrape.")
+
+    gd.precompile_payloads(state.load_cache(), target)
+    return stored
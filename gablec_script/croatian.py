@@ -0,0 +1,19 @@
+"""Croatian text helpers shared by the parser, the post filter, the items table and subscriptions."""
+import unicodedata
+
+
+# Croatian day names for nicer formatting
+CROATIAN_DAYS = {
+    0: "Ponedjeljak", 1: "Utorak", 2: "Srijeda",
+    3: "Četvrtak", 4: "Petak", 5: "Subota", 6: "Nedjelja"
+}
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip Croatian diacritics (č/ć/š/ž -> c/c/s/z, đ -> d)."""
+    text = text.lower().replace("đ", "d")
+    return "".join(c for c in unicodedata.normalize("NFD", text) if not unicodedata.combining(c))
+
+
+# Folded day name -> weekday (0 = Monday).
+FOLDED_DAYS = {fold(name): weekday for weekday, name in CROATIAN_DAYS.items()}
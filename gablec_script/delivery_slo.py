@@ -0,0 +1,253 @@
+"""Delivery SLO history: are menus ready by 08:00 and posted by 09:30?
+
+Every scrape run, stored restaurant and send decision is appended to a small
+SQLite database:
+
+    scrape_runs  day, started_at                    one row per scrape run
+    ready        day, page_url, restaurant,         first time the restaurant had
+                 ready_at, attempt                  that day's menu, and which scrape
+                                                    run of the day got it (0 = ready
+                                                    before the day's first run, e.g.
+                                                    a weekly menu or the prefetch)
+    sends        day, channel, at, final,           every send decision: post /
+                 action, ready, total               defer / skip_empty / skip_sent /
+                                                    failed, with the completeness seen
+
+The report gives, per week: p50/p95 time-to-ready (minutes from the day's
+first scrape run, 0 when already ready), the share of restaurants ready by
+SEND_TARGET, how often Send #1 posted a complete menu, the deadline hit rate
+(posted by DEADLINE) and empty-send incidents.
+
+    python delivery_slo.py report --weeks 4
+"""
+import argparse
+import math
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+
+SLO_DB = Path(os.getenv("DELIVERY_SLO_DB", str(Path(__file__).parent.parent / "delivery_slo.sqlite")))
+SLO_ENABLED = os.getenv("DELIVERY_SLO", "1") == "1"
+TZ = ZoneInfo("Europe/Zagreb")
+SEND_TARGET = time(8, 0)      # Send #1: complete menu
+DEADLINE = time(9, 30)        # Send #2: whatever is ready
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scrape_runs (
+    day TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    PRIMARY KEY (day, started_at)
+);
+CREATE TABLE IF NOT EXISTS ready (
+    day TEXT NOT NULL,
+    page_url TEXT NOT NULL,
+    restaurant TEXT NOT NULL,
+    ready_at TEXT NOT NULL,
+    attempt INTEGER NOT NULL,
+    PRIMARY KEY (day, page_url)
+);
+CREATE TABLE IF NOT EXISTS sends (
+    day TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    at TEXT NOT NULL,
+    final INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    ready INTEGER NOT NULL,
+    total INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sends_day ON sends(day);
+"""
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    """Open (and if needed create) the SLO database."""
+    conn = sqlite3.connect(path or SLO_DB)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _local(moment: datetime) -> datetime:
+    return moment.astimezone(TZ)
+
+
+def _write(sql: str, params: tuple, path: Path | None = None):
+    """One insert; never lets the SLO log break a scrape or a send."""
+    if not SLO_ENABLED:
+        return
+    try:
+        conn = connect(path)
+        with conn:
+            conn.execute(sql, params)
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"  Could not record delivery SLO data: {e}")
+
+
+def record_scrape_run(started_at: datetime, path: Path | None = None):
+    """A scrape run started (scrape_and_process, after the weekend check)."""
+    started_at = _local(started_at)
+    _write("INSERT OR IGNORE INTO scrape_runs(day, started_at) VALUES (?, ?)",
+           (started_at.date().isoformat(), started_at.isoformat(timespec="seconds")), path)
+
+
+def record_ready(page_url: str, restaurant: str, days: list, ready_at: datetime, path: Path | None = None):
+    """The restaurant has menus for `days` as of `ready_at`; only the first time per day is kept.
+
+    Days already past (a weekly menu found mid-week) are ignored.
+    """
+    ready_at = _local(ready_at)
+    days = [day for day in days if day >= ready_at.date().isoformat()]
+    if not SLO_ENABLED or not days:
+        return
+    stamp = ready_at.isoformat(timespec="seconds")
+    try:
+        conn = connect(path)
+        with conn:
+            for day in days:
+                (attempt,) = conn.execute("SELECT COUNT(*) FROM scrape_runs WHERE day = ? AND started_at <= ?",
+                                          (day, stamp)).fetchone()
+                conn.execute("INSERT OR IGNORE INTO ready(day, page_url, restaurant, ready_at, attempt) "
+                             "VALUES (?, ?, ?, ?, ?)", (day, page_url, restaurant, stamp, attempt))
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"  Could not record delivery SLO data: {e}")
+
+
+def record_send(day: date, channel: str, at: datetime, final: bool, action: str, ready: int, total: int,
+                path: Path | None = None):
+    """One send decision (decide_send_action's action, or 'failed' when Slack refused the post)."""
+    _write("INSERT INTO sends(day, channel, at, final, action, ready, total) VALUES (?, ?, ?, ?, ?, ?, ?)",
+           (day.isoformat(), channel, _local(at).isoformat(timespec="seconds"), int(final), action, ready, total),
+           path)
+
+
+def _minutes_to_ready(ready_at: str, first_run: str | None) -> float:
+    if first_run is None:
+        return 0.0
+    return max(0.0, (datetime.fromisoformat(ready_at) - datetime.fromisoformat(first_run)).total_seconds() / 60)
+
+
+def _ready_by(stamp: str, day: str, target: time) -> bool:
+    return datetime.fromisoformat(stamp) <= datetime.combine(date.fromisoformat(day), target, TZ)
+
+
+def _week_start(day: str) -> str:
+    d = date.fromisoformat(day)
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+def _new_week() -> dict:
+    return {"ttr": [], "by_target": 0, "first_attempt": 0, "restaurants": {},
+            "send1": {}, "deadline": {}, "empty": 0, "failed": 0}
+
+
+def weekly_report(since: date, until: date, path: Path | None = None) -> dict:
+    """{week_start: stats} for the weeks between since and until (inclusive).
+
+    stats: ready (count), ttr_p50, ttr_p95 (minutes), ready_by_target and
+    first_attempt (shares), send1_days, send1_complete, deadline_days,
+    deadline_hit (share or None), empty_sends, failed_sends and per_restaurant
+    {name: (ready, ttr_p50, ttr_p95)}.
+    """
+    conn = connect(path)
+    bounds = (since.isoformat(), until.isoformat())
+    first_runs = dict(conn.execute("SELECT day, MIN(started_at) FROM scrape_runs WHERE day BETWEEN ? AND ? "
+                                   "GROUP BY day", bounds).fetchall())
+    ready_rows = conn.execute("SELECT day, restaurant, ready_at, attempt FROM ready WHERE day BETWEEN ? AND ?",
+                              bounds).fetchall()
+    send_rows = conn.execute("SELECT day, channel, at, final, action FROM sends WHERE day BETWEEN ? AND ? "
+                             "ORDER BY at", bounds).fetchall()
+    conn.close()
+
+    weeks = {}
+    for day, restaurant, ready_at, attempt in ready_rows:
+        w = weeks.setdefault(_week_start(day), _new_week())
+        minutes = _minutes_to_ready(ready_at, first_runs.get(day))
+        w["ttr"].append(minutes)
+        w["restaurants"].setdefault(restaurant, []).append(minutes)
+        w["by_target"] += _ready_by(ready_at, day, SEND_TARGET)
+        w["first_attempt"] += attempt <= 1
+
+    for day, channel, at, final, action in send_rows:
+        w = weeks.setdefault(_week_start(day), _new_week())
+        key = (day, channel)
+        if action == "skip_sent":
+            continue   # a post for this day and channel is already recorded
+        if not final:
+            w["send1"][key] = w["send1"].get(key, False) or action == "post"
+        w["deadline"][key] = w["deadline"].get(key, False) or (action == "post" and _ready_by(at, day, DEADLINE))
+        w["empty"] += action == "skip_empty"
+        w["failed"] += action == "failed"
+
+    report = {}
+    for week, w in sorted(weeks.items()):
+        n = len(w["ttr"])
+        report[week] = {
+            "ready": n,
+            "ttr_p50": percentile(w["ttr"], 50),
+            "ttr_p95": percentile(w["ttr"], 95),
+            "ready_by_target": w["by_target"] / n if n else None,
+            "first_attempt": w["first_attempt"] / n if n else None,
+            "send1_days": len(w["send1"]),
+            "send1_complete": sum(w["send1"].values()) / len(w["send1"]) if w["send1"] else None,
+            "deadline_days": len(w["deadline"]),
+            "deadline_hit": sum(w["deadline"].values()) / len(w["deadline"]) if w["deadline"] else None,
+            "empty_sends": w["empty"],
+            "failed_sends": w["failed"],
+            "per_restaurant": {name: (len(v), percentile(v, 50), percentile(v, 95))
+                               for name, v in sorted(w["restaurants"].items())},
+        }
+    return report
+
+
+def _share(value) -> str:
+    return f"{value:.0%}" if value is not None else "-"
+
+
+def print_report(report: dict):
+    print(f"\n{'week':<11} {'ready':>5} {'p50 min':>8} {'p95 min':>8} {'by 08:00':>9} {'1st run':>8} "
+          f"{'send1 ok':>9} {'by 09:30':>9} {'empty':>6} {'failed':>7}")
+    for week, st in report.items():
+        print(f"{week:<11} {st['ready']:>5} {st['ttr_p50']:>8.0f} {st['ttr_p95']:>8.0f} "
+              f"{_share(st['ready_by_target']):>9} {_share(st['first_attempt']):>8} "
+              f"{_share(st['send1_complete']):>9} {_share(st['deadline_hit']):>9} "
+              f"{st['empty_sends']:>6} {st['failed_sends']:>7}")
+    for week, st in report.items():
+        if st["per_restaurant"]:
+            print(f"\n{week} time-to-ready per restaurant (days, p50, p95 minutes):")
+            for name, (days, p50, p95) in st["per_restaurant"].items():
+                print(f"  {name:<30} {days:>3} {p50:>6.0f} {p95:>6.0f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gablec delivery SLO report")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_report = sub.add_parser("report", help="weekly time-to-ready and send SLOs")
+    p_report.add_argument("--weeks", type=int, default=4, help="how many recent weeks")
+    args = parser.parse_args(argv)
+
+    today = datetime.now(TZ).date()
+    since = today - timedelta(days=today.weekday()) - timedelta(weeks=args.weeks - 1)
+    report = weekly_report(since, today)
+    if not report:
+        print("No delivery data recorded yet.")
+        return 1
+    print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""Rule-based fast path for plain-text menu posts.
+
+Posts like "Marenda: juha, segedin", or a week listed under day-name
+headers, are parsed locally; only posts the parser is not confident about
+(and image-only posts) go to Gemini. Results have the same shape as
+gablec_daily.ask_gemini_for_weekly_menu, so they merge with Gemini's.
+"""
+import os
+import re
+from datetime import date, datetime, timedelta
+
+from croatian import FOLDED_DAYS, fold
+
+
+FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.75"))
+
+# Words that head a single-day menu (compared without diacritics, lowercase).
+DAILY_MENU_HEADERS = ("marenda", "gablec", "gableci", "dnevni meni", "dnevni menu",
+                      "meni dana", "menu dana", "ponuda dana", "jelovnik", "danas")
+
+# Word stems (folded) that mark an item as food; a header followed by
+# "živa glazba od 20h" has a day and items but nothing to eat.
+DISH_STEMS = ("juh", "krem", "varivo", "grah", "gulas", "sarm", "cobanac", "segedin", "mahun", "grasak",
+              "kelj", "kupus", "pecen", "pohan", "przen", "piletin", "pilec", "puret", "junet", "teletin",
+              "svinj", "odrezak", "snicl", "becki", "file", "kobasic", "cevap", "pljeskav", "fasir", "mesn",
+              "riba", "ribl", "oslic", "lignj", "srdel", "bakalar", "tjestenin", "spaget", "lazanj", "njok",
+              "mlinc", "rizot", "riza", "pire", "krumpir", "pomfrit", "salat", "prilog", "musak", "punjen",
+              "paprikas", "ragu", "umak", "pizz", "burger", "sendvic", "kolac", "palacink", "strudl",
+              "desert", "tort", "posn", "omlet", "zganc", "polent")
+
+PRICE_RE = re.compile(r"(\d{1,3}(?:[.,]\d{1,2})?)\s*(€|eur\b|e\b|kn\b)", re.IGNORECASE)
+DATE_RE = re.compile(r"\b(\d{1,2})\.\s?(\d{1,2})\.(?:\s?(\d{4})\.?)?")
+# Commas and semicolons between dishes, but not the decimal comma of "8,90".
+_INLINE_SPLIT_RE = re.compile(r"\s*[,;]\s*(?!\d)")
+_BULLET_RE = re.compile(r"^\s*(?:[-•*·–>]+|\d{1,2}[.)])\s*")
+_NOISE_RE = re.compile(r"https?://|www\.|#\w|\+?\d{3}[\s/-]?\d{3}[\s/-]?\d{3,4}|"
+                       r"rezervac|dostav|dobar tek|narudzb|radno vrijeme|pozivamo", re.IGNORECASE)
+
+
+def _header_tail(tail: str):
+    """Split what follows a day name, date or menu word on a header line.
+
+    A header word must be followed by the end of the line, ':' or a date;
+    anything else ("Petak je rezerviran...") is a sentence, not a header.
+    Returns (date_match | None, rest_of_line), or None when it is no header.
+    """
+    tail = tail.lstrip(" ,.(–-")
+    m = DATE_RE.match(tail)
+    if m:
+        tail = tail[m.end():].lstrip(" )")
+    elif tail and not tail.startswith(":"):
+        return None
+    return m, tail.strip(" :-–")
+
+
+def _week_iso(m, week_dates: dict) -> str | None:
+    """The ISO date of this week a DATE_RE match names, or None."""
+    for iso in week_dates.values():
+        d = date.fromisoformat(iso)
+        if d.day == int(m.group(1)) and d.month == int(m.group(2)):
+            return iso
+    return None
+
+
+def _match_header(line: str, week_dates: dict, posted: datetime | None):
+    """Recognise a day/date/menu header line.
+
+    Returns (iso_date | None, rest_of_line) when `line` is a header (iso_date
+    is None for a daily header whose day cannot be pinned to this week), or
+    None when the line is not a header.
+    """
+    stripped = line.strip(" *_:-")
+    folded = fold(stripped)
+    if len(folded) != len(stripped):
+        stripped = folded  # folding changed the length: slice the folded text instead
+
+    for day_name, weekday in FOLDED_DAYS.items():
+        if folded.startswith(day_name):
+            tail = _header_tail(stripped[len(day_name):])
+            if tail is None:
+                return None
+            return week_dates.get(weekday), tail[1]
+
+    m = DATE_RE.match(folded)
+    if m:
+        after = stripped[m.end():].lstrip(" ,.()–-")
+        day_name = next((d for d in FOLDED_DAYS if fold(after).startswith(d)), "")
+        tail = _header_tail(after[len(day_name):])
+        if tail is None:
+            return None
+        iso = _week_iso(m, week_dates)
+        return iso, tail[1] if iso else ""
+
+    for header in DAILY_MENU_HEADERS:
+        if not folded.startswith(header):
+            continue
+        tail = _header_tail(stripped[len(header):])
+        if tail is None:
+            continue   # "gablec" may be the start of "gableci"
+        dated, rest = tail
+        iso = _week_iso(dated, week_dates) if dated else None
+        if iso:
+            return iso, rest
+        if posted is None or posted.weekday() not in week_dates or posted.hour >= 15:
+            # Weekend or afternoon posts usually announce the NEXT day.
+            return None, rest
+        return week_dates[posted.weekday()], rest
+    return None
+
+
+def _format_item(line: str) -> tuple[str, bool]:
+    """Normalise one dish line to 'naziv jela (cijena)'. Returns (item, has_price)."""
+    line = _BULLET_RE.sub("", line).strip()
+    m = PRICE_RE.search(line)
+    if not m:
+        return line, False
+    name = (line[:m.start()] + line[m.end():]).strip(" -–:,()")
+    return f"{name} ({m.group(1)} {m.group(2)})", True
+
+
+def _looks_like_dish(item: str, has_price: bool) -> bool:
+    return has_price or any(word.startswith(DISH_STEMS) for word in re.findall(r"\w+", fold(item)))
+
+
+def parse_text_menu(text: str, posted_at_local: str | None, today_date: date) -> tuple[dict, float]:
+    """Parse a plain-text menu post without calling Gemini.
+
+    Understands day-name headers (CROATIAN_DAYS, with or without diacritics),
+    date headers like '1.6.', and daily headers such as 'Marenda:'. A header
+    word must end the line or be followed by ':' or a date. Items are the
+    lines under a header, or the comma-separated rest of the header line, and
+    keep their price as 'naziv (8,90 €)'. A parse whose items are mostly
+    neither priced nor recognisably food (DISH_STEMS) is not trusted.
+    Returns (result, confidence) where result has the same shape as
+    ask_gemini_for_weekly_menu and confidence is 0..1.
+    """
+    empty = {"menu_type": "none", "menus": {}}
+    if not text or not text.strip():
+        return empty, 0.0
+
+    week_start = today_date - timedelta(days=today_date.weekday())
+    week_dates = {i: (week_start + timedelta(days=i)).isoformat() for i in range(5)}
+    posted = datetime.fromisoformat(posted_at_local) if posted_at_local else None
+
+    menus: dict[str, list] = {}
+    current = None
+    headers = unplaced = items = priced = dishes = noise = 0
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        header = _match_header(line, week_dates, posted)
+        if header is not None:
+            headers += 1
+            current, rest = header
+            if current is None:
+                unplaced += 1
+                continue
+            # "Marenda: juha, segedin" lists several dishes on the header line.
+            for part in _INLINE_SPLIT_RE.split(rest):
+                item, has_price = _format_item(part)
+                if any(c.isalnum() for c in item):
+                    menus.setdefault(current, []).append(item)
+                    items += 1
+                    priced += has_price
+                    dishes += _looks_like_dish(item, has_price)
+            continue
+        if _NOISE_RE.search(line) or not any(c.isalpha() for c in line) or len(line) > 150:
+            noise += 1
+            continue
+        if current is None:
+            noise += 1
+            continue
+        item, has_price = _format_item(line)
+        menus.setdefault(current, []).append(item)
+        items += 1
+        priced += has_price
+        dishes += _looks_like_dish(item, has_price)
+
+    if not menus:
+        return empty, 0.0
+
+    menu_type = "weekly" if len(menus) >= 2 else "daily"
+    confidence = 0.9 if menu_type == "weekly" else 0.8
+    if priced * 2 >= items:
+        confidence += 0.05
+    if dishes * 2 < items:
+        confidence -= 0.5   # a day and some text, but mostly not food: leave it to Gemini
+    if noise > items:
+        confidence -= 0.3
+    if unplaced:
+        confidence -= 0.2 * unplaced / headers
+    if any(len(day_items) > 15 for day_items in menus.values()):
+        confidence -= 0.3
+    return {"menu_type": menu_type, "menus": menus}, round(max(0.0, min(confidence, 1.0)), 2)
+
+
+def fast_path_extract(posts_data: list, today_date: date) -> tuple[dict, list]:
+    """Split a restaurant's posts into a locally-parsed menu and posts for Gemini.
+
+    Posts are newest first, so for a date found in several posts the newest
+    wins. Returns (result, llm_posts): llm_posts holds the posts the parser
+    could not handle (image posts and low-confidence text). When the
+    confident posts already cover today, only the image posts remain in it:
+    a photo may be the real menu even when some text named a dish.
+    """
+    menus: dict[str, list] = {}
+    menu_type = "none"
+    leftovers = []
+    for post in posts_data:
+        result, confidence = parse_text_menu(post.get("text"), post.get("posted_at_local"), today_date)
+        if confidence < FAST_PATH_MIN_CONFIDENCE:
+            leftovers.append(post)
+            continue
+        for day, day_items in result["menus"].items():
+            menus.setdefault(day, day_items)
+        if menu_type != "weekly":
+            menu_type = result["menu_type"]
+
+    if today_date.isoformat() in menus:
+        leftovers = [post for post in leftovers if post.get("images")]
+    return {"menu_type": menu_type, "menus": menus}, leftovers
+
+
+def merge_menu_results(fast: dict, llm: dict) -> dict:
+    """Combine a fast-path result with Gemini's; fast-path dates take precedence."""
+    menus = dict(llm.get("menus", {}))
+    menus.update(fast.get("menus", {}))
+    if not menus:
+        return {"menu_type": "none", "menus": {}}
+    types_seen = {fast.get("menu_type"), llm.get("menu_type")}
+    menu_type = "weekly" if "weekly" in types_seen or len(menus) >= 2 else "daily"
+    return {"menu_type": menu_type, "menus": menus}
@@ -1,8 +1,13 @@
 import os
 import json
+import asyncio
+import hashlib
+import secrets
 import sys
+import threading
 import time
 import httpx
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, date
 from zoneinfo import ZoneInfo
 from apify_client import ApifyClient
@@ -10,8 +15,24 @@ from google import genai
 from google.genai.errors import ClientError, ServerError
 from pathlib import Path
 from dotenv import load_dotenv
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
+from apify_webhooks import SUCCEEDED, WebhookReceiver, webhook_spec
+from croatian import CROATIAN_DAYS
+from delivery_slo import record_ready, record_scrape_run, record_send
+from fast_path import fast_path_extract, merge_menu_results
+from menu_history import archive_week
+from menu_items import pack_cache, unpack_cache
+from scrape_archive import archive_posts, archive_result
+from slack_payload import (
+    decide_send_action, get_payload, load_payloads, make_payload, mark_payload_sent,
+    post_payload, store_payloads,
+)
+from post_filter import filter_posts
+from post_sources import SOURCE_TYPES, PostSource, build_sources, load_source_config
+from profiling import profiler
+from proxy_sessions import SessionPool, proxy_input
+from state_backend import RedisStateBackend, StateBackend
+from subscriptions import SubscriptionIndex, already_sent as dms_sent, has_subscriptions, send_dms
+from tenants import all_pages, get_tenant, load_tenants, sent_marker
 
 
 env_path = Path(__file__).parent / '.env'
@@ -37,16 +58,15 @@ FACEBOOK_PAGES = [
 
 TZ = ZoneInfo("Europe/Zagreb")
 
-# Croatian day names for nicer formatting
-CROATIAN_DAYS = {
-    0: "Ponedjeljak", 1: "Utorak", 2: "Srijeda", 
-    3: "Četvrtak", 4: "Petak", 5: "Subota", 6: "Nedjelja"
-}
-
 # Cache file path - stored in workspace root for GitHub Actions cache
 CACHE_FILE = Path(__file__).parent.parent / "menu_cache.json"
 
 
+def get_tenants() -> list:
+    """Configured tenants (see tenants.py); one 'default' tenant without tenants.json."""
+    return load_tenants(FACEBOOK_PAGES, SLACK_CHANNEL)
+
+
 def get_week_start(d: date) -> date:
     """Get Monday of the week for a given date."""
     return d - timedelta(days=d.weekday())
@@ -59,19 +79,84 @@ def load_cache() -> dict:
     
     try:
         with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            cache = json.load(f)
-            return cache
-    except (json.JSONDecodeError, IOError):
+            return unpack_cache(json.load(f))
+    except (json.JSONDecodeError, IOError, KeyError, IndexError):
         return {"week_start": None, "restaurants": {}}
 
 
 def save_cache(cache: dict):
-    """Save cache to file."""
+    """Save cache to file, menus packed into the column-wise items table (see menu_items)."""
     with open(CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump(cache, f, ensure_ascii=False, indent=2)
+        json.dump(pack_cache(cache), f, ensure_ascii=False, separators=(",", ":"))
     print(f"Cache saved to {CACHE_FILE}")
 
 
+# Shared state. Unset: menu_cache.json (one runner at a time, enforced by the
+# workflow's concurrency group). redis://...: several runners may overlap.
+STATE_BACKEND_URL = os.getenv("STATE_BACKEND_URL", "")
+# A scrape lease covers one page's fetch + extraction; a runner that dies
+# mid-scrape frees the page when its lease expires.
+SCRAPE_LEASE_SECONDS = int(os.getenv("SCRAPE_LEASE_SECONDS", "1800"))
+SEND_LEASE_SECONDS = 120
+
+
+class FileStateBackend(StateBackend):
+    """menu_cache.json via load_cache/save_cache.
+
+    Leases only exclude callers within this process: the file is carried
+    between workflow runs, so it is only safe with one runner at a time.
+    """
+
+    def __init__(self):
+        self._leases = {}
+
+    def load_cache(self) -> dict:
+        return load_cache()
+
+    def reset_week(self, cache: dict, week_start: str) -> dict:
+        cache = {"week_start": week_start, "restaurants": {}}
+        save_cache(cache)
+        return cache
+
+    def update_restaurant(self, cache: dict, name: str):
+        save_cache(cache)
+
+    def compare_and_set_sent(self, cache: dict, previous: str | None, new: str, marker: str = "sent_date") -> bool:
+        if load_cache().get(marker) != previous:
+            return False
+        cache[marker] = new
+        save_cache(cache)
+        return True
+
+    def acquire_lease(self, name: str, ttl_seconds: float) -> str | None:
+        held = self._leases.get(name)
+        if held and held[1] > time.monotonic():
+            return None
+        token = hashlib.sha1(f"{name}{time.monotonic_ns()}".encode()).hexdigest()
+        self._leases[name] = (token, time.monotonic() + ttl_seconds)
+        return token
+
+    def release_lease(self, name: str, token: str):
+        if self._leases.get(name, (None,))[0] == token:
+            del self._leases[name]
+
+
+_state_backend = None
+# Guards the lazy module singletons below: fetch_posts_for_pages reaches
+# them from several threads at once, and two instances would each save
+# their own copy of the state.
+_init_lock = threading.Lock()
+
+
+def get_state_backend() -> StateBackend:
+    """The configured state backend (created on first use)."""
+    global _state_backend
+    with _init_lock:
+        if _state_backend is None:
+            _state_backend = RedisStateBackend(STATE_BACKEND_URL) if STATE_BACKEND_URL else FileStateBackend()
+    return _state_backend
+
+
 def is_cache_valid_for_week(cache: dict, today: date) -> bool:
     """Check if cache is from the current week."""
     if not cache.get("week_start"):
@@ -90,6 +175,17 @@ def get_cached_menu_for_today(cache: dict, restaurant_name: str, today: date) ->
     return menus.get(today_str)
 
 
+def has_today_menu(cache: dict, page_url: str, today: date) -> str | None:
+    """Name of the cached restaurant for page_url if it has a non-empty menu for today.
+
+    An empty list means Gemini found nothing, so that restaurant is retried.
+    """
+    for cached_name, cached_data in cache.get("restaurants", {}).items():
+        if cached_data.get("facebook_url") == page_url and get_cached_menu_for_today(cache, cached_name, today):
+            return cached_name
+    return None
+
+
 def download_all_images(media: list) -> list:
     """Download images from Facebook media attachments."""
     if not media:
@@ -126,52 +222,60 @@ def to_local(dt_iso_utc: str) -> datetime:
     return dt.astimezone(TZ)
 
 
-def ask_gemini_for_weekly_menu(page_name: str, posts_data: list, today_date: date, skip_images: bool = False) -> dict:
-    """
-    Use Gemini AI to analyze posts and extract the FULL WEEKLY menu.
-    Returns a dict with menus for each day of the week if found.
-    """
-    if not posts_data:
-        return {"menu_type": "none", "menus": {}}
-    
-    croatian_day = CROATIAN_DAYS.get(today_date.weekday(), today_date.strftime('%A'))
-    
-    # Calculate the dates for this week (Mon-Fri)
+# Try models in order — switch immediately on failure.
+# Verified working on the free tier 2026-06-10 (see gemini_probe.py):
+# 2.5-flash (quality) -> 3.1-flash-lite -> 2.5-flash-lite (fastest).
+# Dropped gemini-2.0-flash/-lite and 2.5-pro: they return 429 (no free
+# quota). 3.5-flash / 3-flash-preview exist but are often 503-overloaded.
+GEMINI_MODELS = ["gemini-2.5-flash", "gemini-3.1-flash-lite", "gemini-2.5-flash-lite"]
+
+# How scrape_and_process hands posts to Gemini:
+#   'sequential' - one request per restaurant (default)
+#   'batched'    - pack several restaurants into one request (fewer RPM hits)
+#   'concurrent' - async requests for all restaurants at once, optionally hedged
+EXTRACTION_MODE = os.getenv("GEMINI_EXTRACTION_MODE", "sequential")
+
+# Budget for one batched request. Inline request data is capped at ~20MB by
+# the API; stay well below it so a batch with a few photos still fits.
+BATCH_MAX_BYTES = int(os.getenv("GEMINI_BATCH_MAX_BYTES", str(4 * 1024 * 1024)))
+BATCH_MAX_RESTAURANTS = int(os.getenv("GEMINI_BATCH_MAX_RESTAURANTS", "5"))
+
+# Concurrent mode: max in-flight restaurant extractions, and how many seconds
+# to wait on a model before racing the next one in GEMINI_MODELS (0 = never
+# hedge; the next model is only tried after a failure).
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "3"))
+GEMINI_HEDGE_AFTER = float(os.getenv("GEMINI_HEDGE_AFTER", "0"))
+
+def _week_dates(today_date: date) -> dict:
+    """Croatian day name -> ISO date for Mon-Fri of the week containing today_date."""
     week_start = get_week_start(today_date)
-    week_dates = {
+    return {
         CROATIAN_DAYS[i]: (week_start + timedelta(days=i)).isoformat()
         for i in range(5)  # Mon-Fri
     }
-    
-    parts = [
-        {"text": (
-            f"Koristi samo hrvatski jezik. "
-            f"Današnji datum je {today_date.isoformat()} ({croatian_day}). "
-            f"Datumi ovog tjedna: Ponedjeljak={week_dates['Ponedjeljak']}, Utorak={week_dates['Utorak']}, "
-            f"Srijeda={week_dates['Srijeda']}, Četvrtak={week_dates['Četvrtak']}, Petak={week_dates['Petak']}.\n\n"
-            f"Analiziraj PAŽLJIVO sve objave za restoran '{page_name}'. "
-            "Pronađi dnevne menije/gablece za OVAJ TJEDAN. "
-            "Ako je objavljen TJEDNI MENI, izvuci stavke za SVAKI dan posebno. "
-            "Ako je samo dnevni meni, izvuci ga za taj dan. "
-            "Pročitaj slike ako sadrže meni. "
-            "Ako imaš cijene, dodaj ih. "
-            "Format stavke: naziv jela (cijena ako postoji). "
-            "\n\nVrati JSON u formatu:\n"
-            "{\n"
-            '  "menu_type": "weekly" ili "daily" ili "none",\n'
-            '  "menus": {\n'
-            '    "YYYY-MM-DD": ["jelo1", "jelo2", ...],\n'
-            '    "YYYY-MM-DD": ["jelo1", "jelo2", ...]\n'
-            "  }\n"
-            "}\n\n"
-            "Koristi TOČNE datume iz gornjeg popisa. "
-            "Ako nema menija za neki dan, ne uključuj taj datum u 'menus'.\n\n"
-        )}
-    ]
-    
-    has_images = False
-    total_image_bytes = 0
-    image_count = 0
+
+
+def _date_preamble(today_date: date, week_start: date | None = None) -> str:
+    """Opening prompt lines: answer language, today's date and the week's dates.
+
+    The week defaults to today's; the prefetch passes next week's.
+    """
+    croatian_day = CROATIAN_DAYS.get(today_date.weekday(), today_date.strftime('%A'))
+    week_dates = _week_dates(week_start or today_date)
+    return (
+        f"Koristi samo hrvatski jezik. "
+        f"Današnji datum je {today_date.isoformat()} ({croatian_day}). "
+        f"Datumi ovog tjedna: Ponedjeljak={week_dates['Ponedjeljak']}, Utorak={week_dates['Utorak']}, "
+        f"Srijeda={week_dates['Srijeda']}, Četvrtak={week_dates['Četvrtak']}, Petak={week_dates['Petak']}.\n\n"
+    )
+
+
+def _append_post_parts(parts: list, posts_data: list, skip_images: bool) -> dict:
+    """Append one text/image part group per post to `parts`.
+
+    Returns request stats: {"has_images", "image_count", "image_bytes"}.
+    """
+    stats = {"has_images": False, "image_count": 0, "image_bytes": 0}
     for idx, post in enumerate(posts_data, 1):
         parts.append({"text": f"\n--- Objava {idx} (objavljena: {post['posted_at_local']}) ---"})
 
@@ -181,50 +285,61 @@ def ask_gemini_for_weekly_menu(page_name: str, posts_data: list, today_date: dat
             parts.append({"text": "Tekst: (nema teksta)"})
 
         if post['images'] and not skip_images:
-            has_images = True
+            stats["has_images"] = True
             parts.append({"text": f"Slike ({len(post['images'])} komada):"})
             for img in post['images']:
-                total_image_bytes += len(img["bytes"])
-                image_count += 1
+                stats["image_bytes"] += len(img["bytes"])
+                stats["image_count"] += 1
                 parts.append({"inline_data": {"mime_type": img["mime"], "data": img["bytes"]}})
         else:
             parts.append({"text": "(Nema slika)"})
+    return stats
+
 
-    # Debug: log request size
+def _log_request_stats(n_posts: int, parts: list, stats: dict):
+    """Debug: log request size."""
     text_size = sum(len(p.get("text", "").encode("utf-8")) for p in parts if "text" in p)
-    print(f"  Request stats: {len(posts_data)} posts, {image_count} images, "
-          f"text={text_size/1024:.1f}KB, images={total_image_bytes/1024/1024:.1f}MB, "
-          f"total={( text_size + total_image_bytes)/1024/1024:.1f}MB")
-
-    # Try models in order — switch immediately on failure.
-    # Verified working on the free tier 2026-06-10 (see gemini_probe.py):
-    # 2.5-flash (quality) -> 3.1-flash-lite -> 2.5-flash-lite (fastest).
-    # Dropped gemini-2.0-flash/-lite and 2.5-pro: they return 429 (no free
-    # quota). 3.5-flash / 3-flash-preview exist but are often 503-overloaded.
-    models_to_try = ["gemini-2.5-flash", "gemini-3.1-flash-lite", "gemini-2.5-flash-lite"]
-    resp = None
-    for model_name in models_to_try:
+    print(f"  Request stats: {n_posts} posts, {stats['image_count']} images, "
+          f"text={text_size/1024:.1f}KB, images={stats['image_bytes']/1024/1024:.1f}MB, "
+          f"total={( text_size + stats['image_bytes'])/1024/1024:.1f}MB")
+
+
+def _is_image_error(e: Exception) -> bool:
+    """A 400 INVALID_ARGUMENT from Gemini almost always means an unreadable image."""
+    error_str = str(e)
+    return "400" in error_str and "INVALID_ARGUMENT" in error_str
+
+
+def _generate_with_fallback(parts: list, allow_image_error: bool = False):
+    """Call GEMINI_MODELS in order until one answers.
+
+    Returns (response, image_error). response is None when every model failed.
+    With allow_image_error, an image error stops the chain immediately
+    (image_error=True) so the caller can retry without images.
+    """
+    for model_name in GEMINI_MODELS:
         try:
             resp = client_gemini.models.generate_content(
                 model=model_name,
                 contents=[{"role": "user", "parts": parts}],
             )
             print(f"  Success with {model_name}")
-            break
+            return resp, False
         except (ServerError, ClientError) as e:
-            error_str = str(e)
-            is_image_error = "400" in error_str and "INVALID_ARGUMENT" in error_str
-            if is_image_error and has_images and not skip_images:
-                print(f"  Image processing failed for {page_name}, retrying without images...")
-                return ask_gemini_for_weekly_menu(page_name, posts_data, today_date, skip_images=True)
+            if allow_image_error and _is_image_error(e):
+                return None, True
             print(f"  {model_name} failed: {e}")
             continue
-    
-    if resp is None:
-        return {"menu_type": "none", "menus": {}}
-    
+    return None, False
+
+
+def parse_gemini_json(resp):
+    """Decode a Gemini text response as JSON, tolerating a markdown code fence.
+
+    Returns the decoded value, or None if the text is not valid JSON.
+    """
     txt = (resp.text or "").strip()
-    
+
     # Remove markdown code block if present
     if txt.startswith("```"):
         lines = txt.split('\n')
@@ -233,22 +348,390 @@ def ask_gemini_for_weekly_menu(page_name: str, posts_data: list, today_date: dat
         if lines and lines[-1].strip() == "```":
             lines = lines[:-1]
         txt = '\n'.join(lines).strip()
-    
+
     try:
-        j = json.loads(txt)
-        if isinstance(j, dict) and "menu_type" in j and "menus" in j:
-            return j
+        return json.loads(txt)
     except json.JSONDecodeError:
-        print(f"Failed to parse Gemini response for {page_name}: {txt[:200]}")
-    
+        print(f"Failed to parse Gemini response: {txt[:200]}")
+        return None
+
+
+def is_menu_result(j) -> bool:
+    """True if `j` has the {"menu_type", "menus": {...}} extraction shape."""
+    return isinstance(j, dict) and "menu_type" in j and isinstance(j.get("menus"), dict)
+
+
+def single_restaurant_parts(page_name: str, posts_data: list, today_date: date, skip_images: bool,
+                            week_start: date | None = None):
+    """Build the request parts for one restaurant. Returns (parts, stats).
+
+    week_start defaults to today's week; the prefetch passes next week's on a
+    Sunday evening while today's date stays the real one.
+    """
+    parts = [
+        {"text": (
+            _date_preamble(today_date, week_start) +
+            f"Analiziraj PAŽLJIVO sve objave za restoran '{page_name}'. "
+            "Pronađi dnevne menije/gablece za OVAJ TJEDAN. "
+            "Ako je objavljen TJEDNI MENI, izvuci stavke za SVAKI dan posebno. "
+            "Ako je samo dnevni meni, izvuci ga za taj dan. "
+            "Pročitaj slike ako sadrže meni. "
+            "Ako imaš cijene, dodaj ih. "
+            "Format stavke: naziv jela (cijena ako postoji). "
+            "\n\nVrati JSON u formatu:\n"
+            "{\n"
+            '  "menu_type": "weekly" ili "daily" ili "none",\n'
+            '  "menus": {\n'
+            '    "YYYY-MM-DD": ["jelo1", "jelo2", ...],\n'
+            '    "YYYY-MM-DD": ["jelo1", "jelo2", ...]\n'
+            "  }\n"
+            "}\n\n"
+            "Koristi TOČNE datume iz gornjeg popisa. "
+            "Ako nema menija za neki dan, ne uključuj taj datum u 'menus'.\n\n"
+        )}
+    ]
+
+    stats = _append_post_parts(parts, posts_data, skip_images)
+    _log_request_stats(len(posts_data), parts, stats)
+    return parts, stats
+
+
+def ask_gemini_for_weekly_menu(page_name: str, posts_data: list, today_date: date, skip_images: bool = False) -> dict:
+    """
+    Use Gemini AI to analyze posts and extract the FULL WEEKLY menu.
+    Returns a dict with menus for each day of the week if found.
+    """
+    if not posts_data:
+        return {"menu_type": "none", "menus": {}}
+
+    parts, stats = single_restaurant_parts(page_name, posts_data, today_date, skip_images)
+
+    resp, image_error = _generate_with_fallback(
+        parts, allow_image_error=stats["has_images"] and not skip_images
+    )
+    if image_error:
+        print(f"  Image processing failed for {page_name}, retrying without images...")
+        return ask_gemini_for_weekly_menu(page_name, posts_data, today_date, skip_images=True)
+
+    if resp is None:
+        return {"menu_type": "none", "menus": {}}
+
+    j = parse_gemini_json(resp)
+    if is_menu_result(j):
+        return j
+    if j is not None:
+        print(f"Unexpected Gemini response shape for {page_name}")
     return {"menu_type": "none", "menus": {}}
 
 
-def build_slack_blocks(today_lunch: dict, today_date: date) -> list:
-    """Build rich Slack Block Kit message."""
+def _estimate_request_bytes(posts_data: list) -> int:
+    """Rough request size for a restaurant's posts: text plus inline images."""
+    size = 0
+    for post in posts_data:
+        size += len((post.get("text") or "").encode("utf-8")) + 100  # per-post header
+        size += sum(len(img["bytes"]) for img in post.get("images") or [])
+    return size
+
+
+def plan_extraction_batches(restaurants: dict, max_bytes: int = None, max_restaurants: int = None) -> list:
+    """Greedily pack {name: posts} into batches under the size/count budget.
+
+    Order is preserved. A restaurant that alone exceeds max_bytes gets a
+    batch of its own. Returns a list of name lists.
+    """
+    max_bytes = BATCH_MAX_BYTES if max_bytes is None else max_bytes
+    max_restaurants = BATCH_MAX_RESTAURANTS if max_restaurants is None else max_restaurants
+
+    batches, current, current_bytes = [], [], 0
+    for name, posts in restaurants.items():
+        size = _estimate_request_bytes(posts)
+        if current and (current_bytes + size > max_bytes or len(current) >= max_restaurants):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(name)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _ask_gemini_for_batch(names: list, restaurants: dict, today_date: date) -> dict:
+    """One Gemini request for several restaurants.
+
+    Returns {name: result} for every restaurant whose answer was well-formed;
+    restaurants missing from the answer (or a failed call) are left out.
+    """
+    parts = [
+        {"text": (
+            _date_preamble(today_date) +
+            f"Dolje su objave za {len(names)} restorana, svaki u svom odjeljku. "
+            "Za SVAKI restoran zasebno pronađi dnevne menije/gablece za OVAJ TJEDAN. "
+            "Ako je objavljen TJEDNI MENI, izvuci stavke za SVAKI dan posebno. "
+            "Ako je samo dnevni meni, izvuci ga za taj dan. "
+            "Pročitaj slike ako sadrže meni. "
+            "Ako imaš cijene, dodaj ih. "
+            "Format stavke: naziv jela (cijena ako postoji). "
+            "Nemoj miješati jela različitih restorana. "
+            "\n\nVrati JSON u formatu:\n"
+            "{\n"
+            '  "restaurants": {\n'
+            '    "naziv restorana": {\n'
+            '      "menu_type": "weekly" ili "daily" ili "none",\n'
+            '      "menus": {"YYYY-MM-DD": ["jelo1", "jelo2", ...]}\n'
+            "    }\n"
+            "  }\n"
+            "}\n\n"
+            "Koristi TOČNE nazive restorana iz naslova odjeljaka i TOČNE datume iz gornjeg popisa. "
+            "Ako nema menija za neki dan, ne uključuj taj datum u 'menus'.\n\n"
+        )}
+    ]
+
+    stats = {"has_images": False, "image_count": 0, "image_bytes": 0}
+    n_posts = 0
+    for name in names:
+        parts.append({"text": f"\n=== Restoran: '{name}' ==="})
+        s = _append_post_parts(parts, restaurants[name], skip_images=False)
+        stats["has_images"] |= s["has_images"]
+        stats["image_count"] += s["image_count"]
+        stats["image_bytes"] += s["image_bytes"]
+        n_posts += len(restaurants[name])
+    _log_request_stats(n_posts, parts, stats)
+
+    # An image error aborts the batch; the per-restaurant fallback knows how
+    # to retry a single restaurant without its images.
+    resp, _ = _generate_with_fallback(parts, allow_image_error=stats["has_images"])
+    if resp is None:
+        return {}
+
+    j = parse_gemini_json(resp)
+    answers = j.get("restaurants") if isinstance(j, dict) else None
+    if not isinstance(answers, dict):
+        return {}
+
+    return {name: answers[name] for name in names if is_menu_result(answers.get(name))}
+
+
+def ask_gemini_for_weekly_menus_batched(restaurants: dict, today_date: date) -> dict:
+    """Extract weekly menus for several restaurants with as few requests as possible.
+
+    `restaurants` is {display_name: posts}. Restaurants are packed into
+    requests under BATCH_MAX_BYTES / BATCH_MAX_RESTAURANTS; any restaurant the
+    batched answer leaves out or garbles falls back to its own
+    ask_gemini_for_weekly_menu call. Returns {display_name: result}.
+    """
+    results = {}
+    pending = {name: posts for name, posts in restaurants.items() if posts}
+    for name in restaurants:
+        if name not in pending:
+            results[name] = {"menu_type": "none", "menus": {}}
+
+    for names in plan_extraction_batches(pending):
+        if len(names) == 1:
+            results[names[0]] = ask_gemini_for_weekly_menu(names[0], pending[names[0]], today_date)
+            continue
+
+        print(f"  Batched request: {', '.join(names)}")
+        answered = _ask_gemini_for_batch(names, pending, today_date)
+        results.update(answered)
+        for name in names:
+            if name not in answered:
+                print(f"  Batched answer missing/malformed for {name}, falling back to a single request...")
+                results[name] = ask_gemini_for_weekly_menu(name, pending[name], today_date)
+
+    return results
+
+
+async def _agenerate_menu(parts: list, page_name: str, hedge_after: float, allow_image_error: bool):
+    """Race GEMINI_MODELS on the async client until one returns a valid menu.
+
+    The primary model starts alone. The next model in the chain is started
+    when the current ones have all failed, or — if hedge_after > 0 — when
+    none has answered within hedge_after seconds. The first response that
+    parses into a menu wins and the rest are cancelled.
+
+    Returns (result, image_error). result is None when every model failed.
+    """
+    async def call(model_name):
+        resp = await client_gemini.aio.models.generate_content(
+            model=model_name,
+            contents=[{"role": "user", "parts": parts}],
+        )
+        return model_name, resp
+
+    models = iter(GEMINI_MODELS)
+    pending = set()
+
+    def launch_next() -> bool:
+        model_name = next(models, None)
+        if model_name is None:
+            return False
+        pending.add(asyncio.create_task(call(model_name), name=model_name))
+        return True
+
+    launch_next()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=hedge_after if hedge_after > 0 else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                if launch_next():
+                    print(f"  {page_name}: no answer after {hedge_after:.1f}s, hedging with another model...")
+                continue
+
+            for task in done:
+                pending.discard(task)
+                try:
+                    model_name, resp = task.result()
+                except (ServerError, ClientError) as e:
+                    if allow_image_error and _is_image_error(e):
+                        return None, True
+                    print(f"  {task.get_name()} failed for {page_name}: {e}")
+                    continue
+                j = parse_gemini_json(resp)
+                if is_menu_result(j):
+                    print(f"  Success with {model_name} for {page_name}")
+                    return j, False
+                print(f"  {model_name} gave no usable menu for {page_name}")
+
+            if not pending:
+                launch_next()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    return None, False
+
+
+async def aask_gemini_for_weekly_menu(page_name: str, posts_data: list, today_date: date,
+                                      skip_images: bool = False, hedge_after: float = None) -> dict:
+    """Async ask_gemini_for_weekly_menu on client_gemini.aio, with optional model hedging."""
+    if not posts_data:
+        return {"menu_type": "none", "menus": {}}
+    hedge_after = GEMINI_HEDGE_AFTER if hedge_after is None else hedge_after
+
+    parts, stats = single_restaurant_parts(page_name, posts_data, today_date, skip_images)
+    result, image_error = await _agenerate_menu(
+        parts, page_name, hedge_after, allow_image_error=stats["has_images"] and not skip_images
+    )
+    if image_error:
+        print(f"  Image processing failed for {page_name}, retrying without images...")
+        return await aask_gemini_for_weekly_menu(page_name, posts_data, today_date,
+                                                 skip_images=True, hedge_after=hedge_after)
+
+    return result if result is not None else {"menu_type": "none", "menus": {}}
+
+
+async def aextract_weekly_menus(restaurants: dict, today_date: date,
+                                concurrency: int = None, hedge_after: float = None) -> dict:
+    """Extract {display_name: posts} concurrently, at most `concurrency` at a time.
+
+    Returns {display_name: result}.
+    """
+    semaphore = asyncio.Semaphore(GEMINI_CONCURRENCY if concurrency is None else concurrency)
+
+    async def one(name, posts):
+        async with semaphore:
+            return name, await aask_gemini_for_weekly_menu(name, posts, today_date, hedge_after=hedge_after)
+
+    pairs = await asyncio.gather(*(one(name, posts) for name, posts in restaurants.items()))
+    return dict(pairs)
+
+
+# Slack Block Kit limits: blocks per message, characters per section text,
+# and characters of the top-level `text` (notification fallback).
+SLACK_MAX_BLOCKS = 50
+SLACK_MAX_SECTION_CHARS = 3000
+SLACK_MAX_TEXT_CHARS = 40000
+
+# 'detailed': one section + Facebook button + divider per restaurant.
+# 'compact': restaurants packed into shared sections, names linked to Facebook.
+SLACK_LAYOUT = os.getenv("SLACK_LAYOUT", "detailed")
+
+
+def _chunk_lines(title: str, lines: list, limit: int = SLACK_MAX_SECTION_CHARS) -> list:
+    """Split `title` + lines into mrkdwn texts of at most `limit` characters.
+
+    Continuation chunks repeat the title with '(nastavak)'. A single line
+    longer than the limit is truncated.
+    """
+    chunks, current = [], title
+    for line in lines:
+        if len(line) > limit - len(title) - 20:
+            line = line[:limit - len(title) - 21] + "…"
+        if len(current) + 1 + len(line) > limit:
+            chunks.append(current)
+            current = f"{title} (nastavak)"
+        current += "\n" + line
+    chunks.append(current)
+    return chunks
+
+
+def _facebook_button(name: str, url: str) -> dict:
+    return {
+        "type": "button",
+        "text": {
+            "type": "plain_text",
+            "text": "Facebook",
+            "emoji": True
+        },
+        "url": url,
+        "action_id": f"fb-{name[:20]}"
+    }
+
+
+def _detailed_groups(today_lunch: dict) -> list:
+    """One block group per restaurant: section(s) with a Facebook button, then a divider."""
+    groups = []
+    for name, info in today_lunch.items():
+        lines = [f"• {item}" for item in info["items"]] or ["_Nema objave za danas_"]
+        group = []
+        for idx, text in enumerate(_chunk_lines(f"*{name}*", lines)):
+            section = {"type": "section", "text": {"type": "mrkdwn", "text": text}}
+            if idx == 0:
+                section["accessory"] = _facebook_button(name, info["facebook_url"])
+            group.append(section)
+        group.append({"type": "divider"})
+        groups.append(([name], group))
+    return groups
+
+
+def _compact_groups(today_lunch: dict) -> list:
+    """Restaurants packed into as few sections as fit SLACK_MAX_SECTION_CHARS."""
+    groups, names, current = [], [], ""
+
+    def flush():
+        if current:
+            groups.append((list(names), [{"type": "section", "text": {"type": "mrkdwn", "text": current}}]))
+
+    for name, info in today_lunch.items():
+        lines = [f"• {item}" for item in info["items"]] or ["_Nema objave za danas_"]
+        for text in _chunk_lines(f"*<{info['facebook_url']}|{name}>*", lines):
+            if current and len(current) + 2 + len(text) > SLACK_MAX_SECTION_CHARS:
+                flush()
+                names, current = [], ""
+            current = f"{current}\n\n{text}" if current else text
+            if not names or names[-1] != name:
+                names.append(name)
+    flush()
+    return groups
+
+
+def build_slack_messages(today_lunch: dict, today_date: date, layout: str = None) -> list:
+    """Render the daily post as one or more Slack messages within Block Kit limits.
+
+    Returns a list of block lists: the first is the channel message (header,
+    as many restaurants as fit, footer), the rest are thread replies carrying
+    the overflow. A restaurant is never split across messages. Runs in one
+    pass over today_lunch.
+    """
+    layout = layout or SLACK_LAYOUT
     croatian_day = CROATIAN_DAYS.get(today_date.weekday(), "")
-    
-    blocks = [
+    groups = _compact_groups(today_lunch) if layout == "compact" else _detailed_groups(today_lunch)
+
+    head = [
         {
             "type": "header",
             "text": {
@@ -259,49 +742,7 @@ def build_slack_blocks(today_lunch: dict, today_date: date) -> list:
         },
         {"type": "divider"}
     ]
-    
-    for name, info in today_lunch.items():
-        if info["items"]:
-            menu_text = "\n".join([f"• {item}" for item in info["items"]])
-            blocks.append({
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"*{name}*\n{menu_text}"
-                },
-                "accessory": {
-                    "type": "button",
-                    "text": {
-                        "type": "plain_text",
-                        "text": "Facebook",
-                        "emoji": True
-                    },
-                    "url": info["facebook_url"],
-                    "action_id": f"fb-{name[:20]}"
-                }
-            })
-        else:
-            blocks.append({
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"*{name}*\n_Nema objave za danas_"
-                },
-                "accessory": {
-                    "type": "button",
-                    "text": {
-                        "type": "plain_text",
-                        "text": "Facebook",
-                        "emoji": True
-                    },
-                    "url": info["facebook_url"],
-                    "action_id": f"fb-{name[:20]}"
-                }
-            })
-        
-        blocks.append({"type": "divider"})
-    
-    blocks.append({
+    footer = {
         "type": "context",
         "elements": [
             {
@@ -309,9 +750,34 @@ def build_slack_blocks(today_lunch: dict, today_date: date) -> list:
                 "text": "Podaci prikupljeni s Facebooka pomoću AI analize"
             }
         ]
-    })
-    
-    return blocks
+    }
+    # Room for the header, the footer and a 'more in thread' note.
+    first_capacity = SLACK_MAX_BLOCKS - len(head) - 2
+
+    messages, current, capacity, overflow = [head], [], first_capacity, 0
+    for names, group in groups:
+        if current and len(current) + len(group) > capacity:
+            messages[-1].extend(current)
+            messages.append([])
+            current, capacity = [], SLACK_MAX_BLOCKS
+        if len(messages) > 1:
+            overflow += len(set(names))
+        current.extend(group)
+    messages[-1].extend(current)
+
+    if len(messages) > 1:
+        messages[0].append({
+            "type": "context",
+            "elements": [{"type": "mrkdwn", "text": f"Još {overflow} restorana u niti ispod ↓"}]
+        })
+    messages[0].append(footer)
+    return messages
+
+
+def build_slack_blocks(today_lunch: dict, today_date: date) -> list:
+    """Build rich Slack Block Kit message (all blocks, unchunked)."""
+    return [block for message in build_slack_messages(today_lunch, today_date, "detailed")
+            for block in message]
 
 
 def build_fallback_text(today_lunch: dict, today_date: date) -> str:
@@ -331,34 +797,107 @@ def build_fallback_text(today_lunch: dict, today_date: date) -> str:
     return "\n".join(lines)
 
 
-def send_to_slack(today_lunch: dict, today_date: date, max_retries: int = 3) -> bool:
+def send_to_slack(today_lunch: dict, today_date: date, max_retries: int = 3, channel: str | None = None) -> bool:
     """Send formatted message to Slack with retry logic."""
-    slack_client = WebClient(token=SLACK_BOT_TOKEN)
-    
-    blocks = build_slack_blocks(today_lunch, today_date)
-    fallback_text = build_fallback_text(today_lunch, today_date)
-    
-    for attempt in range(1, max_retries + 1):
-        try:
-            slack_client.chat_postMessage(
-                channel=SLACK_CHANNEL,
-                text=fallback_text,
-                blocks=blocks,
-                unfurl_links=False,
-                unfurl_media=False
-            )
-            print(f"Message sent to {SLACK_CHANNEL} successfully!")
-            return True
-        except SlackApiError as e:
-            print(f"Slack API error (attempt {attempt}/{max_retries}): {e.response['error']}")
-            if attempt == max_retries:
-                return False
-        except Exception as e:
-            print(f"Unexpected error (attempt {attempt}/{max_retries}): {e}")
-            if attempt == max_retries:
-                return False
-    
-    return False
+    return post_payload(compile_payload(today_lunch, today_date), channel or SLACK_CHANNEL,
+                        SLACK_BOT_TOKEN, max_retries)
+
+
+def compile_payload(today_lunch: dict, today_date: date) -> dict:
+    """Render today_lunch into a ready-to-post payload record (see slack_payload)."""
+    messages = build_slack_messages(today_lunch, today_date)
+    text = build_fallback_text(today_lunch, today_date)
+    if len(text) > SLACK_MAX_TEXT_CHARS:
+        text = text[:SLACK_MAX_TEXT_CHARS - 1] + "…"
+    return make_payload(
+        messages[0],
+        text,
+        count_ready_restaurants(today_lunch),
+        len(today_lunch),
+        thread=messages[1:],
+    )
+
+
+def precompile_payloads(cache: dict, today_date: date, tenants: list = None) -> bool:
+    """Render the Slack message for today and each remaining weekday of the week.
+
+    Stored per day and tenant channel so the send phase only reads and posts
+    one record. A day the cache says was already sent to a tenant is stored
+    as sent. Returns True if the payload file changed.
+    """
+    tenants = tenants or get_tenants()
+    compiled = {}
+    for weekday in range(today_date.weekday(), 5):
+        day = get_week_start(today_date) + timedelta(days=weekday)
+        by_channel = compiled.setdefault(day.isoformat(), {})
+        for tenant in tenants:
+            record = compile_payload(build_today_lunch(cache, day, tenant["pages"]), day)
+            if cache.get(sent_marker(tenant)) == day.isoformat():
+                record["sent_hash"] = record["hash"]
+            by_channel[tenant["channel"]] = record
+    return store_payloads(get_week_start(today_date), compiled)
+
+
+APIFY_ACTOR = "apify/facebook-posts-scraper"
+
+
+# How actor runs are awaited: 'call' blocks on each run in turn; 'webhook'
+# starts them all and ingests each one as its completion webhook arrives
+# (see apify_webhooks). WEBHOOK_PUBLIC_URL must reach WEBHOOK_PORT; without
+# it Apify cannot deliver, so 'call' is used instead.
+APIFY_INGEST = os.getenv("APIFY_INGEST", "call")
+WEBHOOK_PUBLIC_URL = os.getenv("WEBHOOK_PUBLIC_URL", "")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8765"))
+WEBHOOK_TIMEOUT = int(os.getenv("WEBHOOK_TIMEOUT", "1800"))
+
+
+_session_pool = None
+
+
+def get_session_pool() -> SessionPool:
+    """The proxy session pool (proxy_sessions.json), loaded once per process."""
+    global _session_pool
+    with _init_lock:
+        if _session_pool is None:
+            _session_pool = SessionPool()
+    return _session_pool
+
+
+def _actor_input(page_url: str, since_date: date, session_id: str | None = None) -> dict:
+    """Run input for the Facebook posts scraper, pinned to a proxy session if given."""
+    return {
+        "startUrls": [{"url": page_url}],
+        "proxy": proxy_input(session_id),
+        "maxRequestRetries": 10,
+        "onlyPostsNewerThan": since_date.isoformat(),
+        "resultsLimit": 10
+    }
+
+
+def posts_from_dataset(dataset_id: str, page_url: str) -> list:
+    """Read an actor run's dataset into post dicts, newest first, and archive them."""
+    dataset = client_apify.dataset(dataset_id)
+    page_out = []
+
+    for item in dataset.iterate_items():
+        page_name = item.get("user", {}).get("name")
+        text = item.get("text")
+        post_url = item.get("topLevelUrl") or item.get("url") or item.get("facebookUrl")
+        posted_local = to_local(item.get("time"))
+        images = download_all_images(item.get("media", []))
+
+        page_out.append({
+            "page_name": page_name,
+            "text": text,
+            "posted_at_local": posted_local.isoformat(),
+            "post_url": post_url,
+            "images": images
+        })
+
+    page_out.sort(key=lambda x: x["posted_at_local"], reverse=True)
+    if page_out:
+        archive_posts(page_url, page_out, datetime.now(TZ).date())
+    return page_out
 
 
 def fetch_facebook_posts(page_url: str, since_date: date, retries: int = 3, retry_delay: int = 20) -> list:
@@ -366,48 +905,31 @@ def fetch_facebook_posts(page_url: str, since_date: date, retries: int = 3, retr
 
     The Apify Facebook scraper intermittently returns an EMPTY dataset even
     when posts exist (the residential proxy IP gets soft-blocked, so the page
-    'succeeds' but the feed comes back empty). Retry a few times on an empty
-    result — each run gets a fresh proxy IP, so a retry usually succeeds.
+    'succeeds' but the feed comes back empty). Each run is pinned to the
+    page's best known proxy session (see proxy_sessions), and an empty
+    result is retried on a different session. Only when sessions cannot be
+    pinned does a retry wait `retry_delay` for the proxy to rotate the IP.
     """
+    pool = get_session_pool()
+    tried = []
     for attempt in range(1, retries + 1):
+        session_id = pool.pick(page_url, exclude=tried)
+        tried.append(session_id)
         try:
-            run = client_apify.actor("apify/facebook-posts-scraper").call(run_input={
-                "startUrls": [{"url": page_url}],
-                "proxy": {"apifyProxyGroups": ["RESIDENTIAL"]},
-                "maxRequestRetries": 10,
-                "onlyPostsNewerThan": since_date.isoformat(),
-                "resultsLimit": 10
-            })
+            run = client_apify.actor(APIFY_ACTOR).call(run_input=_actor_input(page_url, since_date, session_id))
 
             # apify-client 3.x returns a typed `Run` object (not a dict), so
             # read the dataset id via attribute access, not subscripting.
-            dataset = client_apify.dataset(run.default_dataset_id)
-            page_out = []
-
-            for item in dataset.iterate_items():
-                page_name = item.get("user", {}).get("name")
-                text = item.get("text")
-                post_url = item.get("topLevelUrl") or item.get("url") or item.get("facebookUrl")
-                posted_local = to_local(item.get("time"))
-                images = download_all_images(item.get("media", []))
-
-                page_out.append({
-                    "page_name": page_name,
-                    "text": text,
-                    "posted_at_local": posted_local.isoformat(),
-                    "post_url": post_url,
-                    "images": images
-                })
-
-            page_out.sort(key=lambda x: x["posted_at_local"], reverse=True)
-
+            page_out = posts_from_dataset(run.default_dataset_id, page_url)
+            pool.record(page_url, session_id, bool(page_out))
             if page_out:
                 return page_out
 
-            # Empty result — likely a flaky scrape. Retry with a fresh proxy IP.
+            # Empty result — likely a soft-blocked IP. Retry on another session.
             if attempt < retries:
-                print(f"  0 posts (attempt {attempt}/{retries}); retrying in {retry_delay}s...")
-                time.sleep(retry_delay)
+                delay = 0 if session_id else retry_delay
+                print(f"  0 posts (attempt {attempt}/{retries}); retrying in {delay}s...")
+                time.sleep(delay)
 
         except Exception as e:
             print(f"Error fetching {page_url} (attempt {attempt}/{retries}): {e}")
@@ -417,6 +939,316 @@ def fetch_facebook_posts(page_url: str, since_date: date, retries: int = 3, retr
     return []
 
 
+# How many Apify actor runs may be fetched at once (post_sources concurrency cap).
+APIFY_CONCURRENCY = int(os.getenv("APIFY_CONCURRENCY", "4"))
+# How many pages fetch_posts_for_pages works on at once, across all sources.
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "8"))
+
+
+class ApifySource(PostSource):
+    """The Apify Facebook posts scraper; every page's fallback source."""
+
+    type = "apify"
+
+    def __init__(self, concurrency: int = APIFY_CONCURRENCY):
+        super().__init__(concurrency)
+
+    def _fetch(self, page_url: str, since_date: date) -> list:
+        return fetch_facebook_posts(page_url, since_date)
+
+
+SOURCE_TYPES["apify"] = ApifySource
+_source_config = None
+
+
+def get_sources(page_url: str) -> list:
+    """The page's sources in the order to try them (sources.json, Apify last)."""
+    global _source_config
+    with _init_lock:
+        if _source_config is None:
+            _source_config = load_source_config()
+    return build_sources(_source_config.get(page_url, []))
+
+
+def _known_name(page_url: str) -> str | None:
+    """The restaurant name already cached for a page, so other sources keep its cache key."""
+    for name, info in get_state_backend().load_cache().get("restaurants", {}).items():
+        if info.get("facebook_url") == page_url:
+            return name
+    return None
+
+
+def fetch_posts(page_url: str, since_date: date, today_date: date, fallback: bool = True) -> list:
+    """Posts for a page from the first of its sources that returns a relevant one.
+
+    A cheaper source's posts only count if filter_posts keeps at least one
+    of them for today_date on their content; a website whose text is not a
+    menu falls through to the next source. With fallback=False the Apify source is skipped, for
+    callers that run the actor themselves (the webhook path).
+    """
+    for source in get_sources(page_url):
+        if isinstance(source, ApifySource):
+            if not fallback:
+                continue
+            return source.fetch(page_url, since_date)
+        try:
+            posts = source.fetch(page_url, since_date)
+        except Exception as e:
+            print(f"Error fetching {page_url} from {source.type} source: {e}")
+            continue
+        if not posts:
+            print(f"  {source.type} source: no posts, trying the next source")
+            continue
+        # Judge the content alone: a web page without Last-Modified is stamped
+        # with the fetch time, which would earn it the fresh-post bonus.
+        if not filter_posts([{**post, "posted_at_local": None} for post in posts], today_date):
+            print(f"  {source.type} source: {len(posts)} posts, none about the menu - trying the next source")
+            continue
+        print(f"  {source.type} source: {len(posts)} posts")
+        name = _known_name(page_url)
+        for post in posts:
+            post["page_name"] = post["page_name"] or name
+            post["posted_at_local"] = datetime.fromisoformat(post["posted_at_local"]).astimezone(TZ).isoformat()
+        archive_posts(page_url, posts, datetime.now(TZ).date())
+        return posts
+    return []
+
+
+def fetch_posts_for_pages(pages: list, since_date: date, today_date: date, fallback: bool = True) -> dict:
+    """fetch_posts for every page at once. Returns {page_url: posts} in page order.
+
+    Up to FETCH_WORKERS pages are fetched in parallel; each source's
+    concurrency cap (post_sources) still limits how many of them hit it.
+    """
+    if not pages:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(pages))) as pool:
+        fetched = pool.map(lambda page_url: fetch_posts(page_url, since_date, today_date, fallback), pages)
+        return dict(zip(pages, fetched))
+
+
+def page_display_name(posts: list, page_url: str) -> str:
+    """Restaurant name as Facebook reports it, falling back to the URL slug."""
+    return posts[0]["page_name"] if posts and posts[0]["page_name"] else page_url.split("/")[-2]
+
+
+def store_result(cache: dict, display_name: str, page_url: str, now_local: datetime, result: dict):
+    """Record one restaurant's extraction result and save the cache."""
+    print(f"Menu type: {result.get('menu_type', 'none')}")
+    print(f"Days with menus: {list(result.get('menus', {}).keys())}")
+
+    # Update cache and save after each restaurant so partial progress isn't lost
+    cache["restaurants"][display_name] = {
+        "facebook_url": page_url,
+        "last_scrape": now_local.isoformat(),
+        "menu_type": result.get("menu_type", "none"),
+        "menus": result.get("menus", {})
+    }
+    get_state_backend().update_restaurant(cache, display_name)
+    archive_result(page_url, now_local.date(), result)
+    record_ready(page_url, display_name, [day for day, items in result.get("menus", {}).items() if items],
+                 datetime.now(TZ))
+
+
+def _scrape_and_extract_sequential(pages: list, since_date: date, today_local: date,
+                                   now_local: datetime, cache: dict):
+    """Fetch every page, then extract one restaurant at a time (one Gemini request each)."""
+    print(f"\nFetching {len(pages)} pages...")
+    with profiler.phase("fetch"):
+        fetched = fetch_posts_for_pages(pages, since_date, today_local)
+
+    extracted = 0
+    for page_url, posts in fetched.items():
+        print(f"\n{'='*40}")
+        print(f"Page: {page_url}")
+        if not posts:
+            print(f"No posts found for {page_url}")
+            continue
+
+        # Space the Gemini calls out (skip first)
+        if extracted > 0:
+            print("Waiting 30s to avoid rate limiting...")
+            time.sleep(30)
+        extracted += 1
+        _extract_and_store(page_url, posts, today_local, now_local, cache)
+
+
+def _extract_and_store(page_url: str, posts: list, today_local: date, now_local: datetime, cache: dict):
+    """Filter, fast-path, Gemini for the leftovers, store: one restaurant's posts."""
+    display_name = page_display_name(posts, page_url)
+    print(f"Restaurant: {display_name}")
+    print(f"Posts found: {len(posts)}")
+    with profiler.phase("filter"):
+        posts = filter_posts(posts, today_local)
+        fast, llm_posts = fast_path_extract(posts, today_local)
+    print(f"Posts kept after relevance filter: {len(posts)}")
+
+    if llm_posts:
+        # Call Gemini to extract weekly menu
+        print(f"Analyzing {len(llm_posts)}/{len(posts)} posts with Gemini...")
+        with profiler.phase("extract"):
+            result = merge_menu_results(fast, ask_gemini_for_weekly_menu(display_name, llm_posts, today_local))
+    else:
+        print("Parsed locally, no Gemini call needed.")
+        result = fast
+    with profiler.phase("store"):
+        store_result(cache, display_name, page_url, now_local, result)
+
+
+def _fetch_pending(pages: list, since_date: date, today_local: date) -> dict:
+    """Fetch and filter posts for every page. Returns {display_name: (page_url, posts)}."""
+    print(f"\nFetching {len(pages)} pages...")
+    with profiler.phase("fetch"):
+        fetched = fetch_posts_for_pages(pages, since_date, today_local)
+
+    scraped = {}
+    for page_url, posts in fetched.items():
+        print(f"\n{'='*40}")
+        print(f"Page: {page_url}")
+        if not posts:
+            print(f"No posts found for {page_url}")
+            continue
+
+        display_name = page_display_name(posts, page_url)
+        print(f"Restaurant: {display_name}")
+        print(f"Posts found: {len(posts)}")
+        with profiler.phase("filter"):
+            posts = filter_posts(posts, today_local)
+        print(f"Posts kept after relevance filter: {len(posts)}")
+        scraped[display_name] = (page_url, posts)
+    return scraped
+
+
+def _scrape_then_extract(pages: list, since_date: date, today_local: date,
+                         now_local: datetime, cache: dict, mode: str):
+    """Fetch every pending restaurant first, then extract them all in one go.
+
+    mode 'batched' packs restaurants into shared Gemini requests; 'concurrent'
+    runs one async request per restaurant in parallel. No 30s spacing is
+    needed between Apify runs — it protected the Gemini rate limit, which
+    these modes handle themselves.
+    """
+    scraped = _fetch_pending(pages, since_date, today_local)
+    if not scraped:
+        return
+
+    fast_results, restaurants = {}, {}
+    for name, (_, posts) in scraped.items():
+        with profiler.phase("filter"):
+            fast_results[name], llm_posts = fast_path_extract(posts, today_local)
+        if llm_posts:
+            restaurants[name] = llm_posts
+        else:
+            print(f"{name}: parsed locally, no Gemini call needed.")
+
+    results = {}
+    if restaurants:
+        print(f"\nAnalyzing {len(restaurants)} restaurants with Gemini ({mode})...")
+        with profiler.phase("extract"):
+            if mode == "batched":
+                results = ask_gemini_for_weekly_menus_batched(restaurants, today_local)
+            else:
+                results = asyncio.run(aextract_weekly_menus(restaurants, today_local))
+
+    for display_name, (page_url, _) in scraped.items():
+        print(f"\n{display_name}:")
+        result = fast_results[display_name]
+        if display_name in results:
+            result = merge_menu_results(result, results[display_name])
+        with profiler.phase("store"):
+            store_result(cache, display_name, page_url, now_local, result)
+
+
+def _ingest_mode() -> str:
+    """APIFY_INGEST, or 'call' when webhook mode has no WEBHOOK_PUBLIC_URL Apify could reach."""
+    if APIFY_INGEST == "webhook" and not WEBHOOK_PUBLIC_URL:
+        print("APIFY_INGEST=webhook needs WEBHOOK_PUBLIC_URL - waiting on each run instead.")
+        return "call"
+    return APIFY_INGEST
+
+
+def _scrape_via_webhooks(pages: list, since_date: date, today_local: date,
+                         now_local: datetime, cache: dict, retries: int = 3):
+    """Start every actor run at once and extract each restaurant as its run finishes.
+
+    Runs report back through apify_webhooks.WebhookReceiver instead of being
+    waited on. A run that fails or comes back empty is restarted (fresh
+    proxy IP), like fetch_facebook_posts does, up to `retries` runs per page.
+    Runs with no event by WEBHOOK_TIMEOUT are aborted and their pages left
+    for the next scrape. Pages whose cheaper sources (post_sources) return posts get no run.
+    """
+    # Pages with a cheaper source are served by it; only the rest need actor runs.
+    actor_pages = []
+    with profiler.phase("fetch"):
+        fetched = fetch_posts_for_pages(pages, since_date, today_local, fallback=False)
+    for page_url, posts in fetched.items():
+        if posts:
+            _extract_and_store(page_url, posts, today_local, now_local, cache)
+        else:
+            actor_pages.append(page_url)
+    if not actor_pages:
+        return
+    pages = actor_pages
+
+    receiver = WebhookReceiver(secrets.token_urlsafe(16), port=WEBHOOK_PORT)
+    receiver.start()
+    request_url = receiver.request_url(WEBHOOK_PUBLIC_URL)
+    pool = get_session_pool()
+    attempts, runs = {}, {}   # page_url -> sessions tried; run id -> (page_url, session)
+
+    def start_run(page_url: str) -> bool:
+        session_id = pool.pick(page_url, exclude=attempts.get(page_url, ()))
+        attempts.setdefault(page_url, []).append(session_id)
+        try:
+            run = client_apify.actor(APIFY_ACTOR).start(
+                run_input=_actor_input(page_url, since_date, session_id),
+                webhooks=[webhook_spec(request_url, page_url)],
+            )
+        except Exception as e:
+            print(f"Error starting run for {page_url}: {e}")
+            return False
+        runs[run.id] = (page_url, session_id)
+        print(f"Started run {run.id} for {page_url} (attempt {len(attempts[page_url])}/{retries})")
+        return True
+
+    try:
+        pending = {page_url for page_url in pages if start_run(page_url)}
+        deadline = time.monotonic() + WEBHOOK_TIMEOUT
+        while pending:
+            event = receiver.next_event(deadline - time.monotonic())
+            if event is None:
+                break
+            page_url, session_id = runs.pop(event["run_id"], (None, None))
+            if page_url is None:
+                continue   # redelivery, or a run from an earlier scrape
+
+            print(f"\n{'='*40}")
+            print(f"Run {event['run_id']} for {page_url}: {event['event_type']}")
+            posts = []
+            if event["event_type"] == SUCCEEDED:
+                with profiler.phase("fetch"):
+                    posts = posts_from_dataset(event["dataset_id"], page_url)
+                pool.record(page_url, session_id, bool(posts))
+            if posts:
+                pending.discard(page_url)
+                _extract_and_store(page_url, posts, today_local, now_local, cache)
+            elif len(attempts[page_url]) >= retries or not start_run(page_url):
+                print(f"No posts found for {page_url}")
+                pending.discard(page_url)
+
+        for page_url in pending:
+            print(f"No webhook for {page_url} within {WEBHOOK_TIMEOUT}s - leaving it for the next scrape.")
+    finally:
+        receiver.stop()
+        # Nobody is listening for these any more; stop them before they use more compute.
+        for run_id, (page_url, _) in runs.items():
+            try:
+                client_apify.run(run_id).abort()
+                print(f"Aborted run {run_id} for {page_url}")
+            except Exception as e:
+                print(f"Error aborting run {run_id} for {page_url}: {e}")
+
+
 def scrape_and_process():
     """
     Phase 1: Scrape Facebook and process with Gemini.
@@ -435,18 +1267,20 @@ def scrape_and_process():
     if today_local.weekday() >= 5:
         print("Weekend - skipping scrape.")
         return
+    record_scrape_run(now_local)
     
-    # Load cache
-    cache = load_cache()
+    state = get_state_backend()
+    with profiler.phase("load"):
+        cache = state.load_cache()
     
     # Check if it's a new week (Monday) - clear cache
     if today_local.weekday() == 0:  # Monday
         if not is_cache_valid_for_week(cache, today_local):
+            if cache.get("restaurants"):
+                added = archive_week(cache)
+                print(f"Archived last week's menus to history ({added} new items)")
             print("New week started - clearing cache")
-            cache = {
-                "week_start": get_week_start(today_local).isoformat(),
-                "restaurants": {}
-            }
+            cache = state.reset_week(cache, get_week_start(today_local).isoformat())
     
     # Ensure week_start is set
     if not cache.get("week_start"):
@@ -455,85 +1289,67 @@ def scrape_and_process():
     # Look back 4 days for posts (catches weekend posts for Monday)
     since_date = today_local - timedelta(days=4)
     
-    # Process each restaurant
+    # Process each restaurant; a page shared by several tenants is scraped once
     restaurants_to_process = []
-    for page_url in FACEBOOK_PAGES:
-        # Get display name from URL for checking cache
-        url_name = page_url.rstrip('/').split('/')[-1]
-        
-        # Check all cached restaurants to find matching one
-        found_cached = False
-        for cached_name, cached_data in cache.get("restaurants", {}).items():
-            if cached_data.get("facebook_url") == page_url:
-                # A non-empty menu for today counts as cached; an empty list
-                # means Gemini found nothing, so keep retrying this restaurant.
-                if get_cached_menu_for_today(cache, cached_name, today_local):
-                    print(f"[CACHED] {cached_name} - already have menu for today")
-                    found_cached = True
-                    break
-        
-        if not found_cached:
+    for page_url in all_pages(get_tenants()):
+        cached_name = has_today_menu(cache, page_url, today_local)
+        if cached_name:
+            print(f"[CACHED] {cached_name} - already have menu for today")
+        else:
             restaurants_to_process.append(page_url)
     
     if not restaurants_to_process:
         print("\nAll restaurants have menus cached for today!")
-        save_cache(cache)
+        with profiler.phase("render"):
+            precompile_payloads(cache, today_local)
         return
-    
-    print(f"\nRestaurants to process: {len(restaurants_to_process)}")
-    
-    # Fetch and process each restaurant
-    for idx, page_url in enumerate(restaurants_to_process):
-        # Add delay between API calls (skip first)
-        if idx > 0:
-            print("Waiting 30s to avoid rate limiting...")
-            time.sleep(30)
-        
-        print(f"\n{'='*40}")
-        print(f"Fetching: {page_url}")
-        
-        posts = fetch_facebook_posts(page_url, since_date)
-        
-        if not posts:
-            print(f"No posts found for {page_url}")
-            continue
-        
-        display_name = posts[0]["page_name"] if posts and posts[0]["page_name"] else page_url.split("/")[-2]
-        print(f"Restaurant: {display_name}")
-        print(f"Posts found: {len(posts)}")
-        
-        # Call Gemini to extract weekly menu
-        print(f"Analyzing with Gemini...")
-        result = ask_gemini_for_weekly_menu(display_name, posts, today_local)
-        
-        print(f"Menu type: {result.get('menu_type', 'none')}")
-        print(f"Days with menus: {list(result.get('menus', {}).keys())}")
-        
-        # Update cache and save after each restaurant so partial progress isn't lost
-        cache["restaurants"][display_name] = {
-            "facebook_url": page_url,
-            "last_scrape": now_local.isoformat(),
-            "menu_type": result.get("menu_type", "none"),
-            "menus": result.get("menus", {})
-        }
-        save_cache(cache)
-    
+
+    # Claim each page before scraping it, so overlapping runners split the
+    # work instead of both paying for the same Apify run. A page another
+    # runner finished while we were starting up is dropped after the claim.
+    leases = {}
+    try:
+        for page_url in restaurants_to_process:
+            token = state.acquire_lease(f"scrape:{page_url}", SCRAPE_LEASE_SECONDS)
+            if token is None:
+                print(f"[LEASED] {page_url} - another runner is scraping it")
+            else:
+                leases[page_url] = token
+        shared = state.load_cache()
+        pages = [page_url for page_url in leases if not has_today_menu(shared, page_url, today_local)]
+
+        print(f"\nRestaurants to process: {len(pages)}")
+
+        if pages and _ingest_mode() == "webhook":
+            _scrape_via_webhooks(pages, since_date, today_local, now_local, cache)
+        elif pages and EXTRACTION_MODE in ("batched", "concurrent"):
+            _scrape_then_extract(pages, since_date, today_local, now_local, cache, mode=EXTRACTION_MODE)
+        elif pages:
+            _scrape_and_extract_sequential(pages, since_date, today_local, now_local, cache)
+    finally:
+        for page_url, token in leases.items():
+            state.release_lease(f"scrape:{page_url}", token)
+
+    # Other runners may have stored restaurants meanwhile; compile from the shared state.
+    with profiler.phase("render"):
+        precompile_payloads(state.load_cache(), today_local)
+
     print("\n" + "=" * 60)
     print("SCRAPE & PROCESS COMPLETE")
     print("=" * 60)
 
 
-def build_today_lunch(cache: dict, today_date: date) -> dict:
+def build_today_lunch(cache: dict, today_date: date, pages: list | None = None) -> dict:
     """Build the per-restaurant menu dict for today from the cache.
 
     Returns {display_name: {"restaurant", "items", "facebook_url"}} with one
-    entry per page in FACEBOOK_PAGES. Restaurants not present in the cache get
-    an empty item list.
+    entry per page in `pages` (default FACEBOOK_PAGES). Restaurants not
+    present in the cache get an empty item list.
     """
     today_str = today_date.isoformat()
     today_lunch = {}
 
-    for page_url in FACEBOOK_PAGES:
+    for page_url in pages or FACEBOOK_PAGES:
         found = False
         for restaurant_name, restaurant_data in cache.get("restaurants", {}).items():
             if restaurant_data.get("facebook_url") == page_url:
@@ -561,25 +1377,7 @@ def count_ready_restaurants(today_lunch: dict) -> int:
     return sum(1 for info in today_lunch.values() if info["items"])
 
 
-def decide_send_action(ready_count: int, total: int, final: bool, already_sent: bool) -> str:
-    """Pure decision for the send phase.
-
-    Returns one of:
-      'skip_sent'  - already posted today, do nothing
-      'defer'      - Send #1 and not all restaurants ready yet; wait for the deadline
-      'skip_empty' - Send #2 (deadline) but nothing to post
-      'post'       - go ahead and post to Slack
-    """
-    if already_sent:
-        return "skip_sent"
-    if not final:
-        # Send #1 (08:00 target): only post a complete menu.
-        return "post" if ready_count >= total else "defer"
-    # Send #2 (09:30 deadline): post whatever we have, but never an all-empty message.
-    return "post" if ready_count >= 1 else "skip_empty"
-
-
-def send_daily_message(final: bool = False, today: date | None = None) -> bool:
+def send_daily_message(final: bool = False, today: date | None = None, tenant: str | None = None) -> bool:
     """
     Send Slack message with today's menus from cache.
 
@@ -589,14 +1387,20 @@ def send_daily_message(final: bool = False, today: date | None = None) -> bool:
     empty it skips and logs a warning. The cache 'sent_date' guard prevents
     double-posting.
 
+    `tenant` names the office to post for (default: the first tenant); its
+    pages decide readiness and its channel and sent marker are used.
+
     Returns False only on an actual Slack send failure.
     """
     now_local = datetime.now(TZ)
     today_local = today if today is not None else now_local.date()
     today_str = today_local.isoformat()
 
+    tenant_cfg = get_tenant(get_tenants(), tenant)
+    channel, marker = tenant_cfg["channel"], sent_marker(tenant_cfg)
+
     label = "Send #2 (deadline)" if final else "Send #1"
-    print(f"=== {label} - {today_str} ===")
+    print(f"=== {label} - {today_str} - {tenant_cfg['name']} ===")
     print(f"Day: {CROATIAN_DAYS.get(today_local.weekday(), '')}")
     print("=" * 60)
 
@@ -604,14 +1408,16 @@ def send_daily_message(final: bool = False, today: date | None = None) -> bool:
         print("Weekend - skipping Slack message.")
         return True
 
-    cache = load_cache()
+    state = get_state_backend()
+    with profiler.phase("load"):
+        cache = state.load_cache()
 
     if not is_cache_valid_for_week(cache, today_local):
         print("WARNING: Cache is from a different week!")
 
-    today_lunch = build_today_lunch(cache, today_local)
+    today_lunch = build_today_lunch(cache, today_local, tenant_cfg["pages"])
     ready_count = count_ready_restaurants(today_lunch)
-    total = len(FACEBOOK_PAGES)
+    total = len(tenant_cfg["pages"])
 
     print("\nMENU SUMMARY:")
     for name, info in today_lunch.items():
@@ -619,8 +1425,11 @@ def send_daily_message(final: bool = False, today: date | None = None) -> bool:
         print(f"  {name}: {status}")
     print(f"Ready: {ready_count}/{total}")
 
-    already_sent = cache.get("sent_date") == today_str
+    payload = get_payload(load_payloads(), today_local, channel)
+    already_sent = cache.get(marker) == today_str or bool(payload and payload.get("sent_hash"))
     action = decide_send_action(ready_count, total, final, already_sent=already_sent)
+    if action != "post":
+        record_send(today_local, channel, datetime.now(TZ), final, action, ready_count, total)
 
     if action == "skip_sent":
         print(f"Already sent today ({today_str}) - skipping.")
@@ -632,16 +1441,72 @@ def send_daily_message(final: bool = False, today: date | None = None) -> bool:
         print("WARNING: all restaurants empty at the deadline - not posting.")
         return True
 
-    # action == "post"
-    print("\n" + "=" * 60)
-    print(f"Sending to Slack channel: {SLACK_CHANNEL}")
-    success = send_to_slack(today_lunch, today_local)
-    if success:
-        cache["sent_date"] = today_str
-        save_cache(cache)
+    # action == "post": only one runner may post, and it re-checks the
+    # marker under the lease in case another runner posted since we loaded.
+    with state.lease(f"send:{tenant_cfg['name']}:{today_str}", SEND_LEASE_SECONDS) as acquired:
+        if not acquired:
+            print("Another runner is sending right now - skipping.")
+            return True
+        previous = state.get_sent(marker)
+        if previous == today_str:
+            print(f"Already sent today ({today_str}) - skipping.")
+            return True
+
+        print("\n" + "=" * 60)
+        print(f"Sending to Slack channel: {channel}")
+        with profiler.phase("send"):
+            success = send_to_slack(today_lunch, today_local, channel=channel)
+        record_send(today_local, channel, datetime.now(TZ), final, "post" if success else "failed",
+                    ready_count, total)
+        if success:
+            if not state.compare_and_set_sent(cache, previous, today_str, marker=marker):
+                print("WARNING: sent marker changed while posting - another runner also posted.")
+            mark_payload_sent(today_local, channel)
     return success
 
 
+def send_for_all_tenants(final: bool = False, today: date | None = None) -> bool:
+    """Run the send phase for every tenant, then the subscription DMs. False if any tenant's Slack post failed."""
+    results = [send_daily_message(final=final, today=today, tenant=t["name"]) for t in get_tenants()]
+    send_subscription_dms(final=final, today=today)
+    return all(results)
+
+
+def send_subscription_dms(final: bool = False, today: date | None = None) -> int:
+    """DM every subscribed user the restaurants and dishes they follow (see subscriptions).
+
+    Send #1 DMs a user once every restaurant they follow is ready; the
+    deadline send DMs whatever matched. Nobody gets an empty DM or a second
+    DM on the same day. Failed DMs are only logged: the channel post is what
+    the run's exit status reports. Returns the number of DMs sent.
+    """
+    today_local = today if today is not None else datetime.now(TZ).date()
+    if today_local.weekday() >= 5 or not has_subscriptions():
+        return 0
+
+    index = SubscriptionIndex.load()
+    with profiler.phase("load"):
+        lunch = build_today_lunch(get_state_backend().load_cache(), today_local, all_pages(get_tenants()))
+    done = dms_sent(today_local)
+    records = {}
+    with profiler.phase("render"):
+        for user_id, user_lunch in index.fan_out(lunch).items():
+            if user_id in done or not (final or index.is_ready(user_id, lunch)):
+                continue
+            records[user_id] = compile_payload(user_lunch, today_local)
+    if not records:
+        print(f"\nSubscription DMs: nothing to send ({len(index)} subscribers, {len(done)} already sent today).")
+        return 0
+
+    print(f"\nSending {len(records)} subscription DMs...")
+    with profiler.phase("send"):
+        results = send_dms(records, today_local, SLACK_BOT_TOKEN)
+    failed = [user_id for user_id, ok in results.items() if not ok]
+    if failed:
+        print(f"WARNING: {len(failed)} DMs could not be sent: {', '.join(failed)}")
+    return len(results) - len(failed)
+
+
 def main():
     """
     Main entry point - runs both phases in one shot (for a single daily trigger).
@@ -650,7 +1515,7 @@ def main():
     ready instead of deferring when a restaurant is missing.
     """
     scrape_and_process()
-    return send_daily_message(final=True)
+    return send_for_all_tenants(final=True)
 
 
 if __name__ == "__main__":
@@ -663,14 +1528,21 @@ if __name__ == "__main__":
         default="full",
         help="Run mode: 'scrape', 'send' (early), 'send-final' (deadline), 'full'"
     )
+    parser.add_argument("--profile", action="store_true",
+                        help="profile each phase (cProfile + tracemalloc); report goes to PROFILE_DIR")
+    parser.add_argument("--profile-top", type=int, default=20, help="hotspots/allocation sites per phase")
     args = parser.parse_args()
+
+    if args.profile:
+        from profiling import enable_profiling
+        enable_profiling(args.profile_top)
     
     try:
         if args.mode == "scrape":
             scrape_and_process()
             sys.exit(0)
         elif args.mode in ("send", "send-final"):
-            success = send_daily_message(final=(args.mode == "send-final"))
+            success = send_for_all_tenants(final=(args.mode == "send-final"))
             sys.exit(0 if success else 1)
         else:  # full
             success = main()
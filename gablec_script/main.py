@@ -7,18 +7,36 @@ from dotenv import load_dotenv
 env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-from gablec_daily import main, scrape_and_process, send_daily_message
+# gablec_daily is imported per mode below: the send modes post a precompiled
+# payload via slack_payload and only fall back to gablec_daily (which loads
+# the Apify and Gemini SDKs) when no payload exists for today.
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Gablec Bot - Daily Lunch Menu for Slack")
     parser.add_argument(
         "--mode",
-        choices=["scrape", "send", "send-final", "full"],
+        choices=["scrape", "send", "send-final", "full", "replay", "prefetch", "serve"],
         default="full",
         help="Run mode: 'scrape' fetch/process, 'send' early send (all ready), "
-             "'send-final' deadline send (partial ok), 'full' for both"
+             "'send-final' deadline send (partial ok), 'full' for both, "
+             "'replay' re-extract archived scrapes offline, "
+             "'prefetch' extract the next weekday's menus via the Gemini Batch API, "
+             "'serve' run the read-only HTTP menu API"
     )
+    parser.add_argument("--weeks", type=int, default=4,
+                        help="replay: how many recent weeks of archived scrapes to use")
+    parser.add_argument("--models", default=None,
+                        help="replay: comma-separated Gemini models (default: the production chain)")
+    parser.add_argument("--host", default=None, help="serve: bind address (default MENU_API_HOST or 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=None, help="serve: port (default MENU_API_PORT or 8080)")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile each phase (cProfile + tracemalloc); report goes to PROFILE_DIR")
+    parser.add_argument("--profile-top", type=int, default=20, help="hotspots/allocation sites per phase")
     args = parser.parse_args()
+
+    if args.profile:
+        from profiling import enable_profiling
+        enable_profiling(args.profile_top)
     
     print("=" * 60)
     print("GABLEC BOT - Daily Lunch Menu for Slack")
@@ -41,9 +59,11 @@ if __name__ == "__main__":
     
     # Check required tokens based on mode
     missing = []
-    if args.mode in ["scrape", "full"]:
+    if args.mode in ["scrape", "full", "prefetch"]:
         if not apify_token:
             missing.append("APIFY_TOKEN")
+    # serve only reads the cache, but importing gablec_daily builds the Gemini client.
+    if args.mode in ["scrape", "full", "replay", "prefetch", "serve"]:
         if not google_api_key:
             missing.append("GOOGLE_API_KEY")
     if args.mode in ["send", "send-final", "full"]:
@@ -59,13 +79,35 @@ if __name__ == "__main__":
     
     try:
         if args.mode == "scrape":
+            from gablec_daily import scrape_and_process
             scrape_and_process()
             print("\n" + "=" * 60)
             print("SUCCESS! Scrape and process complete.")
             print("=" * 60)
             sys.exit(0)
         elif args.mode in ("send", "send-final"):
-            success = send_daily_message(final=(args.mode == "send-final"))
+            from datetime import datetime
+            from zoneinfo import ZoneInfo
+            from slack_payload import send_precompiled
+            from tenants import load_tenants
+            final = args.mode == "send-final"
+            today = datetime.now(ZoneInfo("Europe/Zagreb")).date()
+            results = []
+            for tenant in load_tenants(None, slack_channel):
+                # The payload file is local to this runner; with a shared state
+                # backend the sent marker lives there, so go through gablec_daily.
+                tenant_success = None
+                if not os.getenv("STATE_BACKEND_URL"):
+                    tenant_success = send_precompiled(final, today, tenant["channel"], slack_bot_token)
+                if tenant_success is None:
+                    from gablec_daily import send_daily_message
+                    tenant_success = send_daily_message(final=final, tenant=tenant["name"])
+                results.append(tenant_success)
+            from subscriptions import has_subscriptions
+            if has_subscriptions():
+                from gablec_daily import send_subscription_dms
+                send_subscription_dms(final=final, today=today)
+            success = all(results)
             if success:
                 print("\n" + "=" * 60)
                 print("Send phase complete.")
@@ -76,7 +118,24 @@ if __name__ == "__main__":
                 print("FAILED: Could not post to Slack.")
                 print("=" * 60)
                 sys.exit(1)
+        elif args.mode == "prefetch":
+            from batch_prefetch import run_prefetch
+            stored = run_prefetch()
+            print("\n" + "=" * 60)
+            print(f"Prefetch complete: {stored} restaurants stored.")
+            print("=" * 60)
+            sys.exit(0)
+        elif args.mode == "serve":
+            from menu_api import serve
+            serve(args.host, args.port)
+            sys.exit(0)
+        elif args.mode == "replay":
+            from replay import run_replay
+            models = [m.strip() for m in args.models.split(",")] if args.models else None
+            run_replay(weeks=args.weeks, models=models)
+            sys.exit(0)
         else:  # full
+            from gablec_daily import main
             success = main()
             if success:
                 print("\n" + "=" * 60)
@@ -0,0 +1,197 @@
+"""Read-only HTTP menu API (`main.py --mode serve`).
+
+For internal tools (kiosk screen, bots in other chats) that want the menus
+without reading menu_cache.json or waiting for Slack:
+
+    GET /today[?tenant=name]   today's menus, one entry per restaurant
+    GET /week[?tenant=name]    every day of the current week
+    GET /health
+
+Responses are JSON built from build_today_lunch, with each item also parsed
+into name / price / tags (menu_items.parse_item). Every body is rendered
+once into an in-memory snapshot, together with its ETag, and served from
+there. The snapshot is rebuilt only when the cache changes, which means the
+file's mtime/size for the file backend or the content hash for Redis, or
+when the date rolls over. Clients that send If-None-Match get 304 Not
+Modified.
+
+The server is a plain asyncio HTTP/1.1 loop with keep-alive that only looks
+up prebuilt bytes, so one core serves thousands of requests per second.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+
+import gablec_daily as gd
+from menu_items import parse_item
+
+
+MENU_API_HOST = os.getenv("MENU_API_HOST", "127.0.0.1")
+MENU_API_PORT = int(os.getenv("MENU_API_PORT", "8080"))
+# How often a request may trigger a "did the cache change?" check.
+SNAPSHOT_CHECK_SECONDS = 1.0
+
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+def _restaurants(lunch: dict) -> list:
+    return [{"restaurant": info["restaurant"], "facebook_url": info["facebook_url"],
+             "items": [{"text": raw, **parse_item(raw)} for raw in info["items"]]}
+            for info in lunch.values()]
+
+
+def _day_view(cache: dict, day, pages: list) -> dict:
+    lunch = gd.build_today_lunch(cache, day, pages)
+    return {"date": day.isoformat(), "weekday": gd.CROATIAN_DAYS.get(day.weekday(), ""),
+            "ready": gd.count_ready_restaurants(lunch), "total": len(lunch), "restaurants": _restaurants(lunch)}
+
+
+def _entry(payload: dict) -> tuple:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return body, '"%s"' % hashlib.sha1(body).hexdigest()[:20]
+
+
+def render_snapshot(cache: dict, today) -> dict:
+    """{(path, tenant): (body, etag)} for every endpoint and tenant ("" = first tenant)."""
+    week_start = gd.get_week_start(today)
+    week = [week_start + timedelta(days=i) for i in range(5)]
+    snapshot = {("/health", ""): _entry({"status": "ok", "date": today.isoformat(),
+                                         "week_start": cache.get("week_start")})}
+    tenants = gd.get_tenants()
+    for tenant in tenants:
+        names = [tenant["name"]] + ([""] if tenant is tenants[0] else [])
+        today_body = _entry(_day_view(cache, today, tenant["pages"]))
+        week_body = _entry({"week_start": week_start.isoformat(),
+                            "days": [_day_view(cache, day, tenant["pages"]) for day in week]})
+        for name in names:
+            snapshot[("/today", name)] = today_body
+            snapshot[("/week", name)] = week_body
+    return snapshot
+
+
+class MenuSnapshot:
+    """Rendered responses, rebuilt when the cache or the date changes."""
+
+    def __init__(self, clock=None):
+        self.clock = clock or (lambda: datetime.now(gd.TZ))
+        self.entries = {}
+        self.version = None
+        self.reloads = 0
+        self._next_check = 0.0
+
+    def _version(self, today) -> tuple:
+        state = gd.get_state_backend()
+        if isinstance(state, gd.FileStateBackend):
+            try:
+                st = gd.CACHE_FILE.stat()
+                return today, st.st_mtime_ns, st.st_size
+            except FileNotFoundError:
+                return today, None
+        cache = state.load_cache()
+        return today, hashlib.sha1(json.dumps(cache, sort_keys=True).encode()).hexdigest()
+
+    def refresh(self, force: bool = False):
+        """Rebuild the snapshot if the cache or date changed (checked at most once a second)."""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        self._next_check = now + SNAPSHOT_CHECK_SECONDS
+        today = self.clock().date()
+        version = self._version(today)
+        if version == self.version and not force:
+            return
+        self.entries = render_snapshot(gd.get_state_backend().load_cache(), today)
+        self.version = version
+        self.reloads += 1
+
+    def respond(self, method: str, target: str, if_none_match: str | None) -> tuple:
+        """(status, body, etag) for one request."""
+        if method not in ("GET", "HEAD"):
+            return 405, b'{"error":"method not allowed"}', None
+        url = urlparse(target)
+        tenant = (parse_qs(url.query).get("tenant") or [""])[0]
+        self.refresh()
+        entry = self.entries.get((url.path.rstrip("/") or "/", tenant))
+        if entry is None:
+            return 404, b'{"error":"not found"}', None
+        body, etag = entry
+        if if_none_match:
+            tags = [t.strip() for t in if_none_match.split(",")]
+            if etag in tags or "*" in tags:
+                return 304, b"", etag
+        return 200, body, etag
+
+
+def _response(status: int, body: bytes, etag: str | None, head: bool, keep_alive: bool) -> bytes:
+    headers = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+               "Content-Type: application/json; charset=utf-8",
+               "Cache-Control: no-cache",
+               f"Content-Length: {len(body) if status != 304 else 0}"]
+    if etag:
+        headers.append(f"ETag: {etag}")
+    if not keep_alive:
+        headers.append("Connection: close")
+    head_bytes = ("\r\n".join(headers) + "\r\n\r\n").encode("ascii")
+    return head_bytes if head or status == 304 else head_bytes + body
+
+
+async def _handle(snapshot: MenuSnapshot, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            try:
+                raw = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            lines = raw.decode("latin-1").split("\r\n")
+            parts = lines[0].split(" ")
+            if len(parts) != 3:
+                writer.write(_response(400, b'{"error":"bad request"}', None, False, False))
+                break
+            method, target, version = parts
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+            try:
+                length = int(headers.get("content-length", "0") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                writer.write(_response(400, b'{"error":"bad request"}', None, False, False))
+                break
+            if length:
+                await reader.readexactly(length)
+
+            status, body, etag = snapshot.respond(method, target, headers.get("if-none-match"))
+            writer.write(_response(status, body, etag, method == "HEAD", keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def start_server(host: str = None, port: int = None, snapshot: MenuSnapshot = None):
+    """Start the API on the running loop. Returns (server, snapshot)."""
+    snapshot = snapshot or MenuSnapshot()
+    snapshot.refresh(force=True)
+    server = await asyncio.start_server(lambda r, w: _handle(snapshot, r, w),
+                                        host or MENU_API_HOST, port if port is not None else MENU_API_PORT)
+    return server, snapshot
+
+
+def serve(host: str = None, port: int = None):
+    """Run the API until interrupted."""
+    async def main():
+        server, _ = await start_server(host, port)
+        addr = server.sockets[0].getsockname()
+        print(f"Menu API listening on http://{addr[0]}:{addr[1]} (/today, /week, /health)")
+        async with server:
+            await server.serve_forever()
+    asyncio.run(main())
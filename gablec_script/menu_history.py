@@ -0,0 +1,175 @@
+"""Long-term menu history with full-text search.
+
+scrape_and_process clears menu_cache.json every Monday. Before it does,
+archive_week() moves the finished week into a SQLite database: one row per
+menu item with the dish name, a normalised price in cents and its currency,
+and an FTS5 index over dish names (diacritic-insensitive, so 'cobanac'
+finds 'Čobanac').
+
+Query CLI (run from gablec_script/):
+
+    python menu_history.py search segedin --days 90
+    python menu_history.py prices --match gablec --days 365
+    python menu_history.py import ../menu_cache.json
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+from menu_items import split_price, unpack_cache
+
+
+HISTORY_DB = Path(os.getenv("MENU_HISTORY_DB", str(Path(__file__).parent.parent / "menu_history.sqlite")))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS restaurants (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    facebook_url TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    restaurant_id INTEGER NOT NULL REFERENCES restaurants(id),
+    day TEXT NOT NULL,
+    dish TEXT NOT NULL,
+    price_cents INTEGER,
+    currency TEXT,
+    raw TEXT NOT NULL,
+    UNIQUE (restaurant_id, day, raw)
+);
+CREATE INDEX IF NOT EXISTS items_day ON items(day);
+CREATE INDEX IF NOT EXISTS items_restaurant_day ON items(restaurant_id, day);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    dish, content='items', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts(rowid, dish) VALUES (new.id, new.dish);
+END;
+"""
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    """Open (and if needed create) the history database."""
+    conn = sqlite3.connect(path or HISTORY_DB)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def archive_week(cache: dict, path: Path | None = None) -> int:
+    """Copy every menu in a menu_cache.json-shaped dict into the history.
+
+    Idempotent: items already stored for the same restaurant and day are
+    skipped. Returns the number of new items.
+    """
+    conn = connect(path)
+    added = 0
+    with conn:
+        for name, data in (cache.get("restaurants") or {}).items():
+            conn.execute(
+                "INSERT INTO restaurants(name, facebook_url) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET facebook_url = excluded.facebook_url",
+                (name, data.get("facebook_url")),
+            )
+            (restaurant_id,) = conn.execute("SELECT id FROM restaurants WHERE name = ?", (name,)).fetchone()
+            for day, items in (data.get("menus") or {}).items():
+                for raw in items:
+                    dish, cents, currency = split_price(raw)
+                    cur = conn.execute(
+                        "INSERT OR IGNORE INTO items(restaurant_id, day, dish, price_cents, currency, raw) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (restaurant_id, day, dish, cents, currency, raw),
+                    )
+                    added += cur.rowcount
+    conn.close()
+    return added
+
+
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word as a quoted prefix term."""
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search(text: str, since: date | None = None, path: Path | None = None) -> list:
+    """Items whose dish matches `text`, newest first: [(day, restaurant, raw)]."""
+    query = _fts_query(text)
+    if not query:
+        return []
+    conn = connect(path)
+    rows = conn.execute(
+        "SELECT i.day, r.name, i.raw FROM items_fts f "
+        "JOIN items i ON i.id = f.rowid JOIN restaurants r ON r.id = i.restaurant_id "
+        "WHERE items_fts MATCH ? AND i.day >= ? ORDER BY i.day DESC, r.name",
+        (query, (since or date.min).isoformat()),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def price_stats(match: str | None = None, since: date | None = None, currency: str = "EUR",
+                path: Path | None = None) -> list:
+    """Per-restaurant price stats in cents: [(restaurant, items, avg, min, max)].
+
+    Only priced items in `currency`; `match` narrows to dishes matching that
+    full-text query.
+    """
+    conn = connect(path)
+    sql = ("SELECT r.name, COUNT(*), ROUND(AVG(i.price_cents)), MIN(i.price_cents), MAX(i.price_cents) "
+           "FROM items i JOIN restaurants r ON r.id = i.restaurant_id ")
+    params = []
+    if match:
+        sql += "JOIN items_fts f ON f.rowid = i.id AND items_fts MATCH ? "
+        params.append(_fts_query(match))
+    sql += "WHERE i.price_cents IS NOT NULL AND i.currency = ? AND i.day >= ? GROUP BY r.name ORDER BY r.name"
+    params += [currency, (since or date.min).isoformat()]
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+
+def _cents(value) -> str:
+    return f"{value / 100:.2f}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gablec menu history")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_search = sub.add_parser("search", help="which restaurant served a dish, and when")
+    p_search.add_argument("text")
+    p_search.add_argument("--days", type=int, default=None, help="only the last N days")
+
+    p_prices = sub.add_parser("prices", help="average/min/max price per restaurant")
+    p_prices.add_argument("--match", default=None, help="only dishes matching this text")
+    p_prices.add_argument("--days", type=int, default=None, help="only the last N days")
+    p_prices.add_argument("--currency", default="EUR")
+
+    p_import = sub.add_parser("import", help="add a menu_cache.json file to the history")
+    p_import.add_argument("cache_file", type=Path)
+
+    args = parser.parse_args(argv)
+    since = date.today() - timedelta(days=args.days) if getattr(args, "days", None) else None
+
+    if args.command == "search":
+        rows = search(args.text, since)
+        for day, restaurant, raw in rows:
+            print(f"{day}  {restaurant}: {raw}")
+        print(f"{len(rows)} matches")
+    elif args.command == "prices":
+        print(f"{'restaurant':<32} {'items':>6} {'avg':>7} {'min':>7} {'max':>7}  ({args.currency})")
+        for name, count, avg, low, high in price_stats(args.match, since, args.currency):
+            print(f"{name:<32} {count:>6} {_cents(avg):>7} {_cents(low):>7} {_cents(high):>7}")
+    else:
+        with open(args.cache_file, "r", encoding="utf-8") as f:
+            added = archive_week(unpack_cache(json.load(f)))
+        print(f"Imported {added} new items into {HISTORY_DB}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
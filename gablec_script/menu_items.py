@@ -0,0 +1,224 @@
+"""Structured menu items and the column-wise cache format.
+
+Extraction returns items as display strings, "naziv jela (8,90 E)", and the
+Slack message, history and fast path all keep using them as such. What this
+module adds is parsing each item once, when the cache is written, into
+name / price in cents / currency / tags, and storing the week column-wise:
+
+    "items": {
+      "strings": ["Zaboky", "2026-06-01", "Čobanac", ...],
+      "prices": [[" (7,80 E)", 780, "EUR"], ["", null, null], ...],
+      "runs": [[0, 1, 4], ...],
+      "name": [2, ...], "price": [0, ...], "tags": [0, ...]
+    }
+
+Restaurant names, days and dish names are interned into `strings`, so a
+dish served every day or by two restaurants is stored once. The price text
+after the dish name is dictionary-encoded in `prices` with its parsed value,
+and `tags` is a bitmask over TAGS. Rows are grouped by restaurant and day,
+stored as (restaurant, day, row count) runs. WeekTable.select() filters on
+these columns ("items under 8 EUR", "soups on Tuesday") without parsing
+any strings.
+"""
+import json
+import re
+
+from croatian import fold
+
+
+# "8,90 €", "(8,00 E)", "9.50 EUR", "65 kn" — number then currency marker.
+PRICE_RE = re.compile(r"\(?\s*(\d{1,4}(?:[.,]\d{1,2})?)\s*(€|eur\b|e\b|kn\b|hrk\b)\s*\)?", re.IGNORECASE)
+CURRENCIES = {"€": "EUR", "eur": "EUR", "e": "EUR", "kn": "HRK", "hrk": "HRK"}
+
+# Tag -> word stems, matched case- and diacritic-insensitively against the dish name.
+TAGS = {
+    "soup": ("juha", "krem ", "corba", "manestra"),
+    "fish": ("riba", "oslic", "tuna", "losos", "pastrv", "lignj", "srdel", "bakalar", "skamp"),
+    "vegetarian": ("posn", "vegetarij", "vegan"),
+    "salad": ("salata",),
+    "dessert": ("desert", "kolac", "palacink", "strudl", "torta"),
+}
+TAG_BITS = {tag: 1 << i for i, tag in enumerate(TAGS)}
+
+ROW_COLUMNS = ("restaurant", "day", "name", "price", "tags")
+
+
+def split_price(item: str) -> tuple[str, int | None, str | None]:
+    """Split 'naziv jela (8,90 E)' into ('naziv jela', 890, 'EUR').
+
+    Items without a recognisable price return (item, None, None).
+    """
+    matches = list(PRICE_RE.finditer(item))
+    if not matches:
+        return item.strip(), None, None
+    m = matches[-1]  # the price comes last; earlier matches may be part of the name
+    amount = float(m.group(1).replace(",", "."))
+    dish = (item[:m.start()] + " " + item[m.end():]).strip(" -–:,")
+    return " ".join(dish.split()), round(amount * 100), CURRENCIES[m.group(2).lower()]
+
+
+def item_tags(name: str) -> int:
+    """Bitmask of the TAGS whose stems occur in the dish name."""
+    folded = fold(name) + " "
+    return sum(TAG_BITS[tag] for tag, stems in TAGS.items() if any(s in folded for s in stems))
+
+
+def parse_item(raw: str) -> dict:
+    """One display string as {"name", "price_cents", "currency", "tags"} (tags as names)."""
+    name, cents, currency = split_price(raw)
+    mask = item_tags(name)
+    return {"name": name, "price_cents": cents, "currency": currency,
+            "tags": [tag for tag, bit in TAG_BITS.items() if mask & bit]}
+
+
+class WeekTable:
+    """A week of menu items for all restaurants, one list per column."""
+
+    def __init__(self):
+        self.strings = []
+        self._ids = {}
+        self.prices = []          # [(text after the name, cents, currency)]
+        self._price_ids = {}      # the whole tuple -> index: raw rows share "" text with unpriced items
+        self.raw = {}             # row -> display string, for items that are not name + price text
+        self.columns = {name: [] for name in ROW_COLUMNS}
+
+    def _intern(self, s: str) -> int:
+        idx = self._ids.get(s)
+        if idx is None:
+            idx = self._ids[s] = len(self.strings)
+            self.strings.append(s)
+        return idx
+
+    def _price_id(self, text: str, cents: int | None, currency: str | None) -> int:
+        key = (text, cents, currency)
+        idx = self._price_ids.get(key)
+        if idx is None:
+            idx = self._price_ids[key] = len(self.prices)
+            self.prices.append(key)
+        return idx
+
+    def add(self, restaurant: str, day: str, raw: str):
+        """Append one item, parsing its display string."""
+        name, cents, currency = split_price(raw)
+        suffix = raw[len(name):] if raw.startswith(name) else ""
+        if not raw.startswith(name):
+            self.raw[len(self)] = raw
+        cols = self.columns
+        cols["restaurant"].append(self._intern(restaurant))
+        cols["day"].append(self._intern(day))
+        cols["name"].append(self._intern(name))
+        cols["price"].append(self._price_id(suffix, cents, currency))
+        cols["tags"].append(item_tags(name))
+
+    @classmethod
+    def from_restaurants(cls, restaurants: dict) -> "WeekTable":
+        """Parse every cache record's menus ({day: [raw, ...]}) into a table."""
+        table = cls()
+        for restaurant, record in restaurants.items():
+            for day, items in (record.get("menus") or {}).items():
+                for raw in items:
+                    table.add(restaurant, day, raw)
+        return table
+
+    def to_json(self) -> dict:
+        runs = []
+        for r, d in zip(self.columns["restaurant"], self.columns["day"]):
+            if runs and runs[-1][0] == r and runs[-1][1] == d:
+                runs[-1][2] += 1
+            else:
+                runs.append([r, d, 1])
+        data = {"strings": self.strings, "prices": [list(p) for p in self.prices], "runs": runs,
+                "name": self.columns["name"], "price": self.columns["price"], "tags": self.columns["tags"]}
+        if self.raw:
+            data["raw"] = {str(row): raw for row, raw in self.raw.items()}
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict) -> "WeekTable":
+        table = cls()
+        table.strings = list(data["strings"])
+        table._ids = {s: i for i, s in enumerate(table.strings)}
+        table.prices = [tuple(p) for p in data["prices"]]
+        table._price_ids = {p: i for i, p in enumerate(table.prices)}
+        table.raw = {int(row): raw for row, raw in data.get("raw", {}).items()}
+        for r, d, count in data["runs"]:
+            table.columns["restaurant"] += [r] * count
+            table.columns["day"] += [d] * count
+        for name in ("name", "price", "tags"):
+            table.columns[name] = list(data[name])
+        return table
+
+    def __len__(self) -> int:
+        return len(self.columns["name"])
+
+    def display(self, row: int) -> str:
+        """The item's original display string."""
+        if row in self.raw:
+            return self.raw[row]
+        return self.strings[self.columns["name"][row]] + self.prices[self.columns["price"][row]][0]
+
+    def menus(self) -> dict:
+        """{restaurant: {day: [raw, ...]}}, items in their original order."""
+        out = {}
+        s, cols = self.strings, self.columns
+        for row, (r, d) in enumerate(zip(cols["restaurant"], cols["day"])):
+            out.setdefault(s[r], {}).setdefault(s[d], []).append(self.display(row))
+        return out
+
+    def select(self, day: str | None = None, restaurant: str | None = None, max_price_cents: int | None = None,
+               currency: str | None = None, tag: str | None = None) -> list:
+        """Rows matching every given filter, as dicts; filters compare column values only."""
+        s, cols = self.strings, self.columns
+        want = {"day": self._ids.get(day, -1) if day else None,
+                "restaurant": self._ids.get(restaurant, -1) if restaurant else None}
+        # Price filters are decided once per distinct price, not per row.
+        price_ok = [(max_price_cents is None or (cents is not None and cents <= max_price_cents))
+                    and (currency is None or cur == currency) for _, cents, cur in self.prices]
+        bit = TAG_BITS[tag] if tag else 0
+        rows = []
+        for i in range(len(self)):
+            if any(v is not None and cols[k][i] != v for k, v in want.items()):
+                continue
+            if not price_ok[cols["price"][i]] or (bit and not cols["tags"][i] & bit):
+                continue
+            _, cents, cur = self.prices[cols["price"][i]]
+            rows.append({
+                "restaurant": s[cols["restaurant"][i]], "day": s[cols["day"][i]], "raw": self.display(i),
+                "name": s[cols["name"][i]], "price_cents": cents, "currency": cur,
+                "tags": [t for t, b in TAG_BITS.items() if cols["tags"][i] & b],
+            })
+        return rows
+
+
+def pack_cache(cache: dict) -> dict:
+    """menu_cache.json as written: restaurants' menus moved into one column-wise "items" table."""
+    packed = dict(cache)
+    packed["restaurants"] = {}
+    for name, record in (cache.get("restaurants") or {}).items():
+        packed["restaurants"][name] = {k: v for k, v in record.items() if k != "menus"}
+        # Days the extraction found nothing for have no rows; keep them explicitly.
+        empty_days = {day: [] for day, items in (record.get("menus") or {}).items() if not items}
+        if empty_days:
+            packed["restaurants"][name]["menus"] = empty_days
+    packed["items"] = WeekTable.from_restaurants(cache.get("restaurants") or {}).to_json()
+    return packed
+
+
+def unpack_cache(data: dict) -> dict:
+    """Inverse of pack_cache; a cache written before the items table passes through unchanged."""
+    if "items" not in data:
+        return data
+    cache = dict(data)
+    menus = WeekTable.from_json(cache.pop("items")).menus()
+    cache["restaurants"] = {name: {**record, "menus": {**record.get("menus", {}), **menus.get(name, {})}}
+                            for name, record in (data.get("restaurants") or {}).items()}
+    return cache
+
+
+def load_week_table(path) -> WeekTable:
+    """The items table of a menu_cache.json file, without expanding it back to strings."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if "items" in data:
+        return WeekTable.from_json(data["items"])
+    return WeekTable.from_restaurants(data.get("restaurants") or {})
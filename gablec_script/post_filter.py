@@ -0,0 +1,143 @@
+"""Pre-LLM post filter.
+
+Scores each scraped post for "looks like a menu", drops duplicates (exact
+text, near-identical text, re-posted images) and keeps only the best few for
+the extractor, so Gemini sees fewer and smaller requests.
+"""
+import hashlib
+import io
+import os
+import re
+from datetime import date, datetime, timedelta
+
+from PIL import Image
+
+from croatian import FOLDED_DAYS, fold
+from fast_path import DATE_RE, PRICE_RE
+
+
+RELEVANCE_MIN_SCORE = float(os.getenv("RELEVANCE_MIN_SCORE", "1"))
+MAX_POSTS_FOR_EXTRACTION = int(os.getenv("MAX_POSTS_FOR_EXTRACTION", "5"))
+NEAR_DUPLICATE_SIMILARITY = 0.85   # Jaccard similarity of word 3-grams
+IMAGE_HASH_MAX_DISTANCE = 6        # Hamming distance between 64-bit dHashes
+
+MENU_KEYWORDS = ("marenda", "gablec", "meni", "menu", "jelovnik", "ponuda", "tjedn", "dnevn",
+                 "juha", "varivo", "salata", "prilog", "desert", "pomfrit", "krumpir", "riza")
+OFF_TOPIC_KEYWORDS = ("koncert", "party", "nagradn", "zaposljav", "trazimo", "svadb", "vjencanj",
+                      "rodendan", "dj ", "ulaznic", "poklon bon", "giveaway")
+
+
+def score_post_relevance(post: dict, today_date: date) -> float:
+    """Cheap 'is this a menu post' score from text, prices, day names and post time.
+
+    Higher is more likely a menu; RELEVANCE_MIN_SCORE is the cut-off.
+    """
+    folded = fold(post.get("text") or "")
+    score = 0.0
+    score += 2 * min(2, sum(1 for k in MENU_KEYWORDS if k in folded))
+    score += min(3, len(PRICE_RE.findall(folded)))
+    score += min(2, sum(1 for day in FOLDED_DAYS if day in folded))
+    score -= 3 * sum(1 for k in OFF_TOPIC_KEYWORDS if k in folded)
+    if post.get("images"):
+        score += 1
+
+    week_start = today_date - timedelta(days=today_date.weekday())
+    for m in DATE_RE.finditer(folded):
+        try:
+            if 0 <= (date(today_date.year, int(m.group(2)), int(m.group(1))) - week_start).days < 5:
+                score += 1
+                break
+        except ValueError:
+            continue
+
+    posted_at = post.get("posted_at_local")
+    if posted_at:
+        posted = datetime.fromisoformat(posted_at)
+        if posted.date() < week_start - timedelta(days=1):
+            score -= 2  # older than the Sunday before this week: last week's news
+        elif posted.weekday() == 6 or (posted.weekday() < 5 and posted.hour < 12):
+            score += 1  # weekly menus go up Sunday, daily ones in the morning
+    return score
+
+
+def _text_shingles(text: str) -> set:
+    words = re.findall(r"\w+", fold(text))
+    if len(words) < 3:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def image_fingerprint(data: bytes):
+    """64-bit difference hash of an image, or a sha1 hex digest if Pillow cannot decode it.
+
+    dHash survives re-encoding and resizing, so the same menu photo re-posted
+    with different bytes still matches; the digest only matches exact copies.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            pixels = img.convert("L").resize((9, 8)).tobytes()
+    except Exception:
+        return hashlib.sha1(data).hexdigest()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def _same_image(a, b) -> bool:
+    if isinstance(a, int) and isinstance(b, int):
+        return bin(a ^ b).count("1") <= IMAGE_HASH_MAX_DISTANCE
+    return a == b
+
+
+def filter_posts(posts_data: list, today_date: date, max_posts: int = None) -> list:
+    """Keep the smallest set of posts likely to contain a menu.
+
+    Posts are expected newest first (as fetch_facebook_posts returns them),
+    so when two posts duplicate each other the newer one is kept. Images
+    already seen in a newer post are dropped from older ones; a post left with
+    neither new text nor images is dropped. Of the survivors scoring at least
+    RELEVANCE_MIN_SCORE, the top `max_posts` are returned in their original
+    order.
+    """
+    max_posts = MAX_POSTS_FOR_EXTRACTION if max_posts is None else max_posts
+    kept = []  # (score, index, post)
+    seen_texts, seen_shingles, seen_images = set(), [], []
+
+    for idx, post in enumerate(posts_data):
+        text = post.get("text") or ""
+        normalized = " ".join(fold(text).split())
+        duplicate_text = False
+        if normalized:
+            shingles = _text_shingles(text)   # empty for emoji-only captions: exact match only
+            duplicate_text = normalized in seen_texts or bool(shingles) and any(
+                len(shingles & other) / len(shingles | other) >= NEAR_DUPLICATE_SIMILARITY
+                for other in seen_shingles
+            )
+            if not duplicate_text:
+                seen_texts.add(normalized)
+                if shingles:
+                    seen_shingles.append(shingles)
+
+        new_images = []
+        for img in post.get("images") or []:
+            fp = image_fingerprint(img["bytes"])
+            if any(_same_image(fp, other) for other in seen_images):
+                continue
+            seen_images.append(fp)
+            new_images.append(img)
+
+        if duplicate_text and not new_images:
+            continue
+        if not normalized and not new_images:
+            continue
+        post = {**post, "images": new_images}
+        if duplicate_text:
+            post["text"] = None  # its text is already in a newer post
+        score = score_post_relevance(post, today_date)
+        if score >= RELEVANCE_MIN_SCORE:
+            kept.append((score, idx, post))
+
+    top = sorted(kept, key=lambda x: (-x[0], x[1]))[:max_posts]
+    return [post for _, _, post in sorted(top, key=lambda x: x[1])]
@@ -0,0 +1,286 @@
+"""Where a restaurant's posts come from.
+
+Posts used to come only from the Apify Facebook scraper, which pays for a
+residential-proxy actor run per page. Some restaurants also publish the menu
+on their own website or in a feed, and a plain HTTP GET is enough for those.
+Each page therefore has an ordered list of sources. The first source that
+returns posts the post filter finds relevant wins, and Apify stays last as
+the fallback.
+
+sources.json (repo root, or SOURCES_FILE), keyed by Facebook page URL:
+
+    {
+      "https://www.facebook.com/zabokyhr/": [
+        {"type": "http", "url": "https://zaboky.hr/marenda", "element_id": "menu", "concurrency": 2},
+        {"type": "http", "url": "https://zaboky.hr/feed.xml"}
+      ]
+    }
+
+Pages not listed use Apify alone. Apify is appended to every list that does
+not place it explicitly. Each source returns the same post records the
+Apify path does ({"page_name", "text", "posted_at_local", "post_url",
+"images"}), so filtering, the fast path and Gemini see no difference.
+
+Pages are fetched in parallel (gablec_daily.fetch_posts_for_pages), and
+`concurrency` caps how many of those fetches may hit one source at once.
+The cap is shared by every source with the same type and host, so two
+pages on one website share one limit.
+"""
+import json
+import os
+import threading
+import xml.etree.ElementTree as ET
+from datetime import date, datetime
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+
+SOURCES_FILE = Path(os.getenv("SOURCES_FILE", str(Path(__file__).parent.parent / "sources.json")))
+HTTP_TIMEOUT = 15
+MAX_IMAGES = 4
+
+_limits = {}
+_limits_lock = threading.Lock()
+
+
+def _limit(key: tuple, concurrency: int) -> threading.BoundedSemaphore:
+    with _limits_lock:
+        if key not in _limits:
+            _limits[key] = threading.BoundedSemaphore(concurrency)
+        return _limits[key]
+
+
+class PostSource:
+    """One way of getting a page's posts. Subclasses implement _fetch."""
+
+    type = None
+
+    def __init__(self, concurrency: int = 1):
+        self.concurrency = concurrency
+
+    @property
+    def limit_key(self) -> tuple:
+        return (self.type,)
+
+    def fetch(self, page_url: str, since_date: date) -> list:
+        """Posts newer than since_date, newest first; [] when the source has nothing."""
+        with _limit(self.limit_key, self.concurrency):
+            return self._fetch(page_url, since_date)
+
+    def _fetch(self, page_url: str, since_date: date) -> list:
+        raise NotImplementedError
+
+
+# Elements whose text is never part of a menu.
+_SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "form", "svg", "template"}
+_BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article",
+               "table", "ul", "ol", "dd", "dt", "hr"}
+_VOID_TAGS = {"br", "hr", "img", "meta", "link", "input", "source", "wbr"}
+
+
+class _TextExtractor(HTMLParser):
+    """Visible text and image URLs of an HTML page, or of the element with a given id/class.
+
+    Open elements are kept on a stack and an end tag closes everything
+    opened after its start tag, so the unclosed <p> and <li> tags HTML
+    allows cannot keep the target element open past its own end tag.
+    """
+
+    def __init__(self, element_id: str | None = None, element_class: str | None = None):
+        super().__init__(convert_charrefs=True)
+        self.element_id, self.element_class = element_id, element_class
+        self.scoped = not (element_id or element_class)
+        self.stack = []         # open elements: the whole document, or the target element and below
+        self.chunks, self.images = [], []
+
+    def _is_target(self, attrs: dict) -> bool:
+        if self.element_id and attrs.get("id") == self.element_id:
+            return True
+        return bool(self.element_class and self.element_class in (attrs.get("class") or "").split())
+
+    def _skipping(self) -> bool:
+        return any(tag in _SKIP_TAGS for tag in self.stack)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if not (self.scoped or self.stack or self._is_target(attrs)):
+            return
+        if tag not in _VOID_TAGS:
+            self.stack.append(tag)
+        if tag in _BLOCK_TAGS:
+            self.chunks.append("\n")
+        if tag == "img" and not self._skipping() and attrs.get("src"):
+            self.images.append(attrs["src"])
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/>, <img .../>: nothing to close.
+        self.handle_starttag(tag, attrs)
+        if self.stack and self.stack[-1] == tag and tag not in _VOID_TAGS:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        if tag not in self.stack:
+            return   # stray end tag, or one outside the target element
+        if tag in _BLOCK_TAGS:
+            self.chunks.append("\n")
+        while self.stack.pop() != tag:
+            pass
+
+    def handle_data(self, data):
+        if (self.scoped or self.stack) and not self._skipping():
+            self.chunks.append(data)
+
+    def text(self) -> str:
+        lines = (" ".join(line.split()) for line in "".join(self.chunks).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def html_to_text(html: str, element_id: str | None = None, element_class: str | None = None) -> tuple:
+    """(visible text, image URLs) of an HTML document or one element of it."""
+    parser = _TextExtractor(element_id, element_class)
+    parser.feed(html)
+    parser.close()
+    return parser.text(), parser.images
+
+
+def _feed_time(text: str | None) -> datetime | None:
+    if not text:
+        return None
+    try:
+        return parsedate_to_datetime(text)           # RSS pubDate
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(text.strip().replace("Z", "+00:00"))   # Atom
+    except ValueError:
+        return None
+
+
+def parse_feed(xml: str) -> list:
+    """RSS or Atom entries as [(title, text, link, published)]."""
+    root = ET.fromstring(xml)
+    atom = "{http://www.w3.org/2005/Atom}"
+    entries = []
+    for item in root.iter("item"):
+        entries.append((item.findtext("title") or "", item.findtext("description") or "",
+                        item.findtext("link") or "", _feed_time(item.findtext("pubDate"))))
+    for entry in root.iter(f"{atom}entry"):
+        link = entry.find(f"{atom}link")
+        body = entry.findtext(f"{atom}content") or entry.findtext(f"{atom}summary") or ""
+        entries.append((entry.findtext(f"{atom}title") or "", body,
+                        link.get("href", "") if link is not None else "",
+                        _feed_time(entry.findtext(f"{atom}published") or entry.findtext(f"{atom}updated"))))
+    return entries
+
+
+class HttpSource(PostSource):
+    """A restaurant website page or RSS/Atom feed, fetched with one GET.
+
+    An HTML page becomes one post: its visible text (or that of the element
+    named by element_id / element_class), timestamped by Last-Modified or
+    the fetch time, with up to MAX_IMAGES of its images when images=true.
+    A feed becomes one post per entry newer than since_date.
+    """
+
+    type = "http"
+
+    def __init__(self, url: str, concurrency: int = 2, name: str | None = None, element_id: str | None = None,
+                 element_class: str | None = None, images: bool = False, client: httpx.Client | None = None):
+        super().__init__(concurrency)
+        self.url, self.name = url, name
+        self.element_id, self.element_class, self.images = element_id, element_class, images
+        self.client = client
+
+    @property
+    def limit_key(self) -> tuple:
+        return (self.type, urlparse(self.url).netloc)
+
+    def _get(self, url: str) -> httpx.Response:
+        if self.client is not None:
+            return self.client.get(url, timeout=HTTP_TIMEOUT, follow_redirects=True)
+        return httpx.get(url, timeout=HTTP_TIMEOUT, follow_redirects=True)
+
+    def _download_images(self, urls: list) -> list:
+        images = []
+        for url in urls[:MAX_IMAGES]:
+            try:
+                r = self._get(urljoin(self.url, url))
+            except httpx.HTTPError:
+                continue
+            mime = r.headers.get("content-type", "").split(";")[0].strip()
+            if r.status_code == 200 and mime.startswith("image/"):
+                images.append({"bytes": r.content, "mime": mime})
+        return images
+
+    def _post(self, text: str, posted: datetime, url: str, images: list) -> dict:
+        return {"page_name": self.name, "text": text, "posted_at_local": posted.astimezone().isoformat(),
+                "post_url": url, "images": images}
+
+    def _fetch(self, page_url: str, since_date: date) -> list:
+        try:
+            r = self._get(self.url)
+        except httpx.HTTPError as e:
+            print(f"  {self.url}: {e}")
+            return []
+        if r.status_code != 200:
+            print(f"  {self.url}: HTTP {r.status_code}")
+            return []
+
+        body = r.text
+        content_type = r.headers.get("content-type", "")
+        if "xml" in content_type or body.lstrip().startswith(("<?xml", "<rss", "<feed")):
+            posts = []
+            for title, html, link, published in parse_feed(body):
+                if published is None or published.date() < since_date:
+                    continue
+                text = "\n".join(part for part in (title, html_to_text(html)[0]) if part)
+                posts.append(self._post(text, published, link or self.url, []))
+            posts.sort(key=lambda p: p["posted_at_local"], reverse=True)
+            return posts
+
+        text, image_urls = html_to_text(body, self.element_id, self.element_class)
+        if not text and not (self.images and image_urls):
+            return []
+        posted = _feed_time(r.headers.get("last-modified")) or datetime.now().astimezone()
+        if posted.date() < since_date:
+            return []
+        images = self._download_images(image_urls) if self.images else []
+        return [self._post(text, posted, self.url, images)]
+
+
+# Source types by their "type" in sources.json; gablec_daily registers "apify".
+SOURCE_TYPES = {"http": HttpSource}
+
+
+def load_source_config(path: Path | None = None) -> dict:
+    """sources.json as {page_url: [source spec, ...]}, validated; {} without the file.
+
+    Raises ValueError on unknown types or specs missing their required fields.
+    """
+    path = path or SOURCES_FILE
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{path}: expected an object keyed by page URL")
+    for page_url, specs in config.items():
+        if not isinstance(specs, list):
+            raise ValueError(f"{path}: sources for {page_url} must be a list")
+        for spec in specs:
+            if spec.get("type") not in SOURCE_TYPES and spec.get("type") != "apify":
+                raise ValueError(f"{path}: unknown source type for {page_url}: {spec}")
+            if spec["type"] == "http" and not spec.get("url"):
+                raise ValueError(f"{path}: http source for {page_url} needs a url: {spec}")
+    return config
+
+
+def build_sources(specs: list) -> list:
+    """Source instances for one page's specs, with Apify appended if not listed."""
+    if not any(spec["type"] == "apify" for spec in specs):
+        specs = list(specs) + [{"type": "apify"}]
+    return [SOURCE_TYPES[spec["type"]](**{k: v for k, v in spec.items() if k != "type"}) for spec in specs]
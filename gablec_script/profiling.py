@@ -0,0 +1,111 @@
+"""Per-phase CPU and memory profiling (`main.py --profile`).
+
+The pipeline marks its phases with `profiler.phase("fetch")` etc. When
+profiling is off, a phase is a no-op context manager. When it is on, each
+phase gets its own cProfile.Profile (re-entered phases accumulate, so the
+per-restaurant fetch/extract loop adds up into one "fetch" and one
+"extract") and tracemalloc snapshots around it. At exit the report is
+written to PROFILE_DIR:
+
+    profile-<stamp>.txt        wall time, peak memory, top-N functions by
+                               cumulative time and top-N allocation sites
+                               per phase
+    profile-<stamp>-<phase>.prof  raw pstats, for snakeviz / pstats
+
+Phases do not nest: a phase entered inside another is counted in the outer
+one, because only one cProfile profiler can be active at a time.
+"""
+import atexit
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(Path(__file__).parent.parent / "profiles")))
+
+
+class PhaseProfiler:
+    """Collects cProfile stats, wall time and tracemalloc data per named phase."""
+
+    def __init__(self):
+        self.enabled = False
+        self.top_n = 20
+        self.phases = {}
+        self._active = None
+
+    def enable(self, top_n: int = 20):
+        self.enabled = True
+        self.top_n = top_n
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled or self._active is not None:
+            yield
+            return
+
+        stats = self.phases.setdefault(name, {
+            "profile": cProfile.Profile(), "calls": 0, "wall": 0.0, "peak": 0, "allocations": {},
+        })
+        self._active = name
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        t0 = time.perf_counter()
+        stats["profile"].enable()
+        try:
+            yield
+        finally:
+            stats["profile"].disable()
+            stats["wall"] += time.perf_counter() - t0
+            stats["calls"] += 1
+            stats["peak"] = max(stats["peak"], tracemalloc.get_traced_memory()[1])
+            after = tracemalloc.take_snapshot()
+            for diff in after.compare_to(before, "lineno"):
+                frame = diff.traceback[0]
+                site = f"{frame.filename}:{frame.lineno}"
+                stats["allocations"][site] = stats["allocations"].get(site, 0) + diff.size_diff
+            self._active = None
+
+    def report(self) -> str:
+        """Text report: one section per phase, in the order phases first ran."""
+        out = io.StringIO()
+        for name, st in self.phases.items():
+            out.write(f"=== {name}: {st['calls']}x, {st['wall']:.2f} s wall, "
+                      f"peak {st['peak'] / 1024 / 1024:.1f} MiB traced ===\n\n")
+            pstats.Stats(st["profile"], stream=out).sort_stats("cumulative").print_stats(self.top_n)
+            out.write(f"Top {self.top_n} allocation sites (net bytes over the phase):\n")
+            sites = sorted(st["allocations"].items(), key=lambda kv: kv[1], reverse=True)[:self.top_n]
+            for site, size in sites:
+                out.write(f"  {size / 1024:>10.1f} KiB  {site}\n")
+            out.write("\n")
+        return out.getvalue()
+
+    def write_report(self, out_dir: Path | None = None) -> Path | None:
+        """Write the text report and raw .prof files. Returns the report path."""
+        if not self.phases:
+            return None
+        out_dir = out_dir or PROFILE_DIR
+        out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        for name, st in self.phases.items():
+            st["profile"].dump_stats(out_dir / f"profile-{stamp}-{name}.prof")
+        path = out_dir / f"profile-{stamp}.txt"
+        path.write_text(self.report(), encoding="utf-8")
+        print(f"Profile written to {path}")
+        return path
+
+
+profiler = PhaseProfiler()
+
+
+def enable_profiling(top_n: int = 20):
+    """Turn on per-phase profiling for this process; the report is written at exit."""
+    profiler.enable(top_n)
+    atexit.register(profiler.write_report)
@@ -0,0 +1,127 @@
+"""Offline re-extraction over the scrape archive (`main.py --mode replay`).
+
+Runs the current prompt against archived posts for every model under test,
+concurrently on the async Gemini client, and reports per model: latency,
+token usage, how often the answer parsed, and agreement with the result the
+production run stored at the time. No Facebook scraping, no Apify credits.
+"""
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+
+from google.genai.errors import ClientError, ServerError
+
+import gablec_daily as gd
+from croatian import fold
+from delivery_slo import percentile
+from post_filter import filter_posts
+from scrape_archive import iter_archived_days, load_archived_day
+
+
+def menu_agreement(a: dict, b: dict) -> float:
+    """Similarity of two extraction results' menus, 0..1.
+
+    Mean over the union of dates of the Jaccard similarity of the item sets
+    (compared case- and diacritic-insensitively). Two empty results agree.
+    """
+    menus_a, menus_b = a.get("menus") or {}, b.get("menus") or {}
+    days = set(menus_a) | set(menus_b)
+    if not days:
+        return 1.0
+    total = 0.0
+    for day in days:
+        items_a = {" ".join(fold(i).split()) for i in menus_a.get(day, [])}
+        items_b = {" ".join(fold(i).split()) for i in menus_b.get(day, [])}
+        union = items_a | items_b
+        total += len(items_a & items_b) / len(union) if union else 1.0
+    return total / len(days)
+
+
+async def _replay_one(model_name: str, key: str, day: date, record: dict, semaphore) -> dict:
+    posts = filter_posts(record["posts"], day)
+    page_name = next((p["page_name"] for p in record["posts"] if p.get("page_name")), key)
+    sample = {"model": model_name, "restaurant": key, "day": day.isoformat(), "ok": False,
+              "latency": None, "prompt_tokens": 0, "output_tokens": 0, "agreement": None}
+    if not posts:
+        return sample
+
+    parts, _ = gd.single_restaurant_parts(page_name, posts, day, skip_images=False)
+    async with semaphore:
+        t0 = time.monotonic()
+        try:
+            resp = await gd.client_gemini.aio.models.generate_content(
+                model=model_name,
+                contents=[{"role": "user", "parts": parts}],
+            )
+        except (ServerError, ClientError) as e:
+            print(f"  {model_name} failed on {key} {day}: {e}")
+            return sample
+        sample["latency"] = time.monotonic() - t0
+
+    usage = getattr(resp, "usage_metadata", None)
+    sample["prompt_tokens"] = getattr(usage, "prompt_token_count", None) or 0
+    sample["output_tokens"] = getattr(usage, "candidates_token_count", None) or 0
+    result = gd.parse_gemini_json(resp)
+    sample["ok"] = gd.is_menu_result(result)
+    if sample["ok"] and record.get("result") is not None:
+        sample["agreement"] = menu_agreement(result, record["result"])
+    return sample
+
+
+async def replay_archive(since: date, until: date, models: list, concurrency: int) -> list:
+    """Re-extract every archived (restaurant, day) in [since, until] with each model."""
+    semaphore = asyncio.Semaphore(concurrency)
+    jobs = []
+    for key, day in iter_archived_days(since, until):
+        record = load_archived_day(key, day)
+        if record is None:
+            continue
+        jobs.extend(_replay_one(model_name, key, day, record, semaphore) for model_name in models)
+    return list(await asyncio.gather(*jobs))
+
+
+def summarize(samples: list) -> dict:
+    """Per-model stats: runs, parsed, p50/p95 latency, tokens, mean agreement."""
+    summary = {}
+    for model_name in dict.fromkeys(s["model"] for s in samples):
+        mine = [s for s in samples if s["model"] == model_name]
+        latencies = [s["latency"] for s in mine if s["latency"] is not None]
+        agreements = [s["agreement"] for s in mine if s["agreement"] is not None]
+        summary[model_name] = {
+            "runs": len(mine),
+            "parsed": sum(1 for s in mine if s["ok"]),
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+            "prompt_tokens": sum(s["prompt_tokens"] for s in mine),
+            "output_tokens": sum(s["output_tokens"] for s in mine),
+            "agreement": sum(agreements) / len(agreements) if agreements else None,
+        }
+    return summary
+
+
+def print_report(summary: dict):
+    print(f"\n{'model':<26} {'runs':>5} {'parsed':>7} {'p50 s':>7} {'p95 s':>7} "
+          f"{'in tok':>9} {'out tok':>8} {'agree':>6}")
+    for model_name, st in summary.items():
+        agreement = f"{st['agreement']:.0%}" if st["agreement"] is not None else "-"
+        print(f"{model_name:<26} {st['runs']:>5} {st['parsed']:>7} {st['latency_p50']:>7.2f} "
+              f"{st['latency_p95']:>7.2f} {st['prompt_tokens']:>9} {st['output_tokens']:>8} {agreement:>6}")
+
+
+def run_replay(weeks: int = 4, models: list | None = None, concurrency: int | None = None) -> bool:
+    """Replay the last `weeks` weeks of archived scrapes. Returns False if nothing was archived."""
+    today = datetime.now(gd.TZ).date()
+    since = gd.get_week_start(today) - timedelta(weeks=weeks - 1)
+    models = models or gd.GEMINI_MODELS
+
+    print(f"=== REPLAY - archived scrapes {since.isoformat()}..{today.isoformat()} ===")
+    print(f"Models: {', '.join(models)}")
+    print("=" * 60)
+
+    samples = asyncio.run(replay_archive(since, today, models, concurrency or gd.GEMINI_CONCURRENCY))
+    if not samples:
+        print("No archived scrapes in range.")
+        return False
+
+    print_report(summarize(samples))
+    return True
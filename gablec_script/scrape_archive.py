@@ -0,0 +1,205 @@
+"""Raw scrape archive.
+
+Every fetched set of posts (Apify or a post_sources source) is kept so prompt and model changes can be
+replayed offline (see replay.py) instead of scraping Facebook again.
+
+Layout under ARCHIVE_DIR:
+
+    posts/<restaurant>/<YYYY-MM-DD>.json.gz   posts scraped that day + extraction result
+    images/<sha256>                           content-addressed image bytes
+
+Post records store image digests, not bytes, so an image re-posted across
+days or restaurants is stored once.
+
+The archive rides along in the Actions cache, so every run prunes it to the
+last ARCHIVE_KEEP_WEEKS weeks (replay only looks at `--weeks` recent weeks):
+
+    python scrape_archive.py prune --weeks 8
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+
+ARCHIVE_DIR = Path(os.getenv("SCRAPE_ARCHIVE_DIR", str(Path(__file__).parent.parent / "scrape_archive")))
+ARCHIVE_ENABLED = os.getenv("SCRAPE_ARCHIVE", "1") == "1"
+ARCHIVE_KEEP_WEEKS = int(os.getenv("SCRAPE_ARCHIVE_KEEP_WEEKS", "8"))
+
+
+def restaurant_key(page_url: str) -> str:
+    """Stable archive key for a page: the last URL path segment."""
+    return page_url.rstrip("/").split("/")[-1] or "unknown"
+
+
+def _day_file(key: str, day: date) -> Path:
+    return ARCHIVE_DIR / "posts" / key / f"{day.isoformat()}.json.gz"
+
+
+def store_image(data: bytes) -> str:
+    """Write image bytes to the image store (once) and return their sha256 digest."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = ARCHIVE_DIR / "images" / digest
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+    return digest
+
+
+def load_image(digest: str) -> bytes | None:
+    path = ARCHIVE_DIR / "images" / digest
+    return path.read_bytes() if path.exists() else None
+
+
+def _read_day(path: Path) -> dict | None:
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _write_day(path: Path, record: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False)
+    tmp.replace(path)
+
+
+def archive_posts(page_url: str, posts: list, day: date):
+    """Merge a scrape result into the archive for (restaurant, day).
+
+    Posts are keyed by URL (falling back to their timestamp), so repeated
+    scrapes on the same day add new posts without duplicating old ones.
+    Archive failures are logged, never raised: they must not break a scrape.
+    """
+    if not ARCHIVE_ENABLED or not posts:
+        return
+    try:
+        key = restaurant_key(page_url)
+        path = _day_file(key, day)
+        record = _read_day(path) or {"page_url": page_url, "day": day.isoformat(), "posts": []}
+
+        by_id = {p.get("post_url") or p["posted_at_local"]: p for p in record["posts"]}
+        for post in posts:
+            by_id[post.get("post_url") or post["posted_at_local"]] = {
+                "page_name": post.get("page_name"),
+                "text": post.get("text"),
+                "posted_at_local": post["posted_at_local"],
+                "post_url": post.get("post_url"),
+                "images": [{"sha256": store_image(img["bytes"]), "mime": img["mime"]}
+                           for img in post.get("images") or []],
+            }
+        record["posts"] = sorted(by_id.values(), key=lambda p: p["posted_at_local"], reverse=True)
+        _write_day(path, record)
+    except OSError as e:
+        print(f"  Could not archive posts for {page_url}: {e}")
+
+
+def archive_result(page_url: str, day: date, result: dict):
+    """Attach the extraction result for (restaurant, day), for later agreement checks."""
+    if not ARCHIVE_ENABLED:
+        return
+    path = _day_file(restaurant_key(page_url), day)
+    record = _read_day(path)
+    if record is None:
+        return
+    try:
+        record["result"] = result
+        _write_day(path, record)
+    except OSError as e:
+        print(f"  Could not archive result for {page_url}: {e}")
+
+
+def load_archived_day(key: str, day: date) -> dict | None:
+    """Archived record with image bytes restored, in fetch_facebook_posts format.
+
+    Images missing from the store are dropped from their post.
+    """
+    record = _read_day(_day_file(key, day))
+    if record is None:
+        return None
+    for post in record["posts"]:
+        images = []
+        for img in post.get("images") or []:
+            data = load_image(img["sha256"])
+            if data is not None:
+                images.append({"bytes": data, "mime": img["mime"]})
+        post["images"] = images
+    return record
+
+
+def iter_archived_days(since: date | None = None, until: date | None = None):
+    """Yield (restaurant_key, day) for every archived scrape, oldest first."""
+    root = ARCHIVE_DIR / "posts"
+    if not root.exists():
+        return
+    entries = []
+    for restaurant_dir in root.iterdir():
+        if not restaurant_dir.is_dir():
+            continue
+        for path in restaurant_dir.glob("*.json.gz"):
+            try:
+                day = date.fromisoformat(path.name.removesuffix(".json.gz"))
+            except ValueError:
+                continue
+            if (since is None or day >= since) and (until is None or day <= until):
+                entries.append((day, restaurant_dir.name))
+    for day, key in sorted(entries):
+        yield key, day
+
+
+def prune_archive(today: date, keep_weeks: int | None = None) -> tuple[int, int]:
+    """Drop archived days before the last `keep_weeks` weeks, then images no day refers to.
+
+    Returns (days removed, images removed).
+    """
+    keep_weeks = keep_weeks if keep_weeks is not None else ARCHIVE_KEEP_WEEKS
+    since = today - timedelta(days=today.weekday(), weeks=keep_weeks - 1)
+    removed_days = removed_images = 0
+    root = ARCHIVE_DIR / "posts"
+    for key, day in list(iter_archived_days(until=since - timedelta(days=1))):
+        _day_file(key, day).unlink()
+        removed_days += 1
+    if root.exists():
+        for restaurant_dir in root.iterdir():
+            if restaurant_dir.is_dir() and not any(restaurant_dir.iterdir()):
+                restaurant_dir.rmdir()
+
+    images = ARCHIVE_DIR / "images"
+    if images.exists():
+        referenced = set()
+        for key, day in iter_archived_days():
+            record = _read_day(_day_file(key, day))
+            if record is None:
+                continue
+            for post in record["posts"]:
+                referenced.update(img["sha256"] for img in post.get("images") or [])
+        for path in images.iterdir():
+            if path.name not in referenced:
+                path.unlink()
+                removed_images += 1
+    return removed_days, removed_images
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gablec scrape archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_prune = sub.add_parser("prune", help="drop archived scrapes older than the last N weeks")
+    p_prune.add_argument("--weeks", type=int, default=None, help=f"weeks to keep (default {ARCHIVE_KEEP_WEEKS})")
+    args = parser.parse_args(argv)
+
+    days, images = prune_archive(date.today(), args.weeks)
+    print(f"Pruned {days} archived days and {images} images from {ARCHIVE_DIR}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
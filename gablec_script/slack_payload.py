@@ -0,0 +1,216 @@
+"""Precompiled Slack payloads.
+
+The scrape phase renders the finished Slack message for every remaining
+weekday and stores it here, keyed by day and channel. The send phase then
+only has to read one record and post it — this module imports nothing but
+the standard library and slack_sdk, so `main.py --mode send` never loads the
+Gemini or Apify SDKs.
+
+File layout (slack_payloads.json, next to menu_cache.json):
+
+    {"week_start": "2026-06-01",
+     "days": {"2026-06-01": {"#channel": {"blocks": [...], "text": "...",
+                                          "thread": [[...], ...],
+                                          "ready_count": 2, "total": 3,
+                                          "hash": "...", "sent_hash": "...",
+                                          "sent_at": "..."}}}}
+"""
+import hashlib
+import json
+from datetime import date, datetime
+from pathlib import Path
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+from delivery_slo import record_send
+
+
+PAYLOAD_FILE = Path(__file__).parent.parent / "slack_payloads.json"
+
+
+def payload_hash(blocks: list, text: str, thread: list = None) -> str:
+    """Stable content hash of a rendered message (and its thread replies)."""
+    content = {"blocks": blocks, "text": text}
+    if thread:
+        content["thread"] = thread
+    canonical = json.dumps(content, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def make_payload(blocks: list, text: str, ready_count: int, total: int, thread: list = None) -> dict:
+    """Build one ready-to-post record.
+
+    `thread` holds the block lists of overflow messages, posted as replies
+    under the main message.
+    """
+    record = {
+        "blocks": blocks,
+        "text": text,
+        "ready_count": ready_count,
+        "total": total,
+        "hash": payload_hash(blocks, text, thread),
+    }
+    if thread:
+        record["thread"] = thread
+    return record
+
+
+def load_payloads() -> dict:
+    """Load the payload file, return an empty one if missing or invalid."""
+    if not PAYLOAD_FILE.exists():
+        return {"week_start": None, "days": {}}
+    try:
+        with open(PAYLOAD_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return {"week_start": None, "days": {}}
+
+
+def save_payloads(data: dict):
+    """Save the payload file."""
+    with open(PAYLOAD_FILE, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"Payloads saved to {PAYLOAD_FILE}")
+
+
+def get_payload(data: dict, day: date, channel: str) -> dict | None:
+    return data.get("days", {}).get(day.isoformat(), {}).get(channel)
+
+
+def store_payloads(week_start: date, compiled: dict) -> bool:
+    """Merge freshly compiled {day_iso: {channel: record}} into the payload file.
+
+    Sent markers of existing records are kept. Days from other weeks are
+    dropped. The file is only rewritten when some content hash changed, so an
+    unchanged scrape produces no cache commit. Returns True if it was written.
+    """
+    data = load_payloads()
+    if data.get("week_start") != week_start.isoformat():
+        data = {"week_start": week_start.isoformat(), "days": {}}
+
+    changed = False
+    for day_iso, by_channel in compiled.items():
+        stored_day = data["days"].setdefault(day_iso, {})
+        for channel, record in by_channel.items():
+            old = stored_day.get(channel) or {}
+            merged = dict(record)
+            for key in ("sent_hash", "sent_at"):
+                if key in old:
+                    merged[key] = old[key]
+            if merged != old:
+                stored_day[channel] = merged
+                changed = True
+
+    if changed:
+        save_payloads(data)
+    return changed
+
+
+def mark_payload_sent(day: date, channel: str, sent_hash: str | None = None) -> bool:
+    """Record that today's message for `channel` went out. Returns False if there is no record."""
+    data = load_payloads()
+    record = get_payload(data, day, channel)
+    if record is None:
+        return False
+    record["sent_hash"] = sent_hash or record["hash"]
+    record["sent_at"] = datetime.now().astimezone().isoformat(timespec="seconds")
+    save_payloads(data)
+    return True
+
+
+def _post_with_retries(slack_client: WebClient, max_retries: int, **kwargs):
+    """chat_postMessage with retries. Returns the response, or None after the last failure."""
+    for attempt in range(1, max_retries + 1):
+        try:
+            return slack_client.chat_postMessage(unfurl_links=False, unfurl_media=False, **kwargs)
+        except SlackApiError as e:
+            print(f"Slack API error (attempt {attempt}/{max_retries}): {e.response['error']}")
+        except Exception as e:
+            print(f"Unexpected error (attempt {attempt}/{max_retries}): {e}")
+    return None
+
+
+def post_payload(record: dict, channel: str, token: str, max_retries: int = 3, client=None) -> bool:
+    """Post a payload record to Slack with retry logic.
+
+    Overflow messages in record["thread"] go out as replies to the main
+    message. Once the main message is posted the result is True even if a
+    reply fails, so the day is marked sent and never double-posted.
+    `client` reuses an existing WebClient (e.g. the DM sender's throttled one).
+    """
+    slack_client = client or WebClient(token=token)
+
+    resp = _post_with_retries(slack_client, max_retries, channel=channel,
+                              text=record["text"], blocks=record["blocks"])
+    if resp is None:
+        return False
+    print(f"Message sent to {channel} successfully!")
+
+    thread = record.get("thread") or []
+    for idx, blocks in enumerate(thread, 1):
+        reply = _post_with_retries(slack_client, max_retries, channel=channel, thread_ts=resp["ts"],
+                                   text=f"Gableci (nastavak {idx}/{len(thread)})", blocks=blocks)
+        if reply is None:
+            print(f"WARNING: thread reply {idx}/{len(thread)} could not be posted.")
+    return True
+
+
+def decide_send_action(ready_count: int, total: int, final: bool, already_sent: bool) -> str:
+    """Pure decision for the send phase.
+
+    Returns one of:
+      'skip_sent'  - already posted today, do nothing
+      'defer'      - Send #1 and not all restaurants ready yet; wait for the deadline
+      'skip_empty' - Send #2 (deadline) but nothing to post
+      'post'       - go ahead and post to Slack
+    """
+    if already_sent:
+        return "skip_sent"
+    if not final:
+        # Send #1 (08:00 target): only post a complete menu.
+        return "post" if ready_count >= total else "defer"
+    # Send #2 (09:30 deadline): post whatever we have, but never an all-empty message.
+    return "post" if ready_count >= 1 else "skip_empty"
+
+
+def send_precompiled(final: bool, today: date, channel: str, token: str) -> bool | None:
+    """Send phase from a precompiled record.
+
+    Returns None when there is no record for (today, channel) — the caller
+    should fall back to gablec_daily.send_daily_message — otherwise the same
+    result send_daily_message would give (False only on a Slack failure).
+    """
+    data = load_payloads()
+    record = get_payload(data, today, channel)
+    if record is None:
+        print(f"No precompiled payload for {today.isoformat()} / {channel}.")
+        return None
+
+    today_str = today.isoformat()
+    print(f"Precompiled payload {record['hash']}: ready {record['ready_count']}/{record['total']}")
+
+    already_sent = record.get("sent_hash") is not None
+    if already_sent and record["sent_hash"] == record["hash"]:
+        print("Payload unchanged since it was posted.")
+    action = decide_send_action(record["ready_count"], record["total"], final, already_sent=already_sent)
+    if action != "post":
+        record_send(today, channel, datetime.now().astimezone(), final, action, record["ready_count"], record["total"])
+
+    if action == "skip_sent":
+        print(f"Already sent today ({today_str}) - skipping.")
+        return True
+    if action == "defer":
+        print(f"Only {record['ready_count']}/{record['total']} ready - deferring to the 09:30 deadline send.")
+        return True
+    if action == "skip_empty":
+        print("WARNING: all restaurants empty at the deadline - not posting.")
+        return True
+
+    print(f"Sending to Slack channel: {channel}")
+    success = post_payload(record, channel, token)
+    record_send(today, channel, datetime.now().astimezone(), final, "post" if success else "failed",
+                record["ready_count"], record["total"])
+    if success:
+        record["sent_hash"] = record["hash"]
+        record["sent_at"] = datetime.now().astimezone().isoformat(timespec="seconds")
+        save_payloads(data)
+    return success
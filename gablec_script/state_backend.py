@@ -0,0 +1,236 @@
+"""Pluggable shared state for the bot.
+
+By default the state is menu_cache.json, committed between GitHub Actions
+runs; the workflow's concurrency group keeps runs from overlapping, which is
+the only thing protecting it (see gablec_daily.FileStateBackend). Setting
+STATE_BACKEND_URL=redis://[:password@]host:port[/db] switches to
+RedisStateBackend, which is safe with several runners at once:
+
+- per-restaurant updates are single HSETs, so two scrapes never overwrite
+  each other's restaurants;
+- each page is scraped under a lease (SET NX PX) so only one runner works
+  on it at a time, and a crashed runner's lease simply expires;
+- the weekly reset and the sent marker change by compare-and-set
+  (WATCH/MULTI/EXEC), so two senders cannot both mark the day as theirs.
+
+It speaks RESP directly over a socket, so no Redis client library is needed,
+and anything that implements the same commands works as a server.
+"""
+import json
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+class StateBackend:
+    """Interface the scrape and send phases use for shared state."""
+
+    def load_cache(self) -> dict:
+        """Current state as a menu_cache.json-shaped dict."""
+        raise NotImplementedError
+
+    def reset_week(self, cache: dict, week_start: str) -> dict:
+        """Start a new week unless another runner already did; returns the resulting state."""
+        raise NotImplementedError
+
+    def update_restaurant(self, cache: dict, name: str):
+        """Persist cache['restaurants'][name] without touching other restaurants."""
+        raise NotImplementedError
+
+    def get_sent(self, marker: str = "sent_date") -> str | None:
+        """Current value of a sent marker, read fresh from the store."""
+        return self.load_cache().get(marker)
+
+    def compare_and_set_sent(self, cache: dict, previous: str | None, new: str, marker: str = "sent_date") -> bool:
+        """Set the sent marker to `new` only if it still equals `previous`.
+
+        Each tenant has its own marker (see tenants.sent_marker).
+        """
+        raise NotImplementedError
+
+    def acquire_lease(self, name: str, ttl_seconds: float) -> str | None:
+        """Take the named lease for ttl_seconds. Returns a token, or None if someone else holds it."""
+        raise NotImplementedError
+
+    def release_lease(self, name: str, token: str):
+        """Give up a lease, if it is still ours."""
+        raise NotImplementedError
+
+    @contextmanager
+    def lease(self, name: str, ttl_seconds: float):
+        """Context manager around acquire_lease/release_lease; yields whether it was acquired."""
+        token = self.acquire_lease(name, ttl_seconds)
+        try:
+            yield token is not None
+        finally:
+            if token is not None:
+                self.release_lease(name, token)
+
+
+class RedisError(Exception):
+    """Error reply from the server."""
+
+
+class RespClient:
+    """Minimal Redis protocol (RESP2) client: one connection, one command at a time.
+
+    Commands from several threads (the concurrent page fetch) are serialised
+    by a lock; a WATCH/MULTI/EXEC sequence is not, and must stay on one thread.
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._file = self._sock.makefile("rb")
+        if self.password:
+            self._command("AUTH", self.password)
+        if self.db:
+            self._command("SELECT", self.db)
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+
+    def _read_reply(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._file.read(length + 2)[:-2]
+            return data.decode("utf-8")
+        if kind == b"*":
+            count = int(payload)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def _command(self, *args):
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(out))
+        return self._read_reply()
+
+    def execute(self, *args):
+        """Send one command and return its decoded reply. Reconnects once on a dropped connection."""
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            try:
+                return self._command(*args)
+            except (ConnectionError, OSError):
+                self.close()
+                self._connect()
+                return self._command(*args)
+
+
+class RedisStateBackend(StateBackend):
+    """State in Redis under `prefix`:
+
+    <prefix>:week_start   ISO date of the current week
+    <prefix>:restaurants  hash: restaurant name -> JSON record
+    <prefix>:sent_date    ISO date of the last successful Slack post
+                          (<prefix>:sent_date:<tenant> for named tenants)
+    <prefix>:lease:<name> lease token, with a TTL
+    """
+
+    def __init__(self, url: str, prefix: str = "gablec"):
+        self.client = RespClient(url)
+        self.prefix = prefix
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    def load_cache(self) -> dict:
+        flat = self.client.execute("HGETALL", self._key("restaurants")) or []
+        restaurants = {flat[i]: json.loads(flat[i + 1]) for i in range(0, len(flat), 2)}
+        cache = {
+            "week_start": self.client.execute("GET", self._key("week_start")),
+            "restaurants": restaurants,
+        }
+        for marker in ["sent_date", *self._tenant_markers()]:
+            sent_date = self.client.execute("GET", self._key(marker))
+            if sent_date:
+                cache[marker] = sent_date
+        return cache
+
+    def _tenant_markers(self) -> list:
+        """Names of the sent_date:<tenant> markers in the store, found with SCAN."""
+        pattern, cursor, markers = self._key("sent_date:*"), "0", []
+        while True:
+            cursor, keys = self.client.execute("SCAN", cursor, "MATCH", pattern, "COUNT", 100)
+            markers.extend(key[len(self.prefix) + 1:] for key in keys)
+            if cursor == "0":
+                return sorted(set(markers))
+
+    def _compare_and_set(self, key: str, expected: str | None, new: str, also_delete: tuple = ()) -> bool:
+        """Optimistic transaction: SET key=new (and DEL also_delete) iff key still equals expected."""
+        self.client.execute("WATCH", key)
+        if self.client.execute("GET", key) != expected:
+            self.client.execute("UNWATCH")
+            return False
+        self.client.execute("MULTI")
+        self.client.execute("SET", key, new)
+        for other in also_delete:
+            self.client.execute("DEL", other)
+        return self.client.execute("EXEC") is not None
+
+    def reset_week(self, cache: dict, week_start: str) -> dict:
+        key = self._key("week_start")
+        self._compare_and_set(key, cache.get("week_start"), week_start, also_delete=(self._key("restaurants"),))
+        # Whether we reset or another runner beat us to it, the shared state is now the new week.
+        return self.load_cache()
+
+    def update_restaurant(self, cache: dict, name: str):
+        self.client.execute("HSET", self._key("restaurants"), name,
+                            json.dumps(cache["restaurants"][name], ensure_ascii=False))
+        if cache.get("week_start"):
+            self.client.execute("SET", self._key("week_start"), cache["week_start"], "NX")
+
+    def get_sent(self, marker: str = "sent_date") -> str | None:
+        return self.client.execute("GET", self._key(marker))
+
+    def compare_and_set_sent(self, cache: dict, previous: str | None, new: str, marker: str = "sent_date") -> bool:
+        if not self._compare_and_set(self._key(marker), previous, new):
+            return False
+        cache[marker] = new
+        return True
+
+    def acquire_lease(self, name: str, ttl_seconds: float) -> str | None:
+        token = uuid.uuid4().hex
+        ok = self.client.execute("SET", self._key(f"lease:{name}"), token, "NX", "PX", int(ttl_seconds * 1000))
+        return token if ok == "OK" else None
+
+    def release_lease(self, name: str, token: str):
+        key = self._key(f"lease:{name}")
+        self.client.execute("WATCH", key)
+        if self.client.execute("GET", key) != token:
+            self.client.execute("UNWATCH")
+            return
+        self.client.execute("MULTI")
+        self.client.execute("DEL", key)
+        self.client.execute("EXEC")
@@ -0,0 +1,332 @@
+"""Per-user restaurant subscriptions, delivered as personalised Slack DMs.
+
+Some people only care about one or two restaurants, or only about certain
+dishes. A subscription maps a Slack user to a restaurant (or "*" for any),
+optionally narrowed by dish keywords:
+
+    python subscriptions.py add U0123ABCD zaboky
+    python subscriptions.py add U0123ABCD "*" --keywords čobanac,grah
+    python subscriptions.py remove U0123ABCD zaboky
+    python subscriptions.py list
+
+The restaurant is given by its page URL or by part of its name ("zaboky"
+for 'Restoran-Catering Zaboky'), and is stored as the page URL, the key the
+scrape uses too. A name that matches no served page, or several, is
+rejected when the subscription is added.
+
+SubscriptionIndex keys the subscriptions by restaurant and by keyword, so
+fan_out() finds every user's matches in one pass over the day's ready menus:
+each restaurant name and each word of each item is looked up once, and no
+user's subscriptions are scanned per restaurant. Keywords match word
+prefixes, case- and diacritic-insensitively ("grah" matches "Grahom").
+
+send_dms() posts the DMs through a shared WebClient from a small thread
+pool. A RateLimiter spaces the calls to DM_RATE per second, and the SDK's
+rate-limit handler waits out any 429 Retry-After. dm_log records who got
+their DM each day, so a re-run never DMs anyone twice.
+
+The subscriptions are edited by people, so they live in subscriptions.json
+(repo root, or SUBSCRIPTIONS_FILE), committed with the change that edits
+them. dm_log is written by every send, so it lives in DM_LOG_DB, which the
+workflow keeps in the Actions cache with the other databases.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from urllib.parse import unquote
+
+from slack_sdk import WebClient
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
+
+from croatian import fold
+from slack_payload import post_payload
+
+
+SUBSCRIPTIONS_FILE = Path(os.getenv("SUBSCRIPTIONS_FILE", str(Path(__file__).parent.parent / "subscriptions.json")))
+DM_LOG_DB = Path(os.getenv("DM_LOG_DB", str(Path(__file__).parent.parent / "dm_log.sqlite")))
+SLACK_API_URL = os.getenv("SLACK_API_URL", WebClient.BASE_URL)
+DM_RATE = float(os.getenv("SLACK_DM_RATE", "4"))          # chat.postMessage calls per second
+DM_CONCURRENCY = int(os.getenv("SLACK_DM_CONCURRENCY", "4"))
+ANY_RESTAURANT = "*"
+MIN_KEYWORD = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dm_log (
+    day TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    sent_at TEXT NOT NULL,
+    PRIMARY KEY (day, user_id)
+);
+"""
+
+
+def _words(text: str) -> list:
+    return "".join(c if c.isalnum() else " " for c in fold(text)).split()
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    """Open (and if needed create) the DM log database."""
+    conn = sqlite3.connect(path or DM_LOG_DB)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def load_subscriptions(path: Path | None = None) -> list:
+    """subscriptions.json as [{"user_id", "restaurant", "keywords"}]; [] without the file."""
+    path = path or SUBSCRIPTIONS_FILE
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_subscriptions(rows: list, path: Path | None = None):
+    rows = sorted(rows, key=lambda r: (r["user_id"], r["restaurant"]))
+    with open(path or SUBSCRIPTIONS_FILE, "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def has_subscriptions(path: Path | None = None) -> bool:
+    """Whether anyone is subscribed."""
+    return bool(load_subscriptions(path))
+
+
+def resolve_restaurant(restaurant: str, pages: dict) -> str:
+    """The page URL a subscription to `restaurant` is for ("*" stays "*").
+
+    pages is {page_url: display name} of every served page; `restaurant` is
+    one of those URLs or part of a name or URL, compared without case or
+    diacritics. Raises ValueError when no page or more than one matches.
+    """
+    if restaurant == ANY_RESTAURANT or restaurant in pages:
+        return restaurant
+    query = fold(restaurant).strip()
+    matches = [url for url, name in pages.items() if query and (query in fold(name) or query in fold(unquote(url)))]
+    if len(matches) != 1:
+        found = ", ".join(pages[url] for url in matches) if matches else "no served restaurant"
+        raise ValueError(f"'{restaurant}' must name exactly one restaurant, it matches {found}")
+    return matches[0]
+
+
+def subscribe(user_id: str, restaurant: str, pages: dict, keywords: list | None = None,
+              path: Path | None = None) -> str:
+    """Add or replace a user's subscription to one restaurant ("*" = any restaurant); returns its key.
+
+    The restaurant is resolved against pages ({page_url: display name}, see
+    resolve_restaurant). Raises ValueError for a restaurant that does not
+    resolve, a "*" subscription without keywords (that is the channel
+    message) or keywords shorter than MIN_KEYWORD characters.
+    """
+    key = resolve_restaurant(restaurant, pages)
+    keywords = [w for k in keywords or [] for w in _words(k)]
+    if key == ANY_RESTAURANT and not keywords:
+        raise ValueError("A subscription to every restaurant needs at least one keyword")
+    if any(len(k) < MIN_KEYWORD for k in keywords):
+        raise ValueError(f"Keywords need at least {MIN_KEYWORD} characters: {keywords}")
+    rows = [r for r in load_subscriptions(path) if (r["user_id"], r["restaurant"]) != (user_id, key)]
+    rows.append({"user_id": user_id, "restaurant": key, "keywords": keywords})
+    _save_subscriptions(rows, path)
+    return key
+
+
+def unsubscribe(user_id: str, restaurant: str | None = None, pages: dict | None = None,
+                path: Path | None = None) -> int:
+    """Remove one subscription, or all of the user's. Returns how many were removed.
+
+    A subscription's stored page URL always works; a name is resolved
+    against pages, like subscribe does.
+    """
+    rows = load_subscriptions(path)
+    key = None
+    if restaurant is not None:
+        stored = {r["restaurant"] for r in rows if r["user_id"] == user_id}
+        key = restaurant if restaurant in stored else resolve_restaurant(restaurant, pages or {})
+    kept = [r for r in rows if r["user_id"] != user_id or (key is not None and r["restaurant"] != key)]
+    if len(kept) != len(rows):
+        _save_subscriptions(kept, path)
+    return len(rows) - len(kept)
+
+
+class SubscriptionIndex:
+    """Subscriptions keyed for fan-out: by page URL, and by keyword within a page."""
+
+    def __init__(self, rows):
+        self.whole = {}        # page_url -> users who want its whole menu
+        self.keyword = {}      # page_url ("*" = any) -> {keyword: users}
+        self.restaurants_of = {}
+        for row in rows:
+            user_id, restaurant = row["user_id"], row["restaurant"]
+            if row["keywords"]:
+                for kw in row["keywords"]:
+                    self.keyword.setdefault(restaurant, {}).setdefault(kw, []).append(user_id)
+            else:
+                self.whole.setdefault(restaurant, []).append(user_id)
+            self.restaurants_of.setdefault(user_id, set()).add(restaurant)
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "SubscriptionIndex":
+        return cls(load_subscriptions(path))
+
+    def __len__(self) -> int:
+        return len(self.restaurants_of)
+
+    def fan_out(self, lunch: dict) -> dict:
+        """Each matched user's own today_lunch, in one pass over `lunch`.
+
+        Returns {user_id: {display_name: {"restaurant", "items", "facebook_url"}}}
+        with only the restaurants and items the user follows.
+        """
+        matches = {}
+        any_kw = self.keyword.get(ANY_RESTAURANT, {})
+        for name, info in lunch.items():
+            if not info["items"]:
+                continue
+            key = info["facebook_url"]
+            for user_id in self.whole.get(key, ()):
+                matches.setdefault(user_id, {})[name] = list(info["items"])
+            own_kw = self.keyword.get(key, {})
+            if not own_kw and not any_kw:
+                continue
+            for item in info["items"]:
+                users = set()
+                for word in _words(item):
+                    for end in range(MIN_KEYWORD, len(word) + 1):
+                        users.update(own_kw.get(word[:end], ()))
+                        users.update(any_kw.get(word[:end], ()))
+                for user_id in users:
+                    items = matches.setdefault(user_id, {}).setdefault(name, [])
+                    if item not in items:
+                        items.append(item)
+        return {user_id: {name: {**lunch[name], "items": items} for name, items in found.items()}
+                for user_id, found in matches.items()}
+
+    def is_ready(self, user_id: str, lunch: dict) -> bool:
+        """Send #1 rule per user: every restaurant the user follows has today's menu.
+
+        A "*" subscription follows every restaurant, so it waits for the
+        complete menu like the channel message. A followed page that is no
+        longer served is never ready, so that user gets the deadline send.
+        """
+        ready = {info["facebook_url"] for info in lunch.values() if info["items"]}
+        named = self.restaurants_of.get(user_id, set()) - {ANY_RESTAURANT}
+        if ANY_RESTAURANT in self.restaurants_of.get(user_id, set()):
+            named = {info["facebook_url"] for info in lunch.values()}
+        return all(page_url in ready for page_url in named)
+
+
+class RateLimiter:
+    """Spaces calls `1 / rate` seconds apart across threads."""
+
+    def __init__(self, rate: float, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / rate
+        self.clock, self.sleep = clock, sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            self.sleep(slot - now)
+
+
+class _ThrottledClient:
+    """The subset of WebClient post_payload uses, with every call going through a RateLimiter."""
+
+    def __init__(self, client: WebClient, limiter: RateLimiter):
+        self.client, self.limiter = client, limiter
+
+    def chat_postMessage(self, **kwargs):
+        self.limiter.acquire()
+        return self.client.chat_postMessage(**kwargs)
+
+
+def already_sent(day: date, path: Path | None = None) -> set:
+    """Users who got their DM for `day`."""
+    conn = connect(path)
+    users = {row[0] for row in conn.execute("SELECT user_id FROM dm_log WHERE day = ?", (day.isoformat(),))}
+    conn.close()
+    return users
+
+
+def send_dms(records: dict, day: date, token: str, client: WebClient | None = None, rate: float | None = None,
+             concurrency: int | None = None, path: Path | None = None) -> dict:
+    """Post {user_id: payload record} as DMs, rate-limited and concurrent. Returns {user_id: ok}."""
+    client = client or WebClient(token=token, base_url=SLACK_API_URL)
+    if not any(isinstance(h, RateLimitErrorRetryHandler) for h in client.retry_handlers):
+        client.retry_handlers.append(RateLimitErrorRetryHandler(max_retry_count=3))
+    throttled = _ThrottledClient(client, RateLimiter(rate or DM_RATE))
+
+    def send_one(user_id: str) -> bool:
+        # Posting to a user ID delivers to the bot's DM with that user.
+        return post_payload(records[user_id], user_id, token, client=throttled)
+
+    with ThreadPoolExecutor(max_workers=concurrency or DM_CONCURRENCY) as pool:
+        results = dict(zip(records, pool.map(send_one, records)))
+
+    sent_at = datetime.now().astimezone().isoformat(timespec="seconds")
+    conn = connect(path)
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO dm_log(day, user_id, hash, sent_at) VALUES (?, ?, ?, ?)",
+                         [(day.isoformat(), u, records[u]["hash"], sent_at) for u, ok in results.items() if ok])
+    conn.close()
+    return results
+
+
+def served_pages() -> dict:
+    """{page_url: display name} of every page the bot serves, from its tenants and cache."""
+    # Imported here: gablec_daily builds API clients at import, which only the CLI needs.
+    import gablec_daily as gd
+    from tenants import all_pages
+    lunch = gd.build_today_lunch(gd.get_state_backend().load_cache(), date.today(), all_pages(gd.get_tenants()))
+    return {info["facebook_url"]: name for name, info in lunch.items()}
+
+
+def main(argv=None, pages: dict | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Gablec per-user subscriptions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_add = sub.add_parser("add", help="subscribe a Slack user to a restaurant ('*' = any)")
+    p_add.add_argument("user_id")
+    p_add.add_argument("restaurant", help="page URL or part of the restaurant's name")
+    p_add.add_argument("--keywords", default="", help="comma-separated dish keywords")
+    p_remove = sub.add_parser("remove", help="unsubscribe (from every restaurant if none given)")
+    p_remove.add_argument("user_id")
+    p_remove.add_argument("restaurant", nargs="?")
+    sub.add_parser("list", help="show all subscriptions")
+    args = parser.parse_args(argv)
+
+    if args.command in ("add", "remove") and pages is None and args.restaurant not in (None, ANY_RESTAURANT):
+        pages = served_pages()
+    if args.command == "add":
+        try:
+            key = subscribe(args.user_id, args.restaurant, pages or {},
+                            [k for k in args.keywords.split(",") if k.strip()])
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        print(f"Subscribed {args.user_id} to {(pages or {}).get(key, key)} ({key})")
+    elif args.command == "remove":
+        try:
+            print(f"Removed {unsubscribe(args.user_id, args.restaurant, pages)} subscription(s)")
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+    else:
+        for row in load_subscriptions():
+            print(f"{row['user_id']:<14} {row['restaurant']:<30} {' '.join(row['keywords'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
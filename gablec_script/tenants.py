@@ -0,0 +1,71 @@
+"""Tenants: one bot serving several offices.
+
+Each tenant is an office with its own Slack channel and its own subset of
+restaurant pages; the same page may belong to several tenants. The scrape
+phase works on the union of all pages, so a shared restaurant is fetched and
+extracted once a day, and every tenant's send phase reads that shared result
+with its own readiness count and its own sent marker.
+
+tenants.json (repo root, or TENANTS_FILE):
+
+    [
+      {"name": "zabok", "channel": "#ponuda_gableca", "pages": ["https://www.facebook.com/mondozabok/", ...]},
+      {"name": "zagreb", "channel": "#rucak-zg", "pages": [...]}
+    ]
+
+Without the file there is a single tenant, "default", built from
+FACEBOOK_PAGES and SLACK_CHANNEL — the pre-tenant behaviour.
+"""
+import json
+import os
+from pathlib import Path
+
+
+TENANTS_FILE = Path(os.getenv("TENANTS_FILE", str(Path(__file__).parent.parent / "tenants.json")))
+DEFAULT_TENANT = "default"
+
+
+def load_tenants(default_pages: list | None, default_channel: str, path: Path | None = None) -> list:
+    """Tenants as [{"name", "channel", "pages"}], validated.
+
+    Raises ValueError on a malformed file: missing fields, no pages, or a
+    name or channel used twice (payloads and sent markers are per channel).
+    """
+    path = path or TENANTS_FILE
+    if not path.exists():
+        return [{"name": DEFAULT_TENANT, "channel": default_channel, "pages": default_pages}]
+
+    with open(path, "r", encoding="utf-8") as f:
+        tenants = json.load(f)
+    if not isinstance(tenants, list) or not tenants:
+        raise ValueError(f"{path}: expected a non-empty list of tenants")
+
+    names, channels = set(), set()
+    for tenant in tenants:
+        if not tenant.get("name") or not tenant.get("channel") or not tenant.get("pages"):
+            raise ValueError(f"{path}: every tenant needs a name, a channel and at least one page: {tenant}")
+        if tenant["name"] in names or tenant["channel"] in channels:
+            raise ValueError(f"{path}: duplicate tenant name or channel: {tenant['name']} / {tenant['channel']}")
+        names.add(tenant["name"])
+        channels.add(tenant["channel"])
+    return tenants
+
+
+def get_tenant(tenants: list, name: str | None) -> dict:
+    """The tenant called `name` (the first tenant when name is None)."""
+    if name is None:
+        return tenants[0]
+    for tenant in tenants:
+        if tenant["name"] == name:
+            return tenant
+    raise ValueError(f"Unknown tenant: {name}")
+
+
+def all_pages(tenants: list) -> list:
+    """Every tenant's pages, each once, in first-seen order."""
+    return list(dict.fromkeys(page for tenant in tenants for page in tenant["pages"]))
+
+
+def sent_marker(tenant: dict) -> str:
+    """Cache key of the tenant's sent marker; the default tenant keeps the original 'sent_date'."""
+    return "sent_date" if tenant["name"] == DEFAULT_TENANT else f"sent_date:{tenant['name']}"
@@ -2,6 +2,8 @@ import os
 import sys
 from pathlib import Path
 
+import pytest
+
 # Provide dummy credentials so importing gablec_daily (which builds API
 # clients at module load) does not require a real .env. load_dotenv uses
 # override=False, so a real local .env still wins when present.
@@ -11,3 +13,37 @@ os.environ.setdefault("SLACK_BOT_TOKEN", "test-slack")
 
 # gablec_daily.py is a standalone module inside gablec_script/, not a package.
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "gablec_script"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_state_files(tmp_path, monkeypatch):
+    """Keep tests away from every state file the bot writes next to the repo."""
+    import delivery_slo
+    import gablec_daily
+    import menu_history
+    import post_sources
+    import proxy_sessions
+    import slack_payload
+    import subscriptions
+    import scrape_archive
+    import tenants
+    monkeypatch.setattr(menu_history, "HISTORY_DB", tmp_path / "menu_history.sqlite")
+    monkeypatch.setattr(slack_payload, "PAYLOAD_FILE", tmp_path / "slack_payloads.json")
+    monkeypatch.setattr(scrape_archive, "ARCHIVE_DIR", tmp_path / "scrape_archive")
+    monkeypatch.setattr(tenants, "TENANTS_FILE", tmp_path / "tenants.json")
+    monkeypatch.setattr(proxy_sessions, "PROXY_SESSIONS_FILE", tmp_path / "proxy_sessions.json")
+    monkeypatch.setattr(gablec_daily, "_session_pool", None)
+    monkeypatch.setattr(post_sources, "SOURCES_FILE", tmp_path / "sources.json")
+    monkeypatch.setattr(gablec_daily, "_source_config", None)
+    monkeypatch.setattr(delivery_slo, "SLO_DB", tmp_path / "delivery_slo.sqlite")
+    monkeypatch.setattr(subscriptions, "SUBSCRIPTIONS_FILE", tmp_path / "subscriptions.json")
+    monkeypatch.setattr(subscriptions, "DM_LOG_DB", tmp_path / "dm_log.sqlite")
+
+
+@pytest.fixture
+def make_post():
+    """Factory for scraped posts in the shape fetch_posts returns (images given as bytes)."""
+    def make(text="Marenda: juha", images=(), posted="2026-06-01T07:30:00+02:00", page_name="p", post_url="u"):
+        return {"page_name": page_name, "text": text, "posted_at_local": posted, "post_url": post_url,
+                "images": [{"bytes": b, "mime": "image/jpeg"} for b in images]}
+    return make
@@ -0,0 +1,85 @@
+import json
+import threading
+import types
+import httpx
+import pytest
+import apify_webhooks as aw
+import gablec_daily as gd
+from datetime import date, datetime
+
+
+MONDAY = date(2026, 6, 1)
+
+
+@pytest.fixture
+def receiver():
+    r = aw.WebhookReceiver("s3cret", host="127.0.0.1", port=0)
+    r.start()
+    yield r
+    r.stop()
+
+
+def _deliver(spec, event_type, run_id, dataset_id):
+    """What Apify does when the run finishes: render the payload template and POST it."""
+    body = (spec["payload_template"]
+            .replace("{{eventType}}", json.dumps(event_type))
+            .replace("{{resource}}", json.dumps({"id": run_id, "defaultDatasetId": dataset_id})))
+    return httpx.post(spec["request_url"], content=body, timeout=5)
+
+
+def test_receiver_queues_events_and_rejects_bad_requests(receiver):
+    spec = aw.webhook_spec(receiver.request_url(), "https://a/")
+    assert spec["request_url"] == f"http://127.0.0.1:{receiver.port}/apify?token=s3cret"
+    assert _deliver(spec, aw.SUCCEEDED, "run1", "ds1").status_code == 200
+    assert receiver.next_event(1) == {"page_url": "https://a/", "event_type": aw.SUCCEEDED,
+                                      "run_id": "run1", "dataset_id": "ds1"}
+
+    wrong_token = dict(spec, request_url=spec["request_url"].replace("s3cret", "guess"))
+    assert _deliver(wrong_token, aw.SUCCEEDED, "run2", "ds2").status_code == 403
+    assert httpx.post(spec["request_url"], content=b"not json").status_code == 400
+    assert receiver.next_event(0.1) is None
+
+
+def test_each_restaurant_is_extracted_as_its_run_finishes(monkeypatch):
+    datasets = {"ds-a": [{"text": "Marenda"}], "ds-b1": [], "ds-b2": [{"text": "Gablec"}]}
+    outcomes = {"https://a/": ["ds-a"], "https://b/": ["ds-b1", "ds-b2"], "https://c/": []}
+    started = []
+
+    class _Actor:
+        def start(self, run_input, webhooks):
+            page_url = run_input["startUrls"][0]["url"]
+            run_id = f"run{len(started)}"
+            started.append(page_url)
+            if outcomes[page_url]:    # c's run never reports back
+                dataset_id = outcomes[page_url].pop(0)
+                def finish():
+                    _deliver(webhooks[0], aw.SUCCEEDED, run_id, dataset_id)
+                    _deliver(webhooks[0], aw.SUCCEEDED, run_id, dataset_id)   # redelivery
+                threading.Timer(0.05, finish).start()
+            return types.SimpleNamespace(id=run_id)
+
+    aborted = []
+    client = types.SimpleNamespace(actor=lambda name: _Actor(), dataset=lambda dataset_id: dataset_id,
+                                   run=lambda run_id: types.SimpleNamespace(abort=lambda: aborted.append(run_id)))
+    monkeypatch.setattr(gd, "client_apify", client)
+    monkeypatch.setattr(gd, "posts_from_dataset", lambda dataset_id, page_url: datasets[dataset_id])
+    monkeypatch.setattr(gd, "WEBHOOK_PORT", 0)
+    monkeypatch.setattr(gd, "WEBHOOK_TIMEOUT", 1)
+    extracted = []
+    monkeypatch.setattr(gd, "_extract_and_store",
+                        lambda page_url, posts, today, now, cache: extracted.append((page_url, posts)))
+
+    gd._scrape_via_webhooks(["https://a/", "https://b/", "https://c/"], MONDAY, MONDAY,
+                            datetime(2026, 6, 1, 7, 0), {"restaurants": {}})
+
+    assert sorted(started) == ["https://a/", "https://b/", "https://b/", "https://c/"]
+    assert sorted(extracted) == [("https://a/", [{"text": "Marenda"}]), ("https://b/", [{"text": "Gablec"}])]
+    assert aborted == ["run2"]   # c's run was still going when the wait timed out
+
+
+def test_webhook_mode_without_a_public_url_waits_on_runs(monkeypatch):
+    monkeypatch.setattr(gd, "APIFY_INGEST", "webhook")
+    monkeypatch.setattr(gd, "WEBHOOK_PUBLIC_URL", "")
+    assert gd._ingest_mode() == "call"
+    monkeypatch.setattr(gd, "WEBHOOK_PUBLIC_URL", "https://gablec.example.org")
+    assert gd._ingest_mode() == "webhook"
@@ -0,0 +1,125 @@
+import json
+import types
+import pytest
+import batch_prefetch as bp
+import gablec_daily as gd
+from datetime import date, datetime
+from google.genai.types import JobState
+
+
+SUNDAY_EVENING = datetime(2026, 5, 31, 19, 0, tzinfo=gd.TZ)
+SUNDAY_POST = "2026-05-31T18:00:00+02:00"
+WEEKLY_TEXT = "Tjedni meni\nPONEDJELJAK 1.6.\n- Varivo s mesom (8,00 €)\nUtorak:\n• Čobanac 7,80 EUR\n"
+
+
+class _Batches:
+    def __init__(self, answers, states):
+        self.answers, self.states, self.created, self.cancelled = answers, list(states), [], []
+
+    def create(self, model, src, config):
+        self.created.append((model, src, config))
+        return types.SimpleNamespace(name="batches/1")
+
+    def cancel(self, name):
+        self.cancelled.append(name)
+
+    def get(self, name):
+        state = self.states.pop(0)
+        # Answers are keyed by restaurant and come back in reverse request order.
+        requests = self.created[0][1] if self.created else []
+        responses = []
+        for request in reversed(requests):
+            answer = self.answers.get(request["metadata"]["restaurant"])
+            if answer is not None:
+                responses.append(types.SimpleNamespace(response=types.SimpleNamespace(text=json.dumps(answer)),
+                                                       error=None, metadata=request["metadata"]))
+        return types.SimpleNamespace(name=name, state=state, error=None,
+                                     dest=types.SimpleNamespace(inlined_responses=responses))
+
+
+@pytest.fixture
+def prefetch(monkeypatch, tmp_path, make_post):
+    monkeypatch.setattr(gd, "CACHE_FILE", tmp_path / "menu_cache.json")
+    monkeypatch.setattr(gd, "_state_backend", None)
+    monkeypatch.setattr(gd, "FACEBOOK_PAGES", ["https://a/", "https://b/"])
+    monkeypatch.setattr(bp, "PREFETCH_POLL_SECONDS", 0)
+    posts = {"https://a/": [make_post(WEEKLY_TEXT, posted=SUNDAY_POST, page_name="A")],
+             "https://b/": [make_post("Jelovnik za ovaj tjedan", [b"menu"], SUNDAY_POST, page_name="B")],
+             "https://c/": [make_post("Novi tjedni meni!", [b"menu-c"], SUNDAY_POST, page_name="C")]}
+    monkeypatch.setattr(gd, "fetch_facebook_posts", lambda url, since: posts[url])
+
+    def install(answers, states):
+        batches = _Batches(answers, states)
+        monkeypatch.setattr(gd, "client_gemini", types.SimpleNamespace(batches=batches))
+        return batches
+    return install
+
+
+def test_next_weekday():
+    assert bp.next_weekday(SUNDAY_EVENING) == date(2026, 6, 1)
+    assert bp.next_weekday(datetime(2026, 6, 5, 19, 0)) == date(2026, 6, 8)
+    assert bp.next_weekday(datetime(2026, 6, 2, 19, 0)) == date(2026, 6, 3)
+
+
+def test_prefetch_batches_only_what_the_fast_path_cannot_parse(prefetch):
+    batches = prefetch({"B": {"menu_type": "weekly", "menus": {"2026-06-01": ["Grah"]}}},
+                       [JobState.JOB_STATE_RUNNING, JobState.JOB_STATE_SUCCEEDED])
+
+    assert bp.run_prefetch(SUNDAY_EVENING) == 2
+
+    ((model, src, config),) = batches.created
+    assert model == bp.PREFETCH_MODEL
+    assert [r["metadata"]["restaurant"] for r in src] == ["B"]
+    parts = src[0]["contents"][0]["parts"]
+    assert {"inline_data": {"mime_type": "image/jpeg", "data": b"menu"}} in parts
+    # Today is still Sunday; the week the prompt lists is the one being prefetched.
+    assert "Današnji datum je 2026-05-31 (Nedjelja)." in parts[0]["text"]
+    assert "2026-06-01" in parts[0]["text"] and "2026-05-25" not in parts[0]["text"]
+    cache = gd.load_cache()
+    assert cache["week_start"] == "2026-06-01"
+    assert cache["restaurants"]["A"]["menus"]["2026-06-01"] == ["Varivo s mesom (8,00 €)"]
+    assert cache["restaurants"]["B"]["menus"] == {"2026-06-01": ["Grah"]}
+    # The morning scrape now has nothing left to do for Monday.
+    assert all(gd.has_today_menu(cache, p, date(2026, 6, 1)) for p in gd.FACEBOOK_PAGES)
+
+
+def test_batch_results_are_matched_by_metadata(prefetch, monkeypatch):
+    monkeypatch.setattr(gd, "FACEBOOK_PAGES", ["https://a/", "https://b/", "https://c/"])
+    batches = prefetch({"B": {"menu_type": "weekly", "menus": {"2026-06-01": ["Grah"]}},
+                        "C": {"menu_type": "weekly", "menus": {"2026-06-01": ["Sarma"]}}},
+                       [JobState.JOB_STATE_SUCCEEDED])
+
+    assert bp.run_prefetch(SUNDAY_EVENING) == 3
+    assert [r["metadata"]["restaurant"] for r in batches.created[0][1]] == ["B", "C"]
+    restaurants = gd.load_cache()["restaurants"]
+    assert restaurants["B"]["menus"] == {"2026-06-01": ["Grah"]}
+    assert restaurants["C"]["menus"] == {"2026-06-01": ["Sarma"]}
+
+
+def test_failed_batch_leaves_restaurant_for_the_morning(prefetch):
+    prefetch({}, [JobState.JOB_STATE_FAILED])
+    assert bp.run_prefetch(SUNDAY_EVENING) == 1
+    assert set(gd.load_cache()["restaurants"]) == {"A"}
+
+
+def test_batch_that_times_out_is_cancelled(prefetch, monkeypatch):
+    monkeypatch.setattr(bp, "PREFETCH_TIMEOUT", -1)
+    batches = prefetch({}, [JobState.JOB_STATE_RUNNING])
+    assert bp.run_prefetch(SUNDAY_EVENING) == 1
+    assert batches.cancelled == ["batches/1"]
+
+
+def test_friday_morning_prefetch_keeps_the_current_week(prefetch):
+    friday_morning = datetime(2026, 6, 5, 6, 0, tzinfo=gd.TZ)
+    cache = {"week_start": "2026-06-01", "restaurants": {"A": {"url": "https://a/", "menus": {"2026-06-05": ["Riba"]}}}}
+    gd.save_cache(cache)
+    batches = prefetch({}, [JobState.JOB_STATE_SUCCEEDED])
+
+    assert bp.run_prefetch(friday_morning) == 0
+    assert gd.load_cache()["restaurants"]["A"]["menus"] == {"2026-06-05": ["Riba"]}
+    assert not batches.created
+
+    # Once Friday's menus are out, the same run may start the next week.
+    gd.save_cache({**cache, "sent_date": "2026-06-05"})
+    bp.run_prefetch(datetime(2026, 6, 5, 19, 0, tzinfo=gd.TZ))
+    assert gd.load_cache()["week_start"] == "2026-06-08"
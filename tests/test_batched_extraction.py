@@ -0,0 +1,93 @@
+import json
+import types
+import gablec_daily as gd
+from datetime import date
+
+
+MONDAY = date(2026, 6, 1)
+
+
+class _FakeModels:
+    """Stands in for client_gemini.models; answers each call from a queue."""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def generate_content(self, model, contents):
+        self.calls.append(contents[0]["parts"])
+        return types.SimpleNamespace(text=self.answers.pop(0))
+
+
+def _install(monkeypatch, answers):
+    models = _FakeModels(answers)
+    monkeypatch.setattr(gd, "client_gemini", types.SimpleNamespace(models=models))
+    return models
+
+
+def _menu(day, *items):
+    return {"menu_type": "daily", "menus": {day: list(items)}}
+
+
+def test_plan_batches_respects_byte_and_count_budget(make_post):
+    restaurants = {
+        "A": [make_post("a")],
+        "B": [make_post("b", images=[b"x" * 900])],
+        "C": [make_post("c")],
+        "D": [make_post("d")],
+    }
+    # B alone nearly fills the budget, so it closes the first batch.
+    assert gd.plan_extraction_batches(restaurants, max_bytes=1000, max_restaurants=5) == [
+        ["A"], ["B"], ["C", "D"]]
+    assert gd.plan_extraction_batches(restaurants, max_bytes=10**6, max_restaurants=3) == [
+        ["A", "B", "C"], ["D"]]
+
+
+def test_batched_extraction_uses_one_request(monkeypatch, make_post):
+    answer = {"restaurants": {
+        "A": _menu("2026-06-01", "juha"),
+        "B": _menu("2026-06-01", "segedin"),
+        "C": {"menu_type": "none", "menus": {}},
+    }}
+    models = _install(monkeypatch, [json.dumps(answer)])
+
+    results = gd.ask_gemini_for_weekly_menus_batched(
+        {"A": [make_post("juha")], "B": [make_post("segedin")], "C": [make_post("event")]}, MONDAY)
+
+    assert len(models.calls) == 1
+    assert results["A"]["menus"]["2026-06-01"] == ["juha"]
+    assert results["B"]["menus"]["2026-06-01"] == ["segedin"]
+    assert results["C"]["menu_type"] == "none"
+
+
+def test_batched_extraction_falls_back_for_missing_restaurant(monkeypatch, make_post):
+    answer = {"restaurants": {"A": _menu("2026-06-01", "juha"), "B": "garbage"}}
+    models = _install(monkeypatch, [
+        "```json\n" + json.dumps(answer) + "\n```",
+        json.dumps(_menu("2026-06-01", "grah")),
+    ])
+
+    results = gd.ask_gemini_for_weekly_menus_batched(
+        {"A": [make_post("juha")], "B": [make_post("grah")]}, MONDAY)
+
+    assert len(models.calls) == 2
+    # The fallback request only carries B's posts.
+    fallback_text = " ".join(p.get("text", "") for p in models.calls[1])
+    assert "'B'" in fallback_text and "Tekst: juha" not in fallback_text
+    assert results["A"]["menus"]["2026-06-01"] == ["juha"]
+    assert results["B"]["menus"]["2026-06-01"] == ["grah"]
+
+
+def test_batched_extraction_falls_back_on_unparseable_answer(monkeypatch, make_post):
+    models = _install(monkeypatch, [
+        "not json",
+        json.dumps(_menu("2026-06-01", "a1")),
+        json.dumps(_menu("2026-06-01", "b1")),
+    ])
+
+    results = gd.ask_gemini_for_weekly_menus_batched(
+        {"A": [make_post("a")], "B": [make_post("b")]}, MONDAY)
+
+    assert len(models.calls) == 3
+    assert results["A"]["menus"]["2026-06-01"] == ["a1"]
+    assert results["B"]["menus"]["2026-06-01"] == ["b1"]
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import time
+import types
+import gablec_daily as gd
+from datetime import date
+from google.genai.errors import ServerError
+
+
+MONDAY = date(2026, 6, 1)
+MENU = json.dumps({"menu_type": "daily", "menus": {"2026-06-01": ["juha"]}})
+
+
+class _FakeAioModels:
+    """Stands in for client_gemini.aio.models. `behaviour` maps model -> (delay, text | Exception)."""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content(self, model, contents):
+        self.calls.append(model)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay, outcome = self.behaviour[model]
+            await asyncio.sleep(delay)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return types.SimpleNamespace(text=outcome)
+        finally:
+            self.in_flight -= 1
+
+
+def _install(monkeypatch, behaviour):
+    models = _FakeAioModels(behaviour)
+    monkeypatch.setattr(gd, "client_gemini", types.SimpleNamespace(aio=types.SimpleNamespace(models=models)))
+    monkeypatch.setattr(gd, "GEMINI_MODELS", ["m1", "m2", "m3"])
+    return models
+
+
+def _overloaded():
+    return ServerError(503, {"error": {"code": 503, "message": "overloaded", "status": "UNAVAILABLE"}})
+
+
+def test_falls_through_chain_on_failure_without_hedging(monkeypatch, make_post):
+    models = _install(monkeypatch, {"m1": (0, _overloaded()), "m2": (0, "not json"), "m3": (0, MENU)})
+    result = asyncio.run(gd.aask_gemini_for_weekly_menu("A", [make_post()], MONDAY, hedge_after=0))
+    assert models.calls == ["m1", "m2", "m3"]
+    assert result["menus"]["2026-06-01"] == ["juha"]
+
+
+def test_hedging_races_next_model_when_primary_is_slow(monkeypatch, make_post):
+    models = _install(monkeypatch, {"m1": (5, MENU), "m2": (0.01, MENU), "m3": (0, MENU)})
+    t0 = time.monotonic()
+    result = asyncio.run(gd.aask_gemini_for_weekly_menu("A", [make_post()], MONDAY, hedge_after=0.05))
+    assert time.monotonic() - t0 < 1
+    assert models.calls == ["m1", "m2"]
+    assert result["menu_type"] == "daily"
+
+
+def test_no_hedge_when_primary_answers_in_time(monkeypatch, make_post):
+    models = _install(monkeypatch, {"m1": (0.01, MENU), "m2": (0, MENU), "m3": (0, MENU)})
+    asyncio.run(gd.aask_gemini_for_weekly_menu("A", [make_post()], MONDAY, hedge_after=1))
+    assert models.calls == ["m1"]
+
+
+def test_all_models_failing_returns_empty_menu(monkeypatch, make_post):
+    _install(monkeypatch, {m: (0, _overloaded()) for m in ("m1", "m2", "m3")})
+    result = asyncio.run(gd.aask_gemini_for_weekly_menu("A", [make_post()], MONDAY, hedge_after=0))
+    assert result == {"menu_type": "none", "menus": {}}
+
+
+def test_extract_runs_restaurants_concurrently_under_semaphore(monkeypatch, make_post):
+    models = _install(monkeypatch, {"m1": (0.05, MENU), "m2": (0, MENU), "m3": (0, MENU)})
+    restaurants = {name: [make_post()] for name in "ABCDE"}
+
+    results = asyncio.run(gd.aextract_weekly_menus(restaurants, MONDAY, concurrency=2, hedge_after=0))
+
+    assert set(results) == set("ABCDE")
+    assert models.max_in_flight == 2
@@ -0,0 +1,80 @@
+from datetime import date, datetime
+
+import delivery_slo as slo
+import gablec_daily as gd
+import slack_payload as sp
+
+
+MONDAY = date(2026, 6, 1)
+
+
+def _at(day: date, hh: int, mm: int) -> datetime:
+    return datetime(day.year, day.month, day.day, hh, mm, tzinfo=slo.TZ)
+
+
+def test_ready_keeps_first_time_and_counts_scrape_attempts():
+    tuesday = date(2026, 6, 2)
+    slo.record_ready("https://a/", "A", ["2026-06-01", "2026-06-02"], _at(date(2026, 5, 31), 19, 0))  # prefetch
+    slo.record_scrape_run(_at(MONDAY, 7, 0))
+    slo.record_ready("https://b/", "B", ["2026-06-01"], _at(MONDAY, 7, 4))
+    slo.record_scrape_run(_at(MONDAY, 7, 40))
+    slo.record_ready("https://c/", "C", ["2026-05-29", "2026-06-01"], _at(MONDAY, 7, 50))   # past day ignored
+    slo.record_ready("https://b/", "B", ["2026-06-01"], _at(MONDAY, 7, 55))                 # already ready
+    slo.record_scrape_run(_at(tuesday, 7, 0))
+
+    conn = slo.connect()
+    rows = conn.execute("SELECT day, restaurant, ready_at, attempt FROM ready ORDER BY day, restaurant").fetchall()
+    conn.close()
+    assert rows == [
+        ("2026-06-01", "A", "2026-05-31T19:00:00+02:00", 0),
+        ("2026-06-01", "B", "2026-06-01T07:04:00+02:00", 1),
+        ("2026-06-01", "C", "2026-06-01T07:50:00+02:00", 2),
+        ("2026-06-02", "A", "2026-05-31T19:00:00+02:00", 0),
+    ]
+
+    report = slo.weekly_report(MONDAY, tuesday)["2026-06-01"]
+    assert report["ready"] == 4
+    assert (report["ttr_p50"], report["ttr_p95"]) == (0, 50)   # A was ready before both days' first run
+    assert report["ready_by_target"] == 1.0 and report["first_attempt"] == 0.75
+    assert report["per_restaurant"]["C"] == (1, 50, 50)
+
+
+def test_send_rates_and_incidents():
+    wednesday = date(2026, 6, 3)
+    # Monday: Send #1 complete at 08:00.
+    slo.record_send(MONDAY, "#lunch", _at(MONDAY, 8, 0), False, "post", 3, 3)
+    slo.record_send(MONDAY, "#lunch", _at(MONDAY, 9, 30), True, "skip_sent", 3, 3)
+    # Tuesday: deferred, then posted partial at the deadline.
+    tuesday = date(2026, 6, 2)
+    slo.record_send(tuesday, "#lunch", _at(tuesday, 8, 0), False, "defer", 2, 3)
+    slo.record_send(tuesday, "#lunch", _at(tuesday, 9, 31), True, "post", 2, 3)
+    # Wednesday: nothing ready at the deadline.
+    slo.record_send(wednesday, "#lunch", _at(wednesday, 8, 0), False, "defer", 0, 3)
+    slo.record_send(wednesday, "#lunch", _at(wednesday, 9, 30), True, "skip_empty", 0, 3)
+
+    report = slo.weekly_report(MONDAY, wednesday)["2026-06-01"]
+    assert (report["send1_days"], report["send1_complete"]) == (3, 1 / 3)
+    assert (report["deadline_days"], report["deadline_hit"]) == (3, 1 / 3)   # Tuesday's post came at 09:31
+    assert (report["empty_sends"], report["failed_sends"]) == (1, 0)
+    assert report["ready"] == 0 and report["ready_by_target"] is None
+
+
+def test_bot_records_scrapes_stores_and_sends(monkeypatch, tmp_path):
+    monkeypatch.setattr(gd, "CACHE_FILE", tmp_path / "menu_cache.json")
+    monkeypatch.setattr(gd, "_state_backend", None)
+    today = datetime.now(gd.TZ).date()
+    cache = {"week_start": gd.get_week_start(today).isoformat(), "restaurants": {}}
+    gd.store_result(cache, "A", "https://a/", datetime.now(gd.TZ),
+                     {"menu_type": "daily", "menus": {today.isoformat(): ["Grah"], "2099-01-01": []}})
+
+    sp.save_payloads({"week_start": "2026-06-01", "days": {"2026-06-01": {"#lunch": {
+        "hash": "h", "ready_count": 1, "total": 2, "text": "t", "blocks": [], "thread": []}}}})
+    monkeypatch.setattr(sp, "post_payload", lambda record, channel, token: False)
+    sp.send_precompiled(False, MONDAY, "#lunch", "tok")
+    sp.send_precompiled(True, MONDAY, "#lunch", "tok")
+
+    conn = slo.connect()
+    assert conn.execute("SELECT day, restaurant FROM ready").fetchall() == [(today.isoformat(), "A")]
+    assert conn.execute("SELECT final, action, ready, total FROM sends ORDER BY rowid").fetchall() == [
+        (0, "defer", 1, 2), (1, "failed", 1, 2)]
+    conn.close()
@@ -0,0 +1,110 @@
+from datetime import date
+
+import fast_path as fp
+from post_filter import filter_posts
+
+
+MONDAY = date(2026, 6, 1)
+MON_MORNING = "2026-06-01T07:30:00+02:00"
+
+
+def test_inline_daily_header_is_confident():
+    result, confidence = fp.parse_text_menu("Marenda: juha, segedin", MON_MORNING, MONDAY)
+    assert result == {"menu_type": "daily", "menus": {"2026-06-01": ["juha", "segedin"]}}
+    assert confidence >= fp.FAST_PATH_MIN_CONFIDENCE
+
+
+def test_weekly_list_with_day_headers_and_prices():
+    text = (
+        "Tjedni meni\n"
+        "PONEDJELJAK 1.6.\n"
+        "- Varivo s mesom (8,00 €)\n"
+        "- Svinjski bečki, riža, salata 8,90 €\n"
+        "Utorak:\n"
+        "• Čobanac 7,80 EUR\n"
+        "Cetvrtak\n"
+        "1. Lazanije, salata (8,90 E)\n"
+        "Dobar tek!\n"
+    )
+    result, confidence = fp.parse_text_menu(text, "2026-05-31T18:22:00+02:00", MONDAY)
+    assert result["menu_type"] == "weekly"
+    assert result["menus"] == {
+        "2026-06-01": ["Varivo s mesom (8,00 €)", "Svinjski bečki, riža, salata (8,90 €)"],
+        "2026-06-02": ["Čobanac (7,80 EUR)"],
+        "2026-06-04": ["Lazanije, salata (8,90 E)"],
+    }
+    assert confidence >= 0.9
+
+
+def test_bulleted_day_headers_keep_the_whole_dish():
+    result, confidence = fp.parse_text_menu("- Ponedjeljak: grah\n- Utorak: gulaš", MON_MORNING, MONDAY)
+    assert result["menus"] == {"2026-06-01": ["grah"], "2026-06-02": ["gulaš"]}
+    assert confidence >= 0.9
+
+
+def test_day_name_starting_a_sentence_is_not_a_header():
+    text = "Petak je rezerviran za zatvoreno društvo.\nHvala"
+    assert fp.parse_text_menu(text, MON_MORNING, MONDAY) == ({"menu_type": "none", "menus": {}}, 0.0)
+    assert fp.parse_text_menu("Ponedjeljak - Petak 11-15h\nGrah", MON_MORNING, MONDAY)[1] == 0
+
+
+def test_header_with_only_a_date_adds_no_item():
+    assert fp.parse_text_menu("Srijeda, 3.6.", MON_MORNING, MONDAY) == ({"menu_type": "none", "menus": {}}, 0.0)
+    result, _ = fp.parse_text_menu("Srijeda, 3.6.\nGrah", MON_MORNING, MONDAY)
+    assert result["menus"] == {"2026-06-03": ["Grah"]}
+
+
+def test_inline_list_keeps_decimal_comma_prices():
+    result, _ = fp.parse_text_menu("Marenda 2.6.: juha; segedin 7,50 €", MON_MORNING, MONDAY)
+    assert result["menus"] == {"2026-06-02": ["juha", "segedin (7,50 €)"]}
+
+
+def test_date_header_outside_this_week_is_not_confident():
+    result, confidence = fp.parse_text_menu("12.7.\nGrah s kobasicom", MON_MORNING, MONDAY)
+    assert confidence < fp.FAST_PATH_MIN_CONFIDENCE
+
+
+def test_afternoon_daily_post_is_not_pinned_to_today():
+    _, confidence = fp.parse_text_menu("Gablec: grah", "2026-06-01T17:00:00+02:00", MONDAY)
+    assert confidence < fp.FAST_PATH_MIN_CONFIDENCE
+
+
+def test_promotional_and_empty_posts_have_zero_confidence():
+    assert fp.parse_text_menu("Pozivamo vas na koncert u subotu! www.resto.hr", MON_MORNING, MONDAY)[1] == 0
+    assert fp.parse_text_menu(None, MON_MORNING, MONDAY)[1] == 0
+
+
+def test_fast_path_skips_llm_for_text_when_today_is_covered(make_post):
+    image_post = make_post("", images=[b"x"])
+    posts = [make_post("Marenda: juha, segedin"), make_post("Dođite nam i sutra!"), image_post]
+    result, llm_posts = fp.fast_path_extract(posts, MONDAY)
+    assert llm_posts == [image_post]     # a photo may still be the real menu
+    assert result["menus"]["2026-06-01"] == ["juha", "segedin"]
+    assert fp.fast_path_extract(posts[:2], MONDAY)[1] == []
+
+
+def test_header_followed_by_no_food_is_left_to_gemini(make_post):
+    wednesday = date(2026, 6, 3)
+    event = make_post("Srijeda: živa glazba od 20h, dođite!", posted="2026-06-03T10:00:00+02:00")
+    menu_photo = make_post("", images=[b"menu"], posted="2026-06-03T08:00:00+02:00")
+    posts = filter_posts([event, menu_photo], wednesday)
+    result, llm_posts = fp.fast_path_extract(posts, wednesday)
+    assert result["menus"] == {}
+    assert menu_photo["images"] in [p["images"] for p in llm_posts]
+
+    closed = "Danas: zatvoreno zbog privatne proslave!"
+    assert fp.parse_text_menu(closed, "2026-06-03T09:00:00+02:00", wednesday)[1] < fp.FAST_PATH_MIN_CONFIDENCE
+
+
+def test_fast_path_sends_image_posts_to_llm_when_today_missing(make_post):
+    image_post = make_post("Jelovnik za ovaj tjedan 👇", images=[b"x"])
+    result, llm_posts = fp.fast_path_extract([image_post], MONDAY)
+    assert llm_posts == [image_post]
+    assert result["menus"] == {}
+
+
+def test_merge_prefers_fast_path_dates():
+    fast = {"menu_type": "daily", "menus": {"2026-06-02": ["local"]}}
+    llm = {"menu_type": "weekly", "menus": {"2026-06-01": ["a"], "2026-06-02": ["b"]}}
+    merged = fp.merge_menu_results(fast, llm)
+    assert merged == {"menu_type": "weekly", "menus": {"2026-06-01": ["a"], "2026-06-02": ["local"]}}
@@ -0,0 +1,65 @@
+import time
+import pytest
+import menu_history as mh
+from datetime import date, timedelta
+
+
+def _cache(menus_a, menus_b=None):
+    restaurants = {"Zaboky": {"facebook_url": "https://a/", "menus": menus_a}}
+    if menus_b is not None:
+        restaurants["Grašo"] = {"facebook_url": "https://b/", "menus": menus_b}
+    return {"week_start": "2026-06-01", "restaurants": restaurants}
+
+
+@pytest.mark.parametrize("item,expected", [
+    ("Varivo s mesom i gljivama (8,00 E)", ("Varivo s mesom i gljivama", 800, "EUR")),
+    ("Čobanac 7,80 €", ("Čobanac", 780, "EUR")),
+    ("Pizza 32 cm, salata 9.5 EUR", ("Pizza 32 cm, salata", 950, "EUR")),
+    ("Grah 45 kn", ("Grah", 4500, "HRK")),
+    ("Juha", ("Juha", None, None)),
+])
+def test_split_price(item, expected):
+    assert mh.split_price(item) == expected
+
+
+def test_archive_week_is_idempotent():
+    cache = _cache({"2026-06-01": ["Segedin (7,50 E)", "Juha"]})
+    assert mh.archive_week(cache) == 2
+    assert mh.archive_week(cache) == 0
+
+
+def test_search_is_diacritic_insensitive_and_date_bounded():
+    mh.archive_week(_cache(
+        {"2026-03-02": ["Segedin s pire krumpirom (7,50 E)"], "2026-06-01": ["Čobanac (7,80 E)"]},
+        {"2026-06-02": ["Segedin (8,00 €)"]},
+    ))
+    assert mh.search("cobanac") == [("2026-06-01", "Zaboky", "Čobanac (7,80 E)")]
+    assert [r[1] for r in mh.search("segedin")] == ["Grašo", "Zaboky"]
+    assert [r[1] for r in mh.search("segedin", since=date(2026, 5, 1))] == ["Grašo"]
+    assert mh.search("   ") == []
+
+
+def test_price_stats_per_restaurant():
+    mh.archive_week(_cache(
+        {"2026-06-01": ["Grah (7,00 E)", "Segedin (9,00 E)", "Juha"]},
+        {"2026-06-01": ["Segedin (8,00 €)", "Stari grah 40 kn"]},
+    ))
+    assert mh.price_stats() == [("Grašo", 1, 800.0, 800, 800), ("Zaboky", 2, 800.0, 700, 900)]
+    assert mh.price_stats(match="segedin") == [("Grašo", 1, 800.0, 800, 800), ("Zaboky", 1, 900.0, 900, 900)]
+
+
+def test_queries_stay_fast_over_years_of_data():
+    start = date(2023, 1, 2)
+    menus = {}
+    for n in range(3 * 260):
+        day = (start + timedelta(days=n)).isoformat()
+        menus[day] = [f"Jelo {n % 40} s prilogom ({7 + n % 3},50 E)", "Segedin (8,00 E)" if n % 7 == 0 else "Juha"]
+    mh.archive_week({"restaurants": {f"R{i}": {"facebook_url": f"u{i}", "menus": menus} for i in range(5)}})
+
+    t0 = time.perf_counter()
+    rows = mh.search("segedin", since=date(2025, 1, 1))
+    stats = mh.price_stats()
+    elapsed = time.perf_counter() - t0
+
+    assert rows and len(stats) == 5
+    assert elapsed < 0.5
@@ -0,0 +1,78 @@
+import json
+import gablec_daily as gd
+import menu_items as mi
+
+
+def _cache():
+    return {
+        "week_start": "2026-06-01",
+        "sent_date": "2026-06-01",
+        "restaurants": {
+            "Zaboky": {"facebook_url": "https://a/", "menu_type": "weekly", "menus": {
+                "2026-06-01": ["Krem juha od brokule", "Čobanac (7,80 E)", "Oslić, blitva (9,50 E)"],
+                "2026-06-02": ["Krem juha od brokule", "Grah s kobasicom 7,20 €"],
+                "2026-06-03": [],
+            }},
+            "Grašo": {"facebook_url": "https://b/", "menu_type": "daily", "menus": {
+                "2026-06-01": ["Čobanac (7,80 E)", "Posna sarma, salata (6,90 €)", "Pizza (32 cm) - 9 EUR"],
+            }},
+        },
+    }
+
+
+def test_parse_item():
+    assert mi.parse_item("Oslić, blitva (9,50 E)") == {
+        "name": "Oslić, blitva", "price_cents": 950, "currency": "EUR", "tags": ["fish"]}
+    assert mi.parse_item("Krem juha od brokule")["tags"] == ["soup"]
+    assert mi.parse_item("Posna sarma, salata (6,90 €)")["tags"] == ["vegetarian", "salad"]
+
+
+def test_pack_roundtrip_is_lossless_and_interns_repeats():
+    cache = _cache()
+    packed = json.loads(json.dumps(mi.pack_cache(cache)))
+    assert mi.unpack_cache(packed) == cache
+    items = packed["items"]
+    assert items["strings"].count("Čobanac") == 1 and items["strings"].count("Krem juha od brokule") == 1
+    assert "menus" not in packed["restaurants"]["Grašo"]
+    assert packed["restaurants"]["Zaboky"]["menus"] == {"2026-06-03": []}
+    assert [r[2] for r in items["runs"]] == [3, 2, 3]
+
+
+def test_select_filters_on_columns():
+    table = mi.WeekTable.from_restaurants(_cache()["restaurants"])
+    cheap = table.select(max_price_cents=800, currency="EUR")
+    assert [(r["restaurant"], r["name"], r["price_cents"]) for r in cheap] == [
+        ("Zaboky", "Čobanac", 780), ("Zaboky", "Grah s kobasicom", 720),
+        ("Grašo", "Čobanac", 780), ("Grašo", "Posna sarma, salata", 690)]
+    assert [r["raw"] for r in table.select(day="2026-06-02", tag="soup")] == ["Krem juha od brokule"]
+    assert table.select(restaurant="Nobody") == []
+    assert table.select(day="2026-06-01", restaurant="Grašo")[2]["raw"] == "Pizza (32 cm) - 9 EUR"
+
+
+def test_price_mid_item_does_not_leak_to_unpriced_items():
+    table = mi.WeekTable.from_restaurants({"Zaboky": {"menus": {"2026-06-01": ["Gulaš 8,50 € s njokima", "Juha"]}}})
+    table = mi.WeekTable.from_json(json.loads(json.dumps(table.to_json())))
+    table.add("Zaboky", "2026-06-02", "Juha")
+    rows = table.select()
+    assert [(r["raw"], r["price_cents"]) for r in rows] == [
+        ("Gulaš 8,50 € s njokima", 850), ("Juha", None), ("Juha", None)]
+    assert [r["name"] for r in table.select(max_price_cents=900)] == ["Gulaš s njokima"]
+
+
+def test_cache_file_shrinks_and_old_files_still_load(monkeypatch, tmp_path):
+    monkeypatch.setattr(gd, "CACHE_FILE", tmp_path / "menu_cache.json")
+    week = ["Juha od rajčice", "Pohana piletina, pire krumpir, salata (8,50 €)", "Čobanac (7,80 E)",
+            "Tjestenina bolognese (7,90 €)", "Palačinke s čokoladom (3,50 €)"]
+    days = [f"2026-06-0{d}" for d in range(1, 6)]
+    cache = {"week_start": "2026-06-01", "restaurants": {
+        name: {"facebook_url": f"https://{name}/", "menu_type": "weekly", "menus": {d: list(week) for d in days}}
+        for name in ("a", "b", "c")}}
+
+    gd.save_cache(cache)
+    packed_size = gd.CACHE_FILE.stat().st_size
+    assert gd.load_cache() == cache
+    assert packed_size < len(json.dumps(cache, ensure_ascii=False, indent=2).encode()) / 3
+
+    gd.CACHE_FILE.write_text(json.dumps(cache, ensure_ascii=False, indent=2), encoding="utf-8")
+    assert gd.load_cache() == cache
+    assert len(mi.load_week_table(gd.CACHE_FILE)) == 75
@@ -0,0 +1,74 @@
+import io
+from datetime import date
+
+from PIL import Image
+
+import post_filter as pf
+
+
+MONDAY = date(2026, 6, 1)
+
+
+def test_menu_post_outscores_event_post(make_post):
+    menu = make_post("Marenda: juha, segedin 7,50 €")
+    event = make_post("Pozivamo vas na koncert u subotu, ulaznice na šanku!")
+    assert pf.score_post_relevance(menu, MONDAY) > pf.RELEVANCE_MIN_SCORE
+    assert pf.score_post_relevance(event, MONDAY) < pf.RELEVANCE_MIN_SCORE
+
+
+def test_last_weeks_posts_are_penalised(make_post):
+    fresh = make_post("", images=[b"img"], posted="2026-05-31T18:00:00+02:00")   # Sunday before
+    stale = make_post("", images=[b"img"], posted="2026-05-28T10:00:00+02:00")   # last Thursday
+    assert pf.score_post_relevance(fresh, MONDAY) > pf.score_post_relevance(stale, MONDAY)
+
+
+def test_exact_and_near_duplicate_text_is_dropped(make_post):
+    posts = [
+        make_post("Marenda: grah s kobasicom, pohana piletina i salata 8,50 €"),
+        make_post("marenda:  GRAH s kobasicom, pohana piletina i salata 8,50 €"),
+        make_post("Marenda: grah s kobasicom, pohana piletina i salata 8,50 € !!"),
+        make_post("Utorak: čobanac 7,80 €"),
+    ]
+    kept = pf.filter_posts(posts, MONDAY)
+    assert [p["text"] for p in kept] == [posts[0]["text"], posts[3]["text"]]
+
+
+def test_reposted_image_is_deduped_and_empty_post_dropped(make_post):
+    posts = [
+        make_post("Tjedni meni", images=[b"menu-photo"]),
+        make_post("", images=[b"menu-photo"]),                   # repost of the same photo
+        make_post("Tjedni meni", images=[b"menu-photo", b"new"]),  # same text, one new image
+    ]
+    kept = pf.filter_posts(posts, MONDAY)
+    assert len(kept) == 2
+    assert [img["bytes"] for img in kept[1]["images"]] == [b"new"]
+    assert kept[1]["text"] is None
+    assert posts[2]["images"][0]["bytes"] == b"menu-photo"  # input is not mutated
+
+
+def test_keeps_top_posts_in_original_order(make_post):
+    posts = [
+        make_post("Dobro jutro!"),
+        make_post("Jelovnik: juha, varivo, salata 8,00 € 9,00 € 7,00 €"),
+        make_post("Marenda: grah 8,00 €"),
+    ]
+    kept = pf.filter_posts(posts, MONDAY, max_posts=2)
+    assert [p["text"] for p in kept] == [posts[1]["text"], posts[2]["text"]]
+
+
+def test_dhash_matches_reencoded_image():
+    img = Image.new("L", (64, 64))
+    img.putdata([(x * 4 + y) % 256 for y in range(64) for x in range(64)])
+    png, jpg = io.BytesIO(), io.BytesIO()
+    img.save(png, "PNG")
+    img.resize((128, 128)).save(jpg, "JPEG", quality=70)
+
+    a = pf.image_fingerprint(png.getvalue())
+    b = pf.image_fingerprint(jpg.getvalue())
+    assert isinstance(a, int) and pf._same_image(a, b)
+    assert pf.image_fingerprint(b"not an image") == pf.image_fingerprint(b"not an image")
+
+
+def test_emoji_only_captions_do_not_break_the_filter(make_post):
+    posts = [make_post("🍲🍲", images=[b"a"]), make_post("😋😋😋", images=[b"b"]), make_post("🍲🍲", images=[b"a"])]
+    assert [p["text"] for p in pf.filter_posts(posts, MONDAY)] == ["🍲🍲", "😋😋😋"]
@@ -0,0 +1,166 @@
+import json
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+import httpx
+import pytest
+
+import gablec_daily as gd
+import post_sources as ps
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PAGE = "https://www.facebook.com/zabokyhr/"
+MONDAY = date(2026, 6, 1)
+
+
+def _site(requests=None):
+    """httpx client serving the fixtures as a restaurant website."""
+    def handler(request):
+        if requests is not None:
+            requests.append(str(request.url))
+        path = request.url.path
+        if path == "/marenda":
+            return httpx.Response(200, text=(FIXTURES / "restaurant_menu.html").read_text(encoding="utf-8"),
+                                  headers={"content-type": "text/html; charset=utf-8",
+                                           "last-modified": "Mon, 01 Jun 2026 05:00:00 GMT"})
+        if path == "/feed.xml":
+            return httpx.Response(200, text=(FIXTURES / "restaurant_feed.xml").read_text(encoding="utf-8"),
+                                  headers={"content-type": "application/rss+xml"})
+        if path == "/o-nama":
+            return httpx.Response(200, text="<p>Obiteljski restoran od 1998. Dobrodošli!</p>",
+                                  headers={"content-type": "text/html"})
+        if path == "/img/marenda.jpg":
+            return httpx.Response(200, content=b"jpeg", headers={"content-type": "image/jpeg"})
+        return httpx.Response(404)
+    return httpx.Client(transport=httpx.MockTransport(handler), base_url="https://zaboky.example")
+
+
+def test_html_page_becomes_one_post_with_only_the_menu_element():
+    source = ps.HttpSource("https://zaboky.example/marenda", element_id="menu", images=True, client=_site())
+    (post,) = source.fetch(PAGE, date(2026, 5, 28))
+    assert post["text"] == ("Marenda – ponedjeljak 1.6.\nKrem juha od brokule\nČobanac (7,80 €)\n"
+                            "Oslić, blitva\n(9,50 €)")
+    assert post["posted_at_local"].startswith("2026-06-01")
+    assert post["images"] == [{"bytes": b"jpeg", "mime": "image/jpeg"}]
+    assert post["page_name"] is None
+
+    whole_page = ps.HttpSource("https://zaboky.example/marenda", client=_site()).fetch(PAGE, date(2026, 5, 28))
+    assert "Čobanac" in whole_page[0]["text"] and "Radno vrijeme" not in whole_page[0]["text"]
+    assert "dataLayer" not in whole_page[0]["text"] and whole_page[0]["images"] == []
+
+
+def test_unclosed_tags_do_not_extend_the_menu_element():
+    html = (FIXTURES / "restaurant_unclosed.html").read_text(encoding="utf-8")
+    menu = "Marenda\nMarenda: juha\nGrah 7 €\nPosna sarma (6,90 €)\nPohana piletina, pire (8,50 €)"
+    assert ps.html_to_text(html, element_id="menu") == (menu, [])
+    assert ps.html_to_text(html, element_class="marenda")[0] == menu
+    assert ps.html_to_text(html, element_class="about")[0] == "O nama: obiteljski restoran od 1998.\nRadno vrijeme 7-16h"
+
+
+def test_feed_entries_newer_than_since_date_newest_first():
+    posts = ps.HttpSource("https://zaboky.example/feed.xml", client=_site()).fetch(PAGE, date(2026, 5, 28))
+    assert [p["post_url"] for p in posts] == ["https://graso.example/marenda-2-6", "https://graso.example/marenda-1-6"]
+    assert posts[0]["text"] == "Marenda 2.6.\nGrah s kobasicom 7,20 €\nPosna sarma (6,90 €)"
+
+
+def test_missing_page_and_stale_page_return_nothing():
+    site = _site()
+    assert ps.HttpSource("https://zaboky.example/gone", client=site).fetch(PAGE, date(2026, 5, 28)) == []
+    assert ps.HttpSource("https://zaboky.example/marenda", client=site).fetch(PAGE, date(2026, 6, 2)) == []
+
+
+def test_config_validation(tmp_path):
+    path = tmp_path / "sources.json"
+    path.write_text(json.dumps({PAGE: [{"type": "http"}]}))
+    with pytest.raises(ValueError):
+        ps.load_source_config(path)
+    path.write_text(json.dumps({PAGE: [{"type": "ftp", "url": "x"}]}))
+    with pytest.raises(ValueError):
+        ps.load_source_config(path)
+    assert ps.load_source_config(tmp_path / "missing.json") == {}
+
+
+def test_cheap_source_first_and_apify_only_as_fallback(monkeypatch):
+    ps.SOURCES_FILE.write_text(json.dumps({
+        PAGE: [{"type": "http", "url": "https://zaboky.example/marenda", "element_id": "menu"}],
+        "https://www.facebook.com/other/": [{"type": "http", "url": "https://zaboky.example/gone"}],
+    }))
+    requests = []
+    site = _site(requests)
+    monkeypatch.setattr(ps.httpx, "get", lambda url, **kw: site.get(url, **kw))
+    apify_calls = []
+    monkeypatch.setattr(gd, "fetch_facebook_posts",
+                        lambda url, since: apify_calls.append(url) or [{"page_name": "Other", "text": "Gablec"}])
+    cache = {"week_start": "2026-06-01", "restaurants": {"Zaboky": {"facebook_url": PAGE, "menus": {}}}}
+    monkeypatch.setattr(gd, "get_state_backend", lambda: type("S", (), {"load_cache": lambda self: cache})())
+
+    posts = gd.fetch_posts(PAGE, date(2026, 5, 28), MONDAY)
+    assert posts[0]["page_name"] == "Zaboky"      # keeps the restaurant's cache key
+    assert posts[0]["posted_at_local"] == "2026-06-01T07:00:00+02:00"
+    assert apify_calls == []
+
+    assert gd.fetch_posts("https://www.facebook.com/other/", date(2026, 5, 28), MONDAY) == [
+        {"page_name": "Other", "text": "Gablec"}]
+    assert apify_calls == ["https://www.facebook.com/other/"]
+    assert gd.fetch_posts("https://www.facebook.com/other/", date(2026, 5, 28), MONDAY, fallback=False) == []
+    assert requests == ["https://zaboky.example/marenda", "https://zaboky.example/gone",
+                        "https://zaboky.example/gone"]
+
+
+def test_sources_on_one_host_share_a_concurrency_cap():
+    a = ps.HttpSource("https://zaboky.example/marenda", concurrency=1)
+    b = ps.HttpSource("https://zaboky.example/feed.xml", concurrency=1)
+    assert ps._limit(a.limit_key, 1) is ps._limit(b.limit_key, 1)
+    assert a.limit_key != gd.ApifySource().limit_key
+
+
+def test_a_page_that_is_not_a_menu_falls_back_to_apify(monkeypatch):
+    ps.SOURCES_FILE.write_text(json.dumps({PAGE: [{"type": "http", "url": "https://zaboky.example/o-nama"}]}))
+    site = _site()
+    monkeypatch.setattr(ps.httpx, "get", lambda url, **kw: site.get(url, **kw))
+    apify = [{"page_name": "Zaboky", "text": "Marenda: grah", "posted_at_local": "2026-06-01T07:00:00+02:00"}]
+    monkeypatch.setattr(gd, "fetch_facebook_posts", lambda url, since: apify)
+
+    # No Last-Modified, so the page counts as posted now; its text is still not a menu.
+    assert gd.fetch_posts(PAGE, date(2026, 5, 28), MONDAY) == apify
+
+
+def test_pages_are_fetched_in_parallel_within_each_source_cap(monkeypatch):
+    pages = [f"https://www.facebook.com/p{i}/" for i in range(6)]
+    lock, running, peak = threading.Lock(), [0], [0]
+
+    def fetch(url, since):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return [{"page_name": url, "text": "Marenda"}]
+
+    monkeypatch.setattr(gd, "fetch_facebook_posts", fetch)
+    monkeypatch.setattr(ps, "_limits", {})
+    ps.SOURCES_FILE.write_text(json.dumps({page: [{"type": "apify", "concurrency": 2}] for page in pages}))
+
+    fetched = gd.fetch_posts_for_pages(pages, date(2026, 5, 28), MONDAY)
+    assert list(fetched) == pages and all(fetched[p][0]["page_name"] == p for p in pages)
+    assert peak[0] == 2
+
+
+def test_fetch_threads_share_one_session_pool(monkeypatch):
+    class _SlowPool(gd.SessionPool):
+        def __init__(self):
+            time.sleep(0.05)
+            super().__init__()
+
+    monkeypatch.setattr(gd, "SessionPool", _SlowPool)
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(gd.get_session_pool())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(pool) for pool in pools}) == 1
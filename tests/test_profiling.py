@@ -0,0 +1,51 @@
+import json
+import tracemalloc
+import pytest
+import profiling
+
+
+@pytest.fixture
+def prof():
+    p = profiling.PhaseProfiler()
+    yield p
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def _parse_json():
+    return json.loads(json.dumps([{"item": "x" * 100, "n": i} for i in range(5000)]))
+
+
+def test_disabled_profiler_records_nothing(prof):
+    with prof.phase("fetch"):
+        _parse_json()
+    assert prof.phases == {}
+    assert not tracemalloc.is_tracing()
+    assert prof.write_report() is None
+
+
+def test_phases_accumulate_and_do_not_nest(prof):
+    prof.enable(top_n=5)
+    for _ in range(2):
+        with prof.phase("extract"):
+            with prof.phase("inner"):
+                kept = _parse_json()
+    assert list(prof.phases) == ["extract"]
+    st = prof.phases["extract"]
+    assert st["calls"] == 2 and st["wall"] > 0
+    assert st["peak"] > 1024 * 1024
+    assert max(st["allocations"].values()) > 0
+    del kept
+
+
+def test_report_lists_hotspots_and_writes_artifacts(prof, tmp_path):
+    prof.enable(top_n=5)
+    with prof.phase("render"):
+        _parse_json()
+    text = prof.report()
+    assert "=== render: 1x" in text
+    assert "loads" in text and "allocation sites" in text
+
+    path = prof.write_report(tmp_path)
+    assert path.read_text(encoding="utf-8").startswith("=== render")
+    assert len(list(tmp_path.glob("profile-*-render.prof"))) == 1
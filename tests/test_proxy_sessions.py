@@ -0,0 +1,88 @@
+import types
+import gablec_daily as gd
+import proxy_sessions as ps
+from datetime import date, datetime, timedelta, timezone
+
+
+PAGE = "https://fb/page"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = datetime(2026, 6, 1, 7, 0, tzinfo=timezone.utc)
+
+    def __call__(self):
+        return self.now
+
+
+def test_proxy_input_pins_the_session_only_with_a_password():
+    pinned = ps.proxy_input("gablec1", password="pw", country="HR")
+    assert pinned == {"useApifyProxy": False,
+                      "proxyUrls": ["http://groups-RESIDENTIAL,session-gablec1,country-HR:pw@proxy.apify.com:8000"]}
+    assert ps.proxy_input("gablec1", password="") == {
+        "useApifyProxy": True, "apifyProxyGroups": ["RESIDENTIAL"], "apifyProxyCountry": ps.PROXY_COUNTRY}
+
+
+def test_pool_reuses_sessions_that_worked_and_retires_empty_ones(tmp_path):
+    clock = _Clock()
+    pool = ps.SessionPool(tmp_path / "sessions.json", clock, password="pw")
+
+    first = pool.pick(PAGE)
+    pool.record(PAGE, first, False)
+    assert pool.pick(PAGE) != first and pool.pages[PAGE] == {}   # never worked -> dropped at once
+
+    good = pool.pick(PAGE)
+    pool.record(PAGE, good, True)
+    other = pool.pick(PAGE, exclude=[good])
+    pool.record(PAGE, other, True)
+    pool.record(PAGE, good, True)
+    assert ps.SessionPool(tmp_path / "sessions.json", clock, password="pw").pick(PAGE) == good   # persisted, most successes
+
+    for _ in range(ps.MAX_EMPTY_STREAK):
+        pool.record(PAGE, good, False)
+    assert pool.pick(PAGE) == other
+
+    clock.now += ps.SESSION_MAX_IDLE + timedelta(minutes=1)
+    assert pool.pick(PAGE) not in (good, other) and pool.pages[PAGE] == {}
+
+
+def test_fetch_retries_on_another_session_without_sleeping(monkeypatch):
+    monkeypatch.setattr(ps, "APIFY_PROXY_PASSWORD", "pw")
+    monkeypatch.setattr(gd, "posts_from_dataset", lambda dataset_id, page_url: [] if dataset_id == "empty" else [
+        {"page_name": "Resto", "text": "Marenda", "posted_at_local": "", "post_url": "", "images": []}])
+    sleeps, urls = [], []
+    monkeypatch.setattr(gd.time, "sleep", sleeps.append)
+
+    class _Actor:
+        def call(self, run_input):
+            urls.append(run_input["proxy"]["proxyUrls"][0])
+            return types.SimpleNamespace(default_dataset_id="empty" if len(urls) == 1 else "ds")
+
+    monkeypatch.setattr(gd, "client_apify", types.SimpleNamespace(actor=lambda name: _Actor()))
+
+    assert gd.fetch_facebook_posts(PAGE, date(2026, 6, 1))
+    assert len(urls) == 2 and urls[0] != urls[1] and sleeps == [0]
+    working = urls[1].split("session-")[1].split(",")[0]
+    assert list(gd.get_session_pool().pages[PAGE]) == [working]
+
+    # The next scrape goes straight to the session that worked.
+    gd.fetch_facebook_posts(PAGE, date(2026, 6, 1))
+    assert urls[2] == urls[1]
+
+
+def test_without_a_password_no_sessions_are_tracked(monkeypatch):
+    monkeypatch.setattr(ps, "APIFY_PROXY_PASSWORD", "")
+    monkeypatch.setattr(gd, "posts_from_dataset", lambda dataset_id, page_url: [])
+    sleeps, inputs = [], []
+    monkeypatch.setattr(gd.time, "sleep", sleeps.append)
+
+    class _Actor:
+        def call(self, run_input):
+            inputs.append(run_input["proxy"])
+            return types.SimpleNamespace(default_dataset_id="empty")
+
+    monkeypatch.setattr(gd, "client_apify", types.SimpleNamespace(actor=lambda name: _Actor()))
+
+    assert gd.fetch_facebook_posts(PAGE, date(2026, 6, 1), retries=2, retry_delay=20) == []
+    assert all(proxy["useApifyProxy"] for proxy in inputs) and sleeps == [20]
+    assert gd.get_session_pool().pages == {} and not ps.PROXY_SESSIONS_FILE.exists()
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import types
+import gablec_daily as gd
+import replay
+import scrape_archive as sa
+from datetime import date
+
+
+MONDAY = date(2026, 6, 1)
+PAGE = "https://www.facebook.com/mondozabok/"
+
+
+def test_archive_roundtrip_dedupes_posts_and_images(make_post):
+    sa.archive_posts(PAGE, [make_post("Marenda: juha", [b"photo"], page_name="Mondo", post_url="u1")], MONDAY)
+    sa.archive_posts(PAGE, [make_post("Marenda: juha", [b"photo"], page_name="Mondo", post_url="u1"),
+                            make_post("Utorak: grah", [b"photo"], "2026-06-01T09:00:00+02:00", "Mondo", "u2")], MONDAY)
+
+    record = sa.load_archived_day("mondozabok", MONDAY)
+    assert [p["post_url"] for p in record["posts"]] == ["u2", "u1"]
+    assert record["posts"][1]["images"] == [{"bytes": b"photo", "mime": "image/jpeg"}]
+    assert len(list((sa.ARCHIVE_DIR / "images").iterdir())) == 1
+    assert list(sa.iter_archived_days()) == [("mondozabok", MONDAY)]
+
+
+def test_prune_drops_old_days_and_their_images(make_post):
+    old_day, kept_day = date(2026, 4, 27), date(2026, 5, 4)
+    sa.archive_posts(PAGE, [make_post("Marenda: juha", [b"old"], post_url="u1"),
+                            make_post("Marenda: grah", [b"shared"], post_url="u2")], old_day)
+    sa.archive_posts(PAGE, [make_post("Marenda: sarma", [b"shared"], post_url="u3")], kept_day)
+
+    # Four weeks back from Monday 1 June starts at 11 May; 4 May stays with five.
+    assert sa.prune_archive(MONDAY, keep_weeks=5) == (1, 1)
+    assert list(sa.iter_archived_days()) == [("mondozabok", kept_day)]
+    assert sa.load_archived_day("mondozabok", kept_day)["posts"][0]["images"][0]["bytes"] == b"shared"
+
+    assert sa.prune_archive(MONDAY, keep_weeks=4) == (1, 1)
+    assert not (sa.ARCHIVE_DIR / "posts" / "mondozabok").exists()
+
+
+def test_fetch_facebook_posts_archives_its_result(monkeypatch):
+    class _Client:
+        def actor(self, _name):
+            return types.SimpleNamespace(call=lambda run_input: types.SimpleNamespace(default_dataset_id="ds"))
+
+        def dataset(self, _id):
+            return types.SimpleNamespace(iterate_items=lambda: [{
+                "user": {"name": "Mondo"}, "text": "Marenda: juha", "topLevelUrl": "https://fb/post/1",
+                "time": "2026-06-01T06:00:00Z", "media": []}])
+
+    monkeypatch.setattr(gd, "client_apify", _Client())
+    gd.fetch_facebook_posts(PAGE, date(2026, 5, 28))
+
+    ((key, day),) = list(sa.iter_archived_days())
+    assert key == "mondozabok"
+    assert sa.load_archived_day(key, day)["posts"][0]["text"] == "Marenda: juha"
+
+
+def test_menu_agreement():
+    a = {"menus": {"2026-06-01": ["Juha", "Čobanac"], "2026-06-02": ["grah"]}}
+    b = {"menus": {"2026-06-01": ["juha", "cobanac"]}}
+    assert replay.menu_agreement(a, a) == 1.0
+    assert replay.menu_agreement(a, b) == 0.5
+    assert replay.menu_agreement({"menus": {}}, {"menus": {}}) == 1.0
+
+
+def test_replay_reports_per_model(monkeypatch, make_post):
+    sa.archive_posts(PAGE, [make_post("Marenda: juha, segedin", page_name="Mondo", post_url="u1")], MONDAY)
+    sa.archive_result(PAGE, MONDAY, {"menu_type": "daily", "menus": {"2026-06-01": ["juha, segedin"]}})
+
+    answers = {
+        "good": {"menu_type": "daily", "menus": {"2026-06-01": ["juha, segedin"]}},
+        "meh": {"menu_type": "daily", "menus": {"2026-06-01": ["juha"]}},
+    }
+
+    async def generate_content(model, contents):
+        usage = types.SimpleNamespace(prompt_token_count=100, candidates_token_count=10)
+        return types.SimpleNamespace(text=json.dumps(answers[model]), usage_metadata=usage)
+
+    aio = types.SimpleNamespace(models=types.SimpleNamespace(generate_content=generate_content))
+    monkeypatch.setattr(gd, "client_gemini", types.SimpleNamespace(aio=aio))
+
+    samples = asyncio.run(replay.replay_archive(MONDAY, MONDAY, ["good", "meh"], concurrency=2))
+    summary = replay.summarize(samples)
+
+    assert summary["good"]["parsed"] == 1 and summary["good"]["agreement"] == 1.0
+    assert summary["meh"]["agreement"] == 0.0
+    assert summary["good"]["prompt_tokens"] == 100 and summary["meh"]["output_tokens"] == 10
+
+
+def test_percentile():
+    assert replay.percentile([], 95) == 0.0
+    assert replay.percentile([3, 1, 2, 4], 50) == 2
+    assert replay.percentile(list(range(1, 101)), 95) == 95
@@ -120,7 +120,7 @@ def _setup_send(monkeypatch, cache, slack_result=True):
     monkeypatch.setattr(gd, "save_cache", spy)
     sent = {"called": False}
 
-    def fake_slack(today_lunch, today_date, max_retries=3):
+    def fake_slack(today_lunch, today_date, max_retries=3, channel=None):
         sent["called"] = True
         return slack_result
 
@@ -0,0 +1,116 @@
+import subprocess
+import sys
+from pathlib import Path
+import gablec_daily as gd
+import slack_payload as sp
+from datetime import date
+
+
+MONDAY = date(2026, 6, 1)
+PAGES = ["https://a/", "https://b/"]
+
+
+def _cache(monday_items=("a1",), sent_date=None):
+    cache = {
+        "week_start": "2026-06-01",
+        "restaurants": {
+            "A": {"facebook_url": "https://a/",
+                  "menus": {"2026-06-01": list(monday_items), "2026-06-02": ["a2"]}},
+            "B": {"facebook_url": "https://b/", "menus": {"2026-06-01": ["b1"]}},
+        },
+    }
+    if sent_date:
+        cache["sent_date"] = sent_date
+    return cache
+
+
+def _precompile(monkeypatch, cache, today=MONDAY):
+    monkeypatch.setattr(gd, "FACEBOOK_PAGES", PAGES)
+    monkeypatch.setattr(gd, "SLACK_CHANNEL", "#lunch")
+    return gd.precompile_payloads(cache, today)
+
+
+def _fake_post(monkeypatch, result=True):
+    posted = []
+
+    def fake(record, channel, token, max_retries=3):
+        posted.append((channel, record["hash"]))
+        return result
+
+    monkeypatch.setattr(sp, "post_payload", fake)
+    return posted
+
+
+def test_send_module_imports_only_slack():
+    code = ("import sys, slack_payload; "
+            "heavy = [m for m in ('google.genai', 'apify_client', 'gablec_daily') if m in sys.modules]; "
+            "print(heavy)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=Path(sp.__file__).parent,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_precompile_writes_remaining_weekdays(monkeypatch):
+    assert _precompile(monkeypatch, _cache()) is True
+    data = sp.load_payloads()
+    assert sorted(data["days"]) == ["2026-06-01", "2026-06-02", "2026-06-03", "2026-06-04", "2026-06-05"]
+    monday = sp.get_payload(data, MONDAY, "#lunch")
+    assert (monday["ready_count"], monday["total"]) == (2, 2)
+    assert monday["blocks"] == gd.build_slack_blocks(gd.build_today_lunch(_cache(), MONDAY), MONDAY)
+    assert sp.get_payload(data, date(2026, 6, 2), "#lunch")["ready_count"] == 1
+
+
+def test_unchanged_precompile_does_not_rewrite(monkeypatch):
+    _precompile(monkeypatch, _cache())
+    assert _precompile(monkeypatch, _cache()) is False
+    assert _precompile(monkeypatch, _cache(monday_items=("new",))) is True
+
+
+def test_send_precompiled_posts_once(monkeypatch):
+    _precompile(monkeypatch, _cache())
+    posted = _fake_post(monkeypatch)
+
+    assert sp.send_precompiled(False, MONDAY, "#lunch", "tok") is True
+    assert sp.send_precompiled(True, MONDAY, "#lunch", "tok") is True
+    assert len(posted) == 1
+    record = sp.get_payload(sp.load_payloads(), MONDAY, "#lunch")
+    assert record["sent_hash"] == record["hash"]
+
+    # A later scrape that changes the menu keeps the sent marker: no re-post.
+    _precompile(monkeypatch, _cache(monday_items=("late update",)))
+    assert sp.send_precompiled(True, MONDAY, "#lunch", "tok") is True
+    assert len(posted) == 1
+
+
+def test_send_precompiled_defers_and_falls_back(monkeypatch):
+    cache = _cache(monday_items=())
+    _precompile(monkeypatch, cache)
+    posted = _fake_post(monkeypatch)
+    assert sp.send_precompiled(False, MONDAY, "#lunch", "tok") is True   # 1/2 ready -> defer
+    assert posted == []
+    assert sp.send_precompiled(False, MONDAY, "#other", "tok") is None   # no record
+
+
+def test_failed_post_is_not_marked_sent(monkeypatch):
+    _precompile(monkeypatch, _cache())
+    _fake_post(monkeypatch, result=False)
+    assert sp.send_precompiled(False, MONDAY, "#lunch", "tok") is False
+    assert "sent_hash" not in sp.get_payload(sp.load_payloads(), MONDAY, "#lunch")
+
+
+def test_cache_sent_date_carries_into_payload(monkeypatch):
+    _precompile(monkeypatch, _cache(sent_date="2026-06-01"))
+    posted = _fake_post(monkeypatch)
+    assert sp.send_precompiled(True, MONDAY, "#lunch", "tok") is True
+    assert posted == []
+
+
+def test_legacy_send_respects_payload_sent_marker(monkeypatch):
+    monkeypatch.setattr(gd, "SLACK_CHANNEL", "#lunch")
+    _precompile(monkeypatch, _cache())
+    sp.mark_payload_sent(MONDAY, "#lunch")
+    monkeypatch.setattr(gd, "load_cache", _cache)
+    sent = []
+    monkeypatch.setattr(gd, "send_to_slack", lambda *a, **k: sent.append(1) or True)
+    assert gd.send_daily_message(final=True, today=MONDAY) is True
+    assert sent == []
@@ -0,0 +1,106 @@
+import gablec_daily as gd
+import slack_payload as sp
+from datetime import date
+
+
+MONDAY = date(2026, 6, 1)
+
+
+def _lunch(n, items_per=3, item="Svinjski bečki, riža, salata (8,90 E)"):
+    return {f"Restoran {i}": {"restaurant": f"Restoran {i}", "items": [item] * items_per,
+                              "facebook_url": f"https://fb/{i}"} for i in range(n)}
+
+
+def _section_text(messages):
+    text = " ".join(b["text"]["text"] for msg in messages for b in msg if b["type"] == "section")
+    return text
+
+
+def _assert_within_limits(messages):
+    for msg in messages:
+        assert len(msg) <= gd.SLACK_MAX_BLOCKS
+        for block in msg:
+            if block["type"] == "section":
+                assert len(block["text"]["text"]) <= gd.SLACK_MAX_SECTION_CHARS
+
+
+def test_small_post_is_one_message_like_before():
+    messages = gd.build_slack_messages(_lunch(3), MONDAY, "detailed")
+    assert len(messages) == 1
+    assert messages[0] == gd.build_slack_blocks(_lunch(3), MONDAY)
+    assert [b["type"] for b in messages[0]] == ["header", "divider"] + ["section", "divider"] * 3 + ["context"]
+
+
+def test_many_restaurants_overflow_into_thread_replies():
+    lunch = _lunch(60)
+    messages = gd.build_slack_messages(lunch, MONDAY, "detailed")
+    _assert_within_limits(messages)
+    assert len(messages) == 3
+    assert messages[0][0]["type"] == "header"
+    assert "u niti" in messages[0][-2]["elements"][0]["text"]
+    # Every restaurant appears exactly once, in order, never split from its divider.
+    sections = [b for msg in messages for b in msg if b["type"] == "section"]
+    assert [s["text"]["text"].split("\n")[0] for s in sections] == [f"*{name}*" for name in lunch]
+    for msg in messages[1:]:
+        assert msg[-1]["type"] == "divider"
+
+
+def test_long_menu_is_split_into_continuation_sections():
+    lunch = _lunch(1, items_per=200)
+    (message,) = gd.build_slack_messages(lunch, MONDAY, "detailed")
+    _assert_within_limits([message])
+    sections = [b for b in message if b["type"] == "section"]
+    assert len(sections) > 1
+    assert "accessory" in sections[0] and "accessory" not in sections[1]
+    assert sections[1]["text"]["text"].startswith("*Restoran 0* (nastavak)")
+    assert sum(s["text"]["text"].count("•") for s in sections) == 200
+
+
+def test_compact_layout_packs_restaurants_into_shared_sections():
+    lunch = _lunch(60)
+    compact = gd.build_slack_messages(lunch, MONDAY, "compact")
+    _assert_within_limits(compact)
+    assert len(compact) == 1
+    text = _section_text(compact)
+    assert all(f"<https://fb/{i}|Restoran {i}>" in text for i in range(60))
+
+
+def test_rendering_thousands_of_entries_stays_within_limits():
+    messages = gd.build_slack_messages(_lunch(5000), MONDAY, "detailed")
+    _assert_within_limits(messages)
+    assert sum(1 for msg in messages for b in msg if b["type"] == "divider") == 5000 + 1
+
+
+class _FakeSlack:
+    def __init__(self, fail_replies=False):
+        self.posts = []
+        self.fail_replies = fail_replies
+
+    def __call__(self, token):
+        return self
+
+    def chat_postMessage(self, **kwargs):
+        if self.fail_replies and "thread_ts" in kwargs:
+            raise RuntimeError("boom")
+        self.posts.append(kwargs)
+        return {"ts": f"{len(self.posts)}.0"}
+
+
+def test_post_payload_threads_overflow(monkeypatch):
+    fake = _FakeSlack()
+    monkeypatch.setattr(sp, "WebClient", fake)
+    messages = gd.build_slack_messages(_lunch(60), MONDAY, "detailed")
+    record = sp.make_payload(messages[0], "text", 60, 60, thread=messages[1:])
+
+    assert sp.post_payload(record, "#lunch", "tok") is True
+    assert len(fake.posts) == 3
+    assert "thread_ts" not in fake.posts[0]
+    assert all(p["thread_ts"] == "1.0" for p in fake.posts[1:])
+
+
+def test_failed_reply_still_counts_as_sent(monkeypatch):
+    fake = _FakeSlack(fail_replies=True)
+    monkeypatch.setattr(sp, "WebClient", fake)
+    record = sp.make_payload([{"type": "divider"}], "text", 1, 1, thread=[[{"type": "divider"}]])
+    assert sp.post_payload(record, "#lunch", "tok", max_retries=2) is True
+    assert len(fake.posts) == 1
@@ -0,0 +1,217 @@
+import socketserver
+import threading
+import time
+import pytest
+import gablec_daily as gd
+import state_backend as sb
+from datetime import date
+
+
+class _RespStandIn(socketserver.ThreadingTCPServer):
+    """Just enough of a Redis server for the backend: strings, hashes, SET NX/PX, WATCH/MULTI/EXEC."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _RespHandler)
+        self.data, self.expires, self.versions = {}, {}, {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        if key in self.expires and self.expires[key] <= time.monotonic():
+            self.delete(key)
+        return self.data.get(key)
+
+    def touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def delete(self, key):
+        existed = self.data.pop(key, None) is not None
+        self.expires.pop(key, None)
+        self.touch(key)
+        return existed
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2].decode())
+        return args
+
+    def _encode(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, bool):
+            return b"+OK\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(self._encode(v) for v in value)
+        data = value.encode()
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    def _run(self, server, cmd, args):
+        if cmd in ("PING", "AUTH", "SELECT"):
+            return True
+        if cmd == "GET":
+            return server.get(args[0])
+        if cmd == "SET":
+            key, value, opts = args[0], args[1], [a.upper() for a in args[2:]]
+            if "NX" in opts and server.get(key) is not None:
+                return None
+            server.data[key] = value
+            server.expires.pop(key, None)
+            if "PX" in opts:
+                server.expires[key] = time.monotonic() + int(args[2 + opts.index("PX") + 1]) / 1000
+            server.touch(key)
+            return True
+        if cmd == "DEL":
+            return sum(server.delete(k) for k in args)
+        if cmd == "HSET":
+            server.data.setdefault(args[0], {})[args[1]] = args[2]
+            server.touch(args[0])
+            return 1
+        if cmd == "HGETALL":
+            return [x for kv in (server.data.get(args[0]) or {}).items() for x in kv]
+        if cmd == "SCAN":
+            # One key per page, so callers must follow the cursor.
+            prefix = args[args.index("MATCH") + 1].rstrip("*")
+            keys = sorted(k for k in list(server.data) if k.startswith(prefix) and server.get(k) is not None)
+            start = int(args[0])
+            return ["0" if start + 1 >= len(keys) else str(start + 1), keys[start:start + 1]]
+        raise AssertionError(f"unsupported command {cmd}")
+
+    def handle(self):
+        server, watched, queued = self.server, {}, None
+        while (args := self._read_command()) is not None:
+            cmd, rest = args[0].upper(), args[1:]
+            with server.lock:
+                if cmd == "WATCH":
+                    watched.update({k: server.versions.get(k, 0) for k in rest})
+                    reply = True
+                elif cmd == "UNWATCH":
+                    watched, reply = {}, True
+                elif cmd == "MULTI":
+                    queued, reply = [], True
+                elif cmd == "EXEC":
+                    dirty = any(server.versions.get(k, 0) != v for k, v in watched.items())
+                    reply = None if dirty else [self._run(server, c[0], c[1]) for c in queued]
+                    watched, queued = {}, None
+                elif queued is not None:
+                    queued.append((cmd, rest))
+                    self.wfile.write(b"+QUEUED\r\n")
+                    continue
+                else:
+                    reply = self._run(server, cmd, rest)
+            self.wfile.write(self._encode(reply))
+
+
+@pytest.fixture
+def redis_url():
+    server = _RespStandIn()
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield f"redis://:secret@127.0.0.1:{server.server_address[1]}/2"
+    server.shutdown()
+    server.server_close()
+
+
+def _record(day, items):
+    return {"facebook_url": "https://a/", "menu_type": "daily", "menus": {day: items}}
+
+
+def test_restaurant_updates_from_two_runners_do_not_clobber(redis_url):
+    one, two = sb.RedisStateBackend(redis_url), sb.RedisStateBackend(redis_url)
+    cache_one = {"week_start": "2026-06-01", "restaurants": {"A": _record("2026-06-01", ["a"])}}
+    cache_two = {"week_start": "2026-06-01", "restaurants": {"B": _record("2026-06-01", ["b"])}}
+    one.update_restaurant(cache_one, "A")
+    two.update_restaurant(cache_two, "B")
+
+    shared = one.load_cache()
+    assert shared["week_start"] == "2026-06-01"
+    assert set(shared["restaurants"]) == {"A", "B"}
+
+
+def test_scrape_lease_is_exclusive_and_expires(redis_url):
+    one, two = sb.RedisStateBackend(redis_url), sb.RedisStateBackend(redis_url)
+    token = one.acquire_lease("scrape:https://a/", 0.2)
+    assert token is not None
+    assert two.acquire_lease("scrape:https://a/", 0.2) is None
+
+    two.release_lease("scrape:https://a/", "not-the-owner")
+    assert two.acquire_lease("scrape:https://a/", 0.2) is None
+
+    time.sleep(0.25)
+    with two.lease("scrape:https://a/", 60) as acquired:
+        assert acquired
+        one.release_lease("scrape:https://a/", token)   # expired owner cannot free it
+        assert one.acquire_lease("scrape:https://a/", 60) is None
+    assert one.acquire_lease("scrape:https://a/", 60) is not None
+
+
+def test_sent_marker_compare_and_set(redis_url):
+    one, two = sb.RedisStateBackend(redis_url), sb.RedisStateBackend(redis_url)
+    cache_one, cache_two = one.load_cache(), two.load_cache()
+    assert one.compare_and_set_sent(cache_one, None, "2026-06-01") is True
+    assert two.compare_and_set_sent(cache_two, None, "2026-06-01") is False
+    assert cache_one["sent_date"] == "2026-06-01" and "sent_date" not in cache_two
+
+
+def test_load_cache_includes_every_tenant_marker(redis_url):
+    one, two = sb.RedisStateBackend(redis_url), sb.RedisStateBackend(redis_url)
+    assert one.compare_and_set_sent(one.load_cache(), None, "2026-06-01") is True
+    for tenant in ("ured-zg", "ured-st"):
+        assert one.compare_and_set_sent(one.load_cache(), None, "2026-06-01", marker=f"sent_date:{tenant}") is True
+
+    cache = two.load_cache()
+    assert {k: v for k, v in cache.items() if k.startswith("sent_date")} == {
+        "sent_date": "2026-06-01", "sent_date:ured-zg": "2026-06-01", "sent_date:ured-st": "2026-06-01"}
+    assert two.compare_and_set_sent(cache, None, "2026-06-01", marker="sent_date:ured-st") is False
+
+
+def test_week_reset_happens_once(redis_url):
+    one, two = sb.RedisStateBackend(redis_url), sb.RedisStateBackend(redis_url)
+    one.update_restaurant({"week_start": "2026-05-25", "restaurants": {"A": _record("2026-05-29", ["a"])}}, "A")
+    stale = two.load_cache()
+
+    fresh = one.reset_week(one.load_cache(), "2026-06-01")
+    one.update_restaurant({"week_start": "2026-06-01", "restaurants": {"B": _record("2026-06-01", ["b"])}}, "B")
+    assert fresh == {"week_start": "2026-06-01", "restaurants": {}}
+
+    # The second runner loaded last week's state; its reset must not wipe B.
+    assert set(two.reset_week(stale, "2026-06-01")["restaurants"]) == {"B"}
+
+
+def test_send_skips_when_another_runner_holds_the_send_lease(redis_url, monkeypatch):
+    backend = sb.RedisStateBackend(redis_url)
+    for name in ("A", "B"):
+        backend.update_restaurant({"week_start": "2026-06-01", "restaurants": {
+            name: {"facebook_url": f"https://{name.lower()}/", "menus": {"2026-06-01": [name]}}}}, name)
+    monkeypatch.setattr(gd, "_state_backend", backend)
+    monkeypatch.setattr(gd, "FACEBOOK_PAGES", ["https://a/", "https://b/"])
+    posts = []
+    monkeypatch.setattr(gd, "send_to_slack", lambda lunch, day, max_retries=3, channel=None: posts.append(day) or True)
+
+    other = sb.RedisStateBackend(redis_url)
+    token = other.acquire_lease("send:default:2026-06-01", 60)
+    assert gd.send_daily_message(final=True, today=date(2026, 6, 1)) is True
+    assert posts == []
+
+    other.release_lease("send:default:2026-06-01", token)
+    assert gd.send_daily_message(final=True, today=date(2026, 6, 1)) is True
+    assert gd.send_daily_message(final=True, today=date(2026, 6, 1)) is True
+    assert posts == [date(2026, 6, 1)]
+    assert other.load_cache()["sent_date"] == "2026-06-01"
+
+
+def test_file_backend_cas_rereads_the_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(gd, "CACHE_FILE", tmp_path / "menu_cache.json")
+    backend = gd.FileStateBackend()
+    mine = backend.reset_week({}, "2026-06-01")
+    other = backend.load_cache()
+    assert backend.compare_and_set_sent(other, None, "2026-06-01") is True
+    assert backend.compare_and_set_sent(mine, None, "2026-06-01") is False
@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import gablec_daily as gd
+import subscriptions as subs
+
+
+MONDAY = date(2026, 6, 1)
+
+
+ZABOKY = "https://www.facebook.com/p/Restoran-Catering-Zaboky-100063838081316/"
+GRASO = "https://www.facebook.com/p/Restaurant-Gra%C5%A1o-100055053834186/"
+MONDO = "https://www.facebook.com/mondozabok/"
+PAGES = {ZABOKY: "Restoran-Catering Zaboky", GRASO: 'Restaurant "Grašo"', MONDO: "mondozabok"}
+
+
+LUNCH = {PAGES[url]: {"restaurant": PAGES[url], "items": items, "facebook_url": url}
+         for url, items in ((ZABOKY, ["Krem juha od brokule", "Čobanac (7,80 €)"]),
+                            (GRASO, ["Grah s kobasicom (7,20 €)", "Posna sarma (6,90 €)"]),
+                            (MONDO, []))}
+
+
+def _index(*rows):
+    for user_id, restaurant, keywords in rows:
+        subs.subscribe(user_id, restaurant, PAGES, keywords)
+    return subs.SubscriptionIndex.load()
+
+
+def test_fan_out_by_restaurant_and_keyword():
+    index = _index(("U1", "zaboky", None), ("U2", "Graso", ["sarma"]), ("U3", "*", ["cobanac", "GRAH"]),
+                   ("U4", "Mondo", None), ("U5", "*", ["lignje"]))
+    out = index.fan_out(LUNCH)
+    assert set(out) == {"U1", "U2", "U3"}   # Mondo has no menu yet, nobody serves lignje
+    assert out["U1"][PAGES[ZABOKY]]["items"] == LUNCH[PAGES[ZABOKY]]["items"]
+    assert out["U2"] == {PAGES[GRASO]: {"restaurant": PAGES[GRASO], "facebook_url": GRASO,
+                                        "items": ["Posna sarma (6,90 €)"]}}
+    assert {name: info["items"] for name, info in out["U3"].items()} == {
+        PAGES[ZABOKY]: ["Čobanac (7,80 €)"], PAGES[GRASO]: ["Grah s kobasicom (7,20 €)"]}
+
+
+def test_restaurants_resolve_to_page_urls():
+    assert subs.resolve_restaurant("Grašo", PAGES) == GRASO
+    assert subs.resolve_restaurant("restaurant \"graso\"", PAGES) == GRASO
+    assert subs.resolve_restaurant(MONDO, PAGES) == MONDO
+    for name in ("Elsewhere", "zabok", " "):    # no page, two pages (Zaboky and mondozabok), no name
+        with pytest.raises(ValueError):
+            subs.resolve_restaurant(name, PAGES)
+    with pytest.raises(ValueError):
+        subs.subscribe("U7", "Elsewhere", PAGES)
+    assert not subs.has_subscriptions()
+
+
+def test_readiness_and_validation():
+    index = _index(("U1", "Zaboky", None), ("U4", "Mondo", None), ("U3", "*", ["grah"]))
+    assert index.is_ready("U1", LUNCH)
+    assert not index.is_ready("U4", LUNCH)
+    assert not index.is_ready("U3", LUNCH)    # "*" waits for every restaurant
+    stale = subs.SubscriptionIndex([{"user_id": "U6", "restaurant": "https://www.facebook.com/closed/",
+                                     "keywords": []}])
+    assert not stale.is_ready("U6", LUNCH)    # a page no longer served never counts as ready
+    with pytest.raises(ValueError):
+        subs.subscribe("U7", "*", PAGES)
+    with pytest.raises(ValueError):
+        subs.subscribe("U7", "Zaboky", PAGES, ["ab"])
+    assert subs.unsubscribe("U1", "zaboky", PAGES) == 1 and subs.unsubscribe("U3", "*") == 1
+    assert subs.unsubscribe("U4", MONDO) == 1
+
+
+def test_subscriptions_are_a_readable_text_file():
+    subs.subscribe("U2", "Grašo", PAGES, ["Sarma"])
+    subs.subscribe("U1", "Zaboky", PAGES)
+    assert json.loads(subs.SUBSCRIPTIONS_FILE.read_text(encoding="utf-8")) == [
+        {"user_id": "U1", "restaurant": ZABOKY, "keywords": []},
+        {"user_id": "U2", "restaurant": GRASO, "keywords": ["sarma"]}]
+    assert not subs.DM_LOG_DB.exists()
+
+
+def test_cli_rejects_unknown_restaurants(capsys):
+    assert subs.main(["add", "U1", "Elsewhere"], pages=PAGES) == 1
+    assert "Error" in capsys.readouterr().out
+    assert subs.main(["add", "U1", "zaboky", "--keywords", "juha"], pages=PAGES) == 0
+    assert subs.load_subscriptions() == [{"user_id": "U1", "restaurant": ZABOKY, "keywords": ["juha"]}]
+
+
+def test_rate_limiter_spaces_calls():
+    now, slept = [0.0], []
+
+    def sleep(seconds):
+        slept.append(round(seconds, 6))
+        now[0] += seconds
+
+    limiter = subs.RateLimiter(4, clock=lambda: now[0], sleep=sleep)
+    for _ in range(4):
+        limiter.acquire()
+    assert slept == [0.25, 0.25, 0.25]
+
+
+class _SlackStandIn(BaseHTTPRequestHandler):
+    """chat.postMessage as a local HTTP server: records posts, rate-limits one user once."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            limited = body["channel"] in server.rate_limit_once
+            server.rate_limit_once.discard(body["channel"])
+        time.sleep(0.05)
+        with server.lock:
+            server.in_flight -= 1
+            if not limited:
+                server.posts.append(body)
+        self.send_response(429 if limited else 200)
+        if limited:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps({"ok": False, "error": "ratelimited"} if limited
+                                    else {"ok": True, "channel": body["channel"], "ts": "1.0"}).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slack(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlackStandIn)
+    server.lock, server.posts, server.in_flight, server.max_in_flight = threading.Lock(), [], 0, 0
+    server.rate_limit_once = {"U3"}
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    monkeypatch.setattr(subs, "SLACK_API_URL", f"http://127.0.0.1:{server.server_address[1]}/api/")
+    monkeypatch.setattr(subs, "DM_RATE", 100)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_dms_go_out_once_per_user_through_the_stand_in(slack, monkeypatch):
+    monkeypatch.setattr(gd, "get_state_backend", lambda: type("S", (), {"load_cache": lambda self: {}})())
+    monkeypatch.setattr(gd, "build_today_lunch", lambda cache, day, pages: LUNCH)
+    _index(("U1", "Zaboky", None), ("U2", "Graso", ["sarma"]), ("U3", "*", ["grah"]), ("U4", "Mondo", None),
+           ("U5", "Zaboky", ["juha"]), ("U8", "Grašo", None))
+
+    # Send #1: everyone whose restaurants are all ready; U3 ("*") waits, U4 has nothing yet.
+    assert gd.send_subscription_dms(final=False, today=MONDAY) == 4
+    assert sorted(p["channel"] for p in slack.posts) == ["U1", "U2", "U5", "U8"]
+    assert slack.max_in_flight >= 2
+    dm = next(p for p in slack.posts if p["channel"] == "U2")
+    assert "Posna sarma" in json.dumps(dm["blocks"], ensure_ascii=False)
+    assert "Grah s kobasicom" not in json.dumps(dm["blocks"], ensure_ascii=False)
+
+    assert gd.send_subscription_dms(final=False, today=MONDAY) == 0   # re-run: nobody twice
+
+    # Deadline send: U3 gets its match (after one 429), U4 still has nothing to receive.
+    assert gd.send_subscription_dms(final=True, today=MONDAY) == 1
+    assert [p["channel"] for p in slack.posts[4:]] == ["U3"]
+    assert subs.already_sent(MONDAY) == {"U1", "U2", "U3", "U5", "U8"}
@@ -0,0 +1,88 @@
+import json
+import pytest
+import gablec_daily as gd
+import slack_payload as sp
+import tenants
+from datetime import date, datetime
+
+
+MONDAY = date(2026, 6, 1)
+TENANTS = [
+    {"name": "zabok", "channel": "#zabok", "pages": ["https://a/", "https://b/"]},
+    {"name": "zagreb", "channel": "#zagreb", "pages": ["https://b/", "https://c/"]},
+]
+
+
+@pytest.fixture
+def two_offices(monkeypatch, tmp_path):
+    tenants.TENANTS_FILE.write_text(json.dumps(TENANTS), encoding="utf-8")
+    monkeypatch.setattr(gd, "CACHE_FILE", tmp_path / "menu_cache.json")
+    monkeypatch.setattr(gd, "_state_backend", None)
+
+
+def _cache():
+    return {
+        "week_start": "2026-06-01",
+        "restaurants": {
+            "A": {"facebook_url": "https://a/", "menus": {"2026-06-01": ["a1"]}},
+            "B": {"facebook_url": "https://b/", "menus": {"2026-06-01": ["b1"]}},
+            "C": {"facebook_url": "https://c/", "menus": {}},
+        },
+    }
+
+
+def test_default_tenant_without_file():
+    assert tenants.load_tenants(["https://a/"], "#lunch") == [
+        {"name": "default", "channel": "#lunch", "pages": ["https://a/"]}]
+    assert tenants.sent_marker({"name": "default"}) == "sent_date"
+    assert tenants.sent_marker({"name": "zagreb"}) == "sent_date:zagreb"
+
+
+@pytest.mark.parametrize("bad", [
+    [],
+    [{"name": "x", "channel": "#x", "pages": []}],
+    [{"name": "x", "channel": "#x", "pages": ["p"]}, {"name": "y", "channel": "#x", "pages": ["q"]}],
+])
+def test_malformed_tenants_file_is_rejected(bad):
+    tenants.TENANTS_FILE.write_text(json.dumps(bad), encoding="utf-8")
+    with pytest.raises(ValueError):
+        tenants.load_tenants(None, "#lunch")
+
+
+def test_shared_page_is_scraped_once(two_offices, monkeypatch):
+    class _Monday(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2026, 6, 1, 7, 0, tzinfo=tz)
+
+    fetched = []
+    monkeypatch.setattr(gd, "datetime", _Monday)
+    monkeypatch.setattr(gd, "EXTRACTION_MODE", "batched")
+    monkeypatch.setattr(gd, "fetch_facebook_posts", lambda url, since: fetched.append(url) or [])
+    gd.scrape_and_process()
+    assert sorted(fetched) == ["https://a/", "https://b/", "https://c/"]
+
+
+def test_each_tenant_has_its_own_readiness_and_marker(two_offices, monkeypatch):
+    gd.save_cache(_cache())
+    posted = []
+    monkeypatch.setattr(gd, "send_to_slack",
+                        lambda lunch, day, max_retries=3, channel=None: posted.append((channel, sorted(lunch))) or True)
+
+    assert gd.send_for_all_tenants(final=False, today=MONDAY) is True
+    assert posted == [("#zabok", ["A", "B"])]            # zagreb defers: C has no menu yet
+
+    assert gd.send_for_all_tenants(final=True, today=MONDAY) is True
+    assert posted[1:] == [("#zagreb", ["B", "C"])]       # zabok already sent; zagreb posts partial
+
+    cache = gd.load_cache()
+    assert cache["sent_date:zabok"] == cache["sent_date:zagreb"] == "2026-06-01"
+    assert "sent_date" not in cache
+
+
+def test_precompile_writes_one_record_per_tenant_channel(two_offices):
+    gd.precompile_payloads(_cache(), MONDAY)
+    data = sp.load_payloads()
+    zabok, zagreb = sp.get_payload(data, MONDAY, "#zabok"), sp.get_payload(data, MONDAY, "#zagreb")
+    assert (zabok["ready_count"], zabok["total"]) == (2, 2)
+    assert (zagreb["ready_count"], zagreb["total"]) == (1, 2)